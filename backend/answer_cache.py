@@ -0,0 +1,211 @@
+"""
+Near-duplicate question cache for the chat tutor.
+
+Questions are turned into hashed n-gram vectors locally (no network) and
+compared by cosine similarity, so "what's a TCP handshake" can be served
+the answer already given to "What is the TCP handshake?".
+"""
+import math
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+from backend.concepts import STOPWORDS, normalise_tokens
+
+# Hashed feature space; large enough that collisions are rare for short text
+DIMENSIONS = 1 << 18
+
+# Kept as features even though they are stopwords: "what is X" and
+# "why is X" are different questions
+QUESTION_WORDS = {'what', 'why', 'how', 'when', 'where', 'who', 'which'}
+# Dropped before building features: "what's X" (tokenised as "what X"),
+# "what is X" and "what are Xs" are the same question
+COPULAS = {'is', 'are', 'was', 'were', 'am'}
+# Also kept, and a question only matches one with the same negation:
+# "what is recursion" and "what is not recursion" differ by one word
+NEGATIONS = {
+    'not', 'no', 'never', 'nor', 'none', 'without', 'cannot', 'isnt', 'arent', 'wasnt',
+    'werent', 'dont', 'doesnt', 'didnt', 'cant', 'wont', 'shouldnt', 'wouldnt',
+    'couldnt', 'hasnt', 'havent', 'hadnt',
+}
+
+# Questions that only make sense with the conversation so far
+FOLLOW_UP = re.compile(
+    r"^\s*(and|but|so|also|then|what about|how about|why not|ok|okay)\b"
+    r"|\b(you said|you just|your (last )?answer|above|previous|earlier|again|elaborate"
+    r"|more detail|another example|that one|the same|the last one)\b",
+    re.IGNORECASE
+)
+PRONOUN = re.compile(
+    r"\b(it|that|this|they|them|those|these|he|she)\b"
+    r"(?!\s+(lecture|class|course|topic|chapter|section|video|talk)\b)",
+    re.IGNORECASE
+)
+
+
+def is_follow_up(question):
+    """True if the question refers back to earlier turns"""
+    if FOLLOW_UP.search(question):
+        return True
+    # "why is that?", "can you explain it" - short and pointing at something unnamed
+    return len(question.split()) <= 6 and bool(PRONOUN.search(question))
+
+
+def _feature(name):
+    return zlib.crc32(name.encode('utf-8')) % DIMENSIONS
+
+
+def question_vector(question):
+    """
+    Hashed n-gram vector of a question
+
+    Content words, word bigrams and trigrams, and character trigrams,
+    L2-normalised. Word n-grams run over every word, stopwords included, so
+    "is X faster than Y" and "is Y faster than X" do not look alike.
+
+    Returns:
+        dict: Sparse vector {feature: weight}
+    """
+    tokens = [t for t in normalise_tokens(question) if t not in COPULAS]
+    words = [t for t in tokens if t not in STOPWORDS or t in QUESTION_WORDS or t in NEGATIONS]
+
+    vector = {}
+
+    def add(name, weight):
+        feature = _feature(name)
+        vector[feature] = vector.get(feature, 0.0) + weight
+
+    for word in words:
+        add(f'w:{word}', 1.0)
+        padded = f'#{word}#'
+        for i in range(len(padded) - 2):
+            add(f'c:{padded[i:i + 3]}', 0.3)
+    for left, right in zip(tokens, tokens[1:]):
+        add(f'b:{left} {right}', 0.7)
+    for gram in zip(tokens, tokens[1:], tokens[2:]):
+        add(f't:{" ".join(gram)}', 0.5)
+
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    return {f: w / norm for f, w in vector.items()} if norm else {}
+
+
+def is_negated(question):
+    """True if the question contains a negation ("not", "isn't", ...)"""
+    return any(t in NEGATIONS for t in normalise_tokens(question))
+
+
+def cosine(a, b):
+    """Cosine similarity of two normalised sparse vectors"""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(f, 0.0) for f, w in a.items())
+
+
+class AnswerCache:
+    def __init__(self, threshold=0.9, max_entries=1000):
+        """
+        Initialize a per-lecture cache of answers to standalone questions
+
+        Args:
+            threshold: Cosine similarity at which a past question counts as
+                the same question (above 1 disables the cache)
+            max_entries: Answers kept across all lectures (least recently
+                used evicted)
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self._by_lecture = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.lookups = 0
+        self.hits = 0
+        self.skipped = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.threshold <= 1 and self.max_entries > 0
+
+    def lookup(self, lecture_id, question):
+        """
+        Find the answer to a near-identical earlier question
+
+        Args:
+            lecture_id: Lecture the question is about
+            question: The student's question
+
+        Returns:
+            dict: {'answer', 'question', 'similarity'} or None on a miss
+        """
+        if not self.enabled or not lecture_id:
+            return None
+        if is_follow_up(question):
+            with self._lock:
+                self.skipped += 1
+            return None
+
+        vector = question_vector(question)
+        negated = is_negated(question)
+        with self._lock:
+            self.lookups += 1
+            best, best_score = None, 0.0
+            for entry_id in self._by_lecture.get(lecture_id, ()):
+                entry = self._entries[entry_id]
+                if entry['negated'] != negated:
+                    continue
+                score = cosine(vector, entry['vector'])
+                if score > best_score:
+                    best, best_score = entry_id, score
+
+            if best is None or best_score < self.threshold:
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(best)
+            entry = self._entries[best]
+            return {'answer': entry['answer'], 'question': entry['question'], 'similarity': best_score}
+
+    def store(self, lecture_id, question, answer):
+        """Remember the answer to a standalone question"""
+        if not self.enabled or not lecture_id or is_follow_up(question):
+            return
+        vector = question_vector(question)
+        if not vector:
+            return
+
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                'lecture_id': lecture_id,
+                'question': question,
+                'vector': vector,
+                'negated': is_negated(question),
+                'answer': answer
+            }
+            self._by_lecture.setdefault(lecture_id, set()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                old_id, old = self._entries.popitem(last=False)
+                ids = self._by_lecture[old['lecture_id']]
+                ids.discard(old_id)
+                if not ids:
+                    del self._by_lecture[old['lecture_id']]
+                self.evictions += 1
+
+    def stats(self):
+        """Counters for monitoring how many upstream calls the cache saves"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'lectures': len(self._by_lecture),
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'hit_rate': round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                'skipped_follow_ups': self.skipped,
+                'evictions': self.evictions,
+                'threshold': self.threshold
+            }
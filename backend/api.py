@@ -1,9 +1,16 @@
 import traceback
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
+from flask_sock import Sock
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+import hmac
+import json
 import os
 import sys
+import threading
+import time
+import uuid
 
 # -----------------------------
 # PATH SETUP
@@ -12,19 +19,35 @@ BACKEND_DIR = Path(__file__).resolve().parent        # /backend
 BASE_DIR = BACKEND_DIR.parent                       # project root
 FRONTEND_DIR = BASE_DIR / "frontend"
 STATIC_DIR = FRONTEND_DIR / "static"
+DATA_DIR = Path(os.getenv("GAKU_DATA_DIR", BASE_DIR / "data"))
 
 # Fix Python import paths
 sys.path.insert(0, str(BASE_DIR))
 
-from backend.transcriber import Transcriber
-from backend.summarizer import Summarizer
-from backend.chatbot import LectureChatbot
+from backend.providers import ProviderRegistry, ProviderUnavailable
+from backend.lecture_store import LectureStore
+from backend.context_cache import create_context_cache
+from backend.concepts import ConceptIndexCache, concept_cache_key, normalize_concept
+from backend.notes import concept_names
+from backend.course_digest import CourseDigest
+from backend.extractive import extractive_summary
+from backend.jobs import JOB_TTL_SECONDS, JobStore, JobSweeper, WEBHOOK_AUTH_HEADER
+from backend.live import LiveSession, create_adapter, run_live_session
+from backend.assets import load_manifest, send_built_asset, send_built_index, send_built_service_worker
 
 # -----------------------------
 # CONSTANTS
 # -----------------------------
 MAX_FILE_SIZE = 200 * 1024 * 1024  # 200MB in bytes
 ALLOWED_EXTENSIONS = {'.mp3', '.wav', '.m4a', '.webm'}
+MAX_EXPLAIN_CONCEPTS = 20
+EXPLAIN_WORKERS = 4
+# Past this, /summary answers with the local extractive summary instead
+SUMMARY_TIMEOUT_SECONDS = float(os.getenv("GAKU_SUMMARY_TIMEOUT_SECONDS", 45))
+SUMMARY_WORKERS = 4
+# Each /live socket holds one of the worker's GAKU_THREADS request threads for
+# the whole lecture; at most this many, so the rest stay free for HTTP
+MAX_LIVE_SESSIONS = int(os.getenv("GAKU_MAX_LIVE_SESSIONS", max(1, int(os.getenv("GAKU_THREADS", 16)) // 2)))
 
 # -----------------------------
 # FLASK APP
@@ -35,18 +58,226 @@ app = Flask(
     static_url_path="/static"
 )
 CORS(app)
+sock = Sock(app)
 
-transcriber = Transcriber()
-summarizer = Summarizer()
-chatbot = LectureChatbot()
+# Provider clients are created on first use, so importing this module stays
+# cheap and a missing API key only disables the routes that need it.
+providers = ProviderRegistry()
+FAKE_PROVIDERS = os.getenv("GAKU_FAKE_PROVIDERS") == "1"
+
+# Lecture prefixes are registered with the provider once and shared by the
+# summarizer's and chatbot's prompts (see backend/context_cache.py)
+context_cache = create_context_cache(
+    os.getenv("GAKU_CONTEXT_CACHE", "local" if FAKE_PROVIDERS else "gemini"),
+    ttl=int(os.getenv("GAKU_CONTEXT_CACHE_TTL", 3600)),
+    storage_dir=DATA_DIR / "context_cache"
+)
+
+if FAKE_PROVIDERS:
+    # Local stand-ins with simulated latency and rate limits, for load tests
+    providers.register("transcriber", "backend.fakes:FakeTranscriber")
+    providers.register("summarizer", "backend.fakes:FakeSummarizer", context_cache=context_cache)
+    providers.register("chatbot", "backend.fakes:FakeChatbot", memory_dir=DATA_DIR / "memory",
+                       context_cache=context_cache)
+else:
+    providers.register("transcriber", "backend.transcriber:Transcriber")
+    providers.register("summarizer", "backend.summarizer:Summarizer", context_cache=context_cache)
+    providers.register("chatbot", "backend.chatbot:LectureChatbot", memory_dir=DATA_DIR / "memory",
+                       context_cache=context_cache)
+lectures = LectureStore(DATA_DIR / "lectures")
+concept_indexes = ConceptIndexCache()
+
+
+def combine_course_summaries(left_summary, right_summary):
+    result = providers.get("summarizer").combine_summaries(left_summary, right_summary)
+    if result["status"] != "success":
+        raise RuntimeError(result["error"])
+    return result["summary"]
+
+
+courses = CourseDigest(combine_course_summaries, DATA_DIR / "courses")
+
+
+# -----------------------------
+# LECTURE REFERENCES
+# -----------------------------
+def resolve_lecture(data, text_field="transcript"):
+    """
+    Find the lecture a request refers to
+
+    Clients send a lecture_id and only include the full text when the
+    server has reported the ID as unknown.
+
+    Returns:
+        tuple: (lecture_id, transcript) - transcript is None when unknown
+    """
+    text = data.get(text_field) or ""
+    if text.strip():
+        return lectures.add(text), text
+
+    lecture_id = data.get("lecture_id")
+    return lecture_id, lectures.get(lecture_id)
+
+
+def unknown_lecture_response(lecture_id):
+    return jsonify({
+        "status": "error",
+        "error": "Unknown lecture. Please send the transcript again.",
+        "unknown_lecture": True,
+        "lecture_id": lecture_id
+    }), 404
+
+
+def use_lecture(data):
+    """
+    Find the lecture a chat, quiz, explain or flashcards request is about
+
+    The chatbot is shared by every request thread, so the lecture is passed
+    to each call instead of being set on it.
+
+    Returns:
+        tuple: (lecture_id, transcript, error_response) - transcript is None
+        when the request names no lecture, error_response is set when the
+        lecture is unknown
+    """
+    if not (data.get("transcript") or "").strip() and not data.get("lecture_id"):
+        return None, None, None
+
+    lecture_id, transcript = resolve_lecture(data)
+    if transcript is None:
+        return lecture_id, None, unknown_lecture_response(lecture_id)
+    return lecture_id, transcript, None
+
+
+def lecture_summary(lecture_id, text, refresh=False, base_lecture_id=None, growing=False):
+    """
+    Summarise a lecture, reusing the stored summary for the same transcript
+
+    When base_lecture_id names an earlier version of a growing transcript
+    (live mode, appended recordings), only the new tail is summarised and
+    merged into that version's notes. While a live lecture is growing, a
+    short tail waits: those notes (pending_chars) are returned but not
+    stored for this lecture, so asking again summarises the rest.
+
+    Returns:
+        dict: Summarizer.update_summary result (without the notes state)
+    """
+    if not refresh:
+        summary = lectures.get_artifact(lecture_id, "summary")
+        if summary:
+            return {"status": "success", "summary": summary, "error": None}
+
+    previous_state = None
+    if base_lecture_id and not refresh:
+        previous_state = lectures.get_artifact(base_lecture_id, "notes")
+
+    result = providers.get("summarizer").update_summary(text, previous_state, growing)
+    if result["status"] == "success":
+        notes_state = result.pop("notes_state")
+        if not result.get("pending_chars"):
+            lectures.set_artifact(lecture_id, "notes", notes_state)
+            lectures.set_artifact(lecture_id, "summary", result["summary"])
+    return result
+
+
+# Summaries run here so a request can stop waiting without losing the work
+summary_pool = ThreadPoolExecutor(max_workers=SUMMARY_WORKERS, thread_name_prefix="gaku-summary")
+pending_summaries = {}
+pending_summaries_lock = threading.Lock()
+
+
+def start_summary(lecture_id, text, refresh=False, base_lecture_id=None, growing=False):
+    """
+    Run lecture_summary in the background, joining one already running
+
+    A summary that outlives the request still finishes and is stored, so
+    asking again returns it.
+
+    Returns:
+        Future: Resolves to the lecture_summary result
+    """
+    with pending_summaries_lock:
+        future = pending_summaries.get(lecture_id)
+        if future is None:
+            future = summary_pool.submit(lecture_summary, lecture_id, text, refresh, base_lecture_id, growing)
+            pending_summaries[lecture_id] = future
+
+            def forget(_):
+                with pending_summaries_lock:
+                    pending_summaries.pop(lecture_id, None)
+            future.add_done_callback(forget)
+    return future
+
+
+def explain_concepts(lecture_id, transcript, concepts):
+    """
+    Explain concepts from a lecture, reusing stored explanations
+
+    Explanations are stored under the normalised concept name, so "TCP
+    handshake" and "the tcp handshakes" share one. Missing ones are
+    generated concurrently, each from the passages the lecture's concept
+    index finds for it rather than the whole transcript.
+
+    Returns:
+        list: LectureChatbot.explain_concept results in request order, with
+        the concept and whether it came from the cache
+    """
+    notes = lectures.get_artifact(lecture_id, "notes")
+    terms = concept_names(notes["sections"]) if notes else ()
+    index = concept_indexes.get(lecture_id, transcript, terms)
+    chatbot = providers.get("chatbot")
+
+    results = {}
+    missing = {}
+    for concept in concepts:
+        key = normalize_concept(concept)
+        if key in results or key in missing:
+            continue
+        stored = lectures.get_artifact(lecture_id, f"explain.{concept_cache_key(concept)}")
+        if stored:
+            results[key] = {"status": "success", "explanation": stored["explanation"], "error": None, "cached": True}
+        else:
+            missing[key] = concept
+
+    def explain(concept):
+        result = chatbot.explain_concept(concept, transcript, index.excerpts(concept), index.terms())
+        if result["status"] == "success":
+            lectures.set_artifact(lecture_id, f"explain.{concept_cache_key(concept)}", {
+                "concept": concept,
+                "explanation": result["explanation"]
+            })
+        result["cached"] = False
+        return result
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=EXPLAIN_WORKERS) as executor:
+            results.update(zip(missing, executor.map(explain, missing.values())))
+
+    return [dict(results[normalize_concept(concept)], concept=concept) for concept in concepts]
 
 # -----------------------------
 # FRONTEND ROUTES
 # -----------------------------
 @app.route("/")
 def serve_index():
+    # Prefer the fingerprinted build (python -m backend.assets) when present
+    if load_manifest():
+        return send_built_index()
     return send_from_directory(FRONTEND_DIR, "index.html")
 
+@app.route("/sw.js")
+def serve_service_worker():
+    # Must stay at the root (its scope) under a fixed name
+    if load_manifest():
+        return send_built_service_worker()
+    response = send_from_directory(FRONTEND_DIR, "sw.js", max_age=0)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.route("/assets/<path:filename>")
+def serve_asset(filename):
+    return send_built_asset(filename)
+
 @app.route("/gaku_logo.png")
 def serve_logo():
     return send_from_directory(FRONTEND_DIR, "gaku_logo.png")
@@ -60,6 +291,7 @@ def serve_bg():
 # -----------------------------
 @app.route("/transcribe", methods=["POST"])
 def transcribe_api():
+    transcriber = providers.get("transcriber")
     try:
         if "file" not in request.files:
             return jsonify({"status": "error", "error": "No file uploaded"}), 400
@@ -98,14 +330,22 @@ def transcribe_api():
                 "error": "File is empty"
             }), 400
 
-        temp_path = BASE_DIR / f"temp_upload{ext}"
+        # Unique per request, concurrent uploads must not overwrite each other
+        temp_path = BASE_DIR / f"temp_upload_{uuid.uuid4().hex}{ext}"
         
         # Use try-finally for proper cleanup
         try:
             file.save(temp_path)
             print(f"✅ File saved: {temp_path} ({file_size / (1024*1024):.1f}MB)")
             
+            webhook_base = webhook_base_url()
+            if request.form.get("mode") == "async" and webhook_base:
+                # Upload and return; the provider's webhook finishes the job
+                return submit_transcription(transcriber, temp_path, webhook_base)
+            
             result = transcriber.transcribe_audio(str(temp_path))
+            if result["status"] == "success":
+                result["lecture_id"] = lectures.add(result["text"])
             return jsonify(result)
             
         finally:
@@ -123,19 +363,160 @@ def transcribe_api():
         return jsonify({"status": "error", "error": str(e)}), 500
 
 
+# -----------------------------
+# TRANSCRIPTION JOBS (WEBHOOKS)
+# -----------------------------
+def webhook_base_url():
+    """
+    Public URL the provider can reach us at, None if webhooks can't be used
+
+    Set GAKU_PUBLIC_URL in production. The fake providers call back on the
+    address the request came in on.
+    """
+    public_url = os.getenv("GAKU_PUBLIC_URL")
+    if public_url:
+        return public_url.rstrip("/")
+    if FAKE_PROVIDERS:
+        return request.host_url.rstrip("/")
+    return None
+
+
+def submit_transcription(transcriber, audio_path, webhook_base):
+    job = jobs.create()
+    webhook_url = f"{webhook_base}/webhooks/transcription/{job['id']}"
+    
+    submitted = transcriber.submit_audio(str(audio_path), webhook_url, job["token"])
+    if submitted["status"] != "success":
+        jobs.finish(job["id"], submitted)
+        return jsonify(submitted)
+    
+    jobs.update(job["id"], provider_id=submitted["provider_id"])
+    job_sweeper.start()
+    print(f"📤 Transcription job {job['id']} submitted")
+    return jsonify({"status": "processing", "job_id": job["id"]}), 202
+
+
+def complete_job(job):
+    """
+    Fetch a job's transcript from the provider and store it
+
+    Called by the webhook, and by the sweeper for jobs whose webhook is late.
+
+    Returns:
+        dict: The updated job
+    """
+    result = providers.get("transcriber").fetch_result(job["provider_id"])
+    if result["status"] == "processing":
+        return jobs.update(job["id"], checked=time.time())
+    
+    if result["status"] == "success":
+        result["lecture_id"] = lectures.add(result["text"])
+    print(f"📥 Transcription job {job['id']} finished: {result['status']}")
+    return jobs.finish(job["id"], result)
+
+
+jobs = JobStore(DATA_DIR / "jobs", ttl=int(os.getenv("GAKU_JOB_TTL_SECONDS", JOB_TTL_SECONDS)))
+job_sweeper = JobSweeper(
+    jobs,
+    complete_job,
+    interval=int(os.getenv("GAKU_JOB_SWEEP_SECONDS", 30)),
+    grace=int(os.getenv("GAKU_WEBHOOK_GRACE_SECONDS", 120))
+)
+
+
+@app.route("/webhooks/transcription/<job_id>", methods=["POST"])
+def transcription_webhook(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "error": "Unknown job"}), 404
+    
+    # As bytes: compare_digest rejects non-ASCII str with a TypeError
+    token = request.headers.get(WEBHOOK_AUTH_HEADER, "").encode("utf-8")
+    if not hmac.compare_digest(token, job["token"].encode("utf-8")):
+        return jsonify({"status": "error", "error": "Invalid webhook token"}), 403
+    
+    if job["status"] == "processing":
+        data = request.get_json(silent=True) or {}
+        if not job["provider_id"]:
+            # The webhook beat us to recording the provider's ID
+            job = jobs.update(job_id, provider_id=data.get("transcript_id"))
+        if job["status"] == "processing":
+            complete_job(job)
+    return jsonify({"status": "success"})
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_api(job_id):
+    """Status of a transcription job; the full transcript once it's done"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "error": "Unknown job"}), 404
+    
+    job_sweeper.start()
+    if job["status"] == "processing":
+        return jsonify({"status": "processing", "job_id": job_id})
+    
+    return jsonify(dict(job["result"], job_id=job_id))
+
+
+# -----------------------------
+# API: LIVE LECTURE (WEBSOCKET)
+# -----------------------------
+live_slots = threading.BoundedSemaphore(MAX_LIVE_SESSIONS)
+
+
+@sock.route("/live")
+def live_api(ws):
+    """Stream microphone audio in, push partial/final transcript segments out"""
+    if not live_slots.acquire(blocking=False):
+        ws.send(json.dumps({"type": "error", "error": "Too many live lectures on this server right now. Please try again in a few minutes."}))
+        return
+    try:
+        run_live_lecture(ws)
+    finally:
+        live_slots.release()
+
+
+def run_live_lecture(ws):
+    try:
+        adapter = create_adapter()
+    except ValueError as e:
+        ws.send(json.dumps({"type": "error", "error": str(e)}))
+        return
+    
+    checkpoints = []
+    
+    def on_transcript(transcript):
+        # Each checkpoint updates the lecture the chat and summary routes see
+        # and replaces the previous one, so a session leaves one transcript
+        lecture_id = lectures.lecture_id_for(transcript)
+        created = lecture_id not in lectures
+        lectures.add(transcript)
+        if checkpoints:
+            lectures.discard(checkpoints.pop())
+        if created:
+            checkpoints.append(lecture_id)
+        return {"lecture_id": lecture_id}
+    
+    run_live_session(ws, LiveSession(adapter, on_transcript=on_transcript))
+
+
 # -----------------------------
 # API: SET CONTEXT
 # -----------------------------
 @app.route("/set_context", methods=["POST"])
 def context_api():
     data = request.get_json()
-    transcript = data.get("transcript", "")
     
-    if not transcript.strip():
+    if not (data.get("transcript") or "").strip() and not data.get("lecture_id"):
         return jsonify({"status": "error", "error": "Empty transcript"}), 400
     
-    chatbot.set_lecture_context(transcript)
-    return jsonify({"status": "success"})
+    lecture_id, transcript = resolve_lecture(data)
+    if transcript is None:
+        return unknown_lecture_response(lecture_id)
+    
+    # Chat routes look the lecture up by this ID on every request
+    return jsonify({"status": "success", "lecture_id": lecture_id})
 
 
 # -----------------------------
@@ -144,12 +525,55 @@ def context_api():
 @app.route("/summary", methods=["POST"])
 def summary_api():
     data = request.get_json()
-    text = data.get("text", "")
     
-    if not text.strip():
+    if not (data.get("text") or "").strip() and not data.get("lecture_id"):
+        return jsonify({"status": "error", "error": "No text provided"}), 400
+    
+    lecture_id, text = resolve_lecture(data, text_field="text")
+    if text is None:
+        return unknown_lecture_response(lecture_id)
+    
+    future = start_summary(
+        lecture_id,
+        text,
+        refresh=bool(data.get("refresh")),
+        base_lecture_id=data.get("base_lecture_id"),
+        growing=bool(data.get("growing"))
+    )
+    try:
+        result = future.result(timeout=SUMMARY_TIMEOUT_SECONDS)
+        reason = result["error"] if result["status"] != "success" else None
+    except FuturesTimeout:
+        reason = f"The summary is taking longer than {SUMMARY_TIMEOUT_SECONDS:.0f}s"
+    except ProviderUnavailable as e:
+        reason = str(e)
+
+    if reason:
+        # Degraded mode: key sentences from the transcript, no model needed
+        print(f"⚠️ Serving extractive summary for {lecture_id}: {reason}")
+        result = extractive_summary(text, degraded_reason=reason)
+        result["degraded"] = True
+        result["warning"] = reason
+
+    result["lecture_id"] = lecture_id
+    return jsonify(result)
+
+
+@app.route("/summary/preview", methods=["POST"])
+def summary_preview_api():
+    """Key sentences and terms picked locally, shown while /summary runs"""
+    data = request.get_json()
+    
+    if not (data.get("text") or "").strip() and not data.get("lecture_id"):
         return jsonify({"status": "error", "error": "No text provided"}), 400
     
-    return jsonify(summarizer.generate_summary(text))
+    lecture_id, text = resolve_lecture(data, text_field="text")
+    if text is None:
+        return unknown_lecture_response(lecture_id)
+    
+    result = extractive_summary(text)
+    result["lecture_id"] = lecture_id
+    return jsonify(result)
 
 
 # -----------------------------
@@ -163,7 +587,31 @@ def chat_api():
     if not question.strip():
         return jsonify({"status": "error", "error": "No question provided"}), 400
     
-    return jsonify(chatbot.ask_question(question))
+    lecture_id, transcript, error_response = use_lecture(data)
+    if error_response:
+        return error_response
+    
+    session_id = data.get("session_id")
+    return jsonify(providers.get("chatbot").ask_question(question, transcript, lecture_id, session_id))
+
+
+@app.route("/chat/stats", methods=["GET"])
+def chat_stats_api():
+    """Hit rate of the near-duplicate answer cache (this worker only)"""
+    return jsonify(providers.get("chatbot").answers.stats())
+
+
+@app.route("/models/stats", methods=["GET"])
+def model_stats_api():
+    """Model routing, hedging counts, latencies and context caching (this worker only)"""
+    stats = {}
+    for name in ("summarizer", "chatbot"):
+        if providers.is_initialized(name):
+            router = providers.get(name).router
+            stats[name] = dict(router.stats(), tiers=router.config["tiers"])
+    if context_cache:
+        stats["context_cache"] = context_cache.stats()
+    return jsonify(stats)
 
 
 # -----------------------------
@@ -178,7 +626,11 @@ def quiz_api():
     if not isinstance(num_questions, int) or num_questions < 1 or num_questions > 20:
         num_questions = 5
     
-    return jsonify(chatbot.get_quiz_questions(num_questions))
+    lecture_id, transcript, error_response = use_lecture(data)
+    if error_response:
+        return error_response
+    
+    return jsonify(providers.get("chatbot").get_quiz_questions(transcript, num_questions))
 
 
 # -----------------------------
@@ -186,13 +638,37 @@ def quiz_api():
 # -----------------------------
 @app.route("/explain", methods=["POST"])
 def explain_api():
+    """Explain one `concept`, or a batch of `concepts` at once"""
     data = request.get_json()
-    concept = data.get("concept", "")
+    batch = "concepts" in data
+    concepts = data.get("concepts") if batch else [data.get("concept", "")]
+    
+    if not isinstance(concepts, list) or not all(isinstance(c, str) for c in concepts):
+        return jsonify({"status": "error", "error": "concepts must be a list of strings"}), 400
     
-    if not concept.strip():
+    concepts = [c.strip() for c in concepts if normalize_concept(c)]
+    if not concepts:
         return jsonify({"status": "error", "error": "No concept provided"}), 400
+    if len(concepts) > MAX_EXPLAIN_CONCEPTS:
+        return jsonify({"status": "error", "error": f"At most {MAX_EXPLAIN_CONCEPTS} concepts per request"}), 400
+    
+    lecture_id, transcript, error_response = use_lecture(data)
+    if error_response:
+        return error_response
+    
+    if not transcript:
+        return jsonify(providers.get("chatbot").explain_concept(concepts[0], transcript))
+    
+    results = explain_concepts(lecture_id, transcript, concepts)
+    if not batch:
+        return jsonify(results[0])
     
-    return jsonify(chatbot.explain_concept(concept))
+    errors = [r["error"] for r in results if r["status"] != "success"]
+    return jsonify({
+        "status": "error" if errors else "success",
+        "explanations": results,
+        "error": errors[0] if errors else None
+    })
 
 
 # -----------------------------
@@ -207,7 +683,9 @@ def flashcards_api():
     if not isinstance(num_cards, int) or num_cards < 1 or num_cards > 30:
         num_cards = 10
     
-    transcript = chatbot.lecture_context
+    lecture_id, transcript, error_response = use_lecture(data)
+    if error_response:
+        return error_response
     
     if not transcript:
         return jsonify({
@@ -216,7 +694,59 @@ def flashcards_api():
             "error": "No lecture context set. Please transcribe a lecture first."
         })
     
-    return jsonify(summarizer.generate_flashcards(transcript, num_cards))
+    return jsonify(providers.get("summarizer").generate_flashcards(transcript, num_cards))
+
+
+# -----------------------------
+# API: COURSE DIGEST
+# -----------------------------
+@app.route("/course/<course_id>", methods=["GET"])
+def course_api(course_id):
+    if not courses.is_valid_course_id(course_id):
+        return jsonify({"status": "error", "error": "Invalid course ID"}), 400
+    
+    try:
+        digest = courses.get_digest(course_id)
+    except RuntimeError as e:
+        return jsonify({"status": "error", "error": str(e)}), 502
+    
+    if digest is None:
+        return jsonify({"status": "error", "error": "Course has no lectures yet"}), 404
+    return jsonify(digest)
+
+
+@app.route("/course/<course_id>/lectures", methods=["POST"])
+def course_lecture_api(course_id):
+    """Add a lecture to a course (or replace the one at `position`)"""
+    data = request.get_json()
+    
+    if not courses.is_valid_course_id(course_id):
+        return jsonify({"status": "error", "error": "Invalid course ID"}), 400
+    
+    lecture_id, text = resolve_lecture(data)
+    if text is None:
+        return unknown_lecture_response(lecture_id)
+    
+    position = data.get("position")
+    if position is not None and (not isinstance(position, int) or position < 0):
+        return jsonify({"status": "error", "error": "Invalid position"}), 400
+    
+    summary = lecture_summary(lecture_id, text)
+    if summary["status"] != "success":
+        return jsonify(summary), 502
+    
+    try:
+        digest = courses.set_lecture(
+            course_id,
+            lecture_id,
+            summary["summary"],
+            title=data.get("title"),
+            position=position
+        )
+    except RuntimeError as e:
+        return jsonify({"status": "error", "error": str(e)}), 502
+    
+    return jsonify(digest)
 
 
 # -----------------------------
@@ -226,11 +756,34 @@ def flashcards_api():
 def not_found(e):
     return jsonify({"status": "error", "error": "Endpoint not found"}), 404
 
+@app.errorhandler(ProviderUnavailable)
+def provider_unavailable(e):
+    return jsonify({"status": "error", "error": str(e)}), 503
+
 @app.errorhandler(500)
 def internal_error(e):
     return jsonify({"status": "error", "error": "Internal server error"}), 500
 
 
+# -----------------------------
+# STARTUP HOOKS
+# -----------------------------
+def warm_up(create_clients=False):
+    """
+    Pay provider start-up costs before the first request
+
+    Called from gunicorn.conf.py. In the preloading master only the SDK
+    modules are imported; clients are created per worker after the fork.
+
+    Args:
+        create_clients: Also create the provider clients (per worker)
+    """
+    providers.preload_modules()
+    if create_clients:
+        for name, error in providers.warm_up().items():
+            print(f"⚠️ {name} not ready: {error}" if error else f"✅ {name} ready")
+
+
 # -----------------------------
 # RUN SERVER
 # -----------------------------
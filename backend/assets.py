@@ -0,0 +1,310 @@
+"""
+Static asset pipeline for the Gaku frontend.
+
+Run `python -m backend.assets` before deploying. It writes a build into
+frontend/dist/ where every asset is:
+- re-encoded (images are resized to their display size and saved as WebP)
+- fingerprinted with a content hash, so it can be cached forever
+- precompressed as .gz and .br next to the original
+
+index.html is rewritten to point at the fingerprinted names. The service
+worker (sw.js) is rewritten the same way but keeps its name, since browsers
+check for updates at a fixed URL. The Flask app serves the build when it
+exists and falls back to the raw files otherwise.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import re
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always produced
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:  # images are copied as-is without Pillow
+    Image = None
+
+BACKEND_DIR = Path(__file__).resolve().parent
+FRONTEND_DIR = BACKEND_DIR.parent / "frontend"
+DIST_DIR = FRONTEND_DIR / "dist"
+DIST_ASSETS_DIR = DIST_DIR / "assets"
+MANIFEST_PATH = DIST_DIR / "manifest.json"
+
+ASSETS_URL_PREFIX = "/assets/"
+
+# (source path relative to frontend/, URL it is referenced by)
+# Images come first so that text assets referencing them get rewritten.
+ASSETS = [
+    ("gaku_logo.png", "/gaku_logo.png"),
+    ("gaku_background.png", "/gaku_background.png"),
+    ("static/pcm_worklet.js", "/static/pcm_worklet.js"),
+    ("static/markdown_worker.js", "/static/markdown_worker.js"),
+    ("static/app.js", "/static/app.js"),
+]
+
+# Rewritten like index.html and served unfingerprinted from the site root
+SERVICE_WORKER = "sw.js"
+
+# Widest size each image is displayed at (2x for high-DPI screens)
+IMAGE_MAX_WIDTHS = {
+    "gaku_logo.png": 360,        # .sidebar-logo img { max-width: 180px }
+    "gaku_background.png": 1100,  # .main { background-size: 550px }
+}
+WEBP_QUALITY = 80
+
+COMPRESSIBLE_EXTENSIONS = {".html", ".js", ".css", ".json", ".svg"}
+HASH_LENGTH = 10
+
+# Builds whose assets stay in dist/assets, for clients still on an older
+# index.html or service worker
+KEEP_BUILDS = 3
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+
+# -----------------------------
+# BUILD
+# -----------------------------
+def _content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def _encode_image(source_name, data):
+    """Resize an image to its display size and re-encode it as WebP"""
+    if Image is None:
+        return data, Path(source_name).suffix
+
+    image = Image.open(BytesIO(data))
+    max_width = IMAGE_MAX_WIDTHS.get(source_name)
+    if max_width and image.width > max_width:
+        height = round(image.height * max_width / image.width)
+        image = image.resize((max_width, height), Image.LANCZOS)
+
+    out = BytesIO()
+    image.save(out, format="WEBP", quality=WEBP_QUALITY, method=6)
+    return out.getvalue(), ".webp"
+
+
+def _rewrite_references(text, url_map):
+    """Point every known asset URL in a text asset at its fingerprinted name"""
+    for original_url, hashed_url in url_map.items():
+        text = re.sub(
+            r'(?<=["\'(])' + re.escape(original_url) + r'(?=["\')])',
+            hashed_url,
+            text
+        )
+    return text
+
+
+def _write_atomic(path, data):
+    """Write then rename, so a running server never sends a partial file"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(data)
+    tmp_path.replace(path)
+
+
+def _write_compressed(path, data):
+    """Write .gz and .br variants of a text asset next to it"""
+    if path.suffix not in COMPRESSIBLE_EXTENSIONS:
+        return
+
+    _write_atomic(f"{path}.gz", gzip.compress(data, compresslevel=9, mtime=0))
+
+    if brotli is not None:
+        _write_atomic(f"{path}.br", brotli.compress(data, quality=11))
+
+
+def _previous_builds(manifest_path):
+    """Asset names of the builds before this one, newest first"""
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return []
+    if "builds" in manifest:
+        return manifest["builds"]
+    # Manifests from before builds were tracked
+    return [sorted(url[len(ASSETS_URL_PREFIX):] for url in manifest["assets"].values())]
+
+
+def _prune_assets(assets_dir, builds):
+    """Delete assets (and their .gz/.br variants) not used by any kept build"""
+    kept = {name for build_names in builds for name in build_names}
+    for path in assets_dir.iterdir():
+        name = path.name
+        for extension in (".gz", ".br"):
+            name = name.removesuffix(extension)
+        if name not in kept:
+            path.unlink()
+
+
+def build(frontend_dir=FRONTEND_DIR, dist_dir=DIST_DIR):
+    """
+    Build the fingerprinted, precompressed frontend into dist_dir
+
+    Safe to run next to a live server: assets are added next to the
+    previous build's, index.html, sw.js and the manifest are replaced
+    atomically, and only assets no longer used by the last KEEP_BUILDS
+    builds are deleted.
+
+    Args:
+        frontend_dir: Directory holding index.html and the raw assets
+        dist_dir: Output directory
+
+    Returns:
+        dict: The manifest that was written
+    """
+    frontend_dir = Path(frontend_dir)
+    dist_dir = Path(dist_dir)
+    assets_dir = dist_dir / "assets"
+    manifest_path = dist_dir / "manifest.json"
+
+    previous_builds = _previous_builds(manifest_path)
+    assets_dir.mkdir(parents=True, exist_ok=True)
+
+    url_map = {}
+    for source_name, url in ASSETS:
+        source = frontend_dir / source_name
+        data = source.read_bytes()
+        suffix = source.suffix
+
+        if suffix == ".png":
+            original_size = len(data)
+            data, suffix = _encode_image(source_name, data)
+            print(f"🖼️ {source_name}: {original_size / 1024:.0f}KB → {len(data) / 1024:.0f}KB")
+        elif suffix in COMPRESSIBLE_EXTENSIONS:
+            data = _rewrite_references(data.decode("utf-8"), url_map).encode("utf-8")
+
+        hashed_name = f"{source.stem}.{_content_hash(data)}{suffix}"
+        target = assets_dir / hashed_name
+        _write_atomic(target, data)
+        _write_compressed(target, data)
+
+        url_map[url] = ASSETS_URL_PREFIX + hashed_name
+        print(f"📦 {url} → {url_map[url]}")
+
+    html = (frontend_dir / "index.html").read_text(encoding="utf-8")
+    html = _rewrite_references(html, url_map).encode("utf-8")
+    index_path = dist_dir / "index.html"
+    _write_atomic(index_path, html)
+    _write_compressed(index_path, html)
+
+    # A new shell version whenever any asset changes, so clients drop the old cache
+    worker = (frontend_dir / SERVICE_WORKER).read_text(encoding="utf-8")
+    worker = _rewrite_references(worker, url_map)
+    worker = worker.replace('const SHELL_VERSION = "dev";', f'const SHELL_VERSION = "{_content_hash(html)}";')
+    worker = worker.encode("utf-8")
+    worker_path = dist_dir / SERVICE_WORKER
+    _write_atomic(worker_path, worker)
+    _write_compressed(worker_path, worker)
+
+    builds = [sorted(url[len(ASSETS_URL_PREFIX):] for url in url_map.values())] + previous_builds
+    manifest = {
+        "assets": url_map,
+        "index_etag": _content_hash(html),
+        "service_worker_etag": _content_hash(worker),
+        "builds": builds[:KEEP_BUILDS],
+    }
+    # A running server picks up the new build once the manifest changes
+    _write_atomic(manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+    _prune_assets(assets_dir, manifest["builds"])
+    print(f"✅ Frontend build written to {dist_dir}")
+    return manifest
+
+
+# -----------------------------
+# SERVING
+# -----------------------------
+def load_manifest():
+    """
+    The build manifest, None when there is no build
+
+    Cached on the file's mtime, so a build made while the server is running
+    is served from the next request on.
+    """
+    try:
+        return _read_manifest(MANIFEST_PATH.stat().st_mtime_ns)
+    except FileNotFoundError:  # no build, or a rebuild is in progress
+        return None
+
+
+@lru_cache(maxsize=1)
+def _read_manifest(mtime):
+    return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+
+
+def _pick_encoding(path):
+    """Choose the best precompressed variant the client accepts"""
+    accepted = request.accept_encodings
+    for encoding, extension in (("br", ".br"), ("gzip", ".gz")):
+        if accepted[encoding] and Path(f"{path}{extension}").exists():
+            return encoding, extension
+    return None, ""
+
+
+def send_precompressed(directory, filename, etag, cache_control):
+    """
+    Send a built file, preferring a precompressed variant
+
+    Conditional requests are answered with 304 when the ETag matches.
+
+    Args:
+        directory: Directory holding the file and its .gz/.br variants
+        filename: Name of the uncompressed file
+        etag: Content hash identifying this version of the file
+        cache_control: Cache-Control header value
+
+    Returns:
+        Response: Flask response (200 or 304)
+    """
+    path = Path(directory) / filename
+    encoding, extension = _pick_encoding(path)
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    response = send_from_directory(
+        directory,
+        filename + extension,
+        mimetype=mimetype,
+        etag=f"{etag}-{encoding}" if encoding else etag,
+        conditional=True,
+        max_age=None
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+def send_built_asset(filename):
+    """Serve a fingerprinted asset from the build with immutable caching"""
+    # Fingerprinted names look like app.<hash>.js, so the hash doubles as ETag
+    parts = filename.split(".")
+    etag = parts[-2] if len(parts) >= 3 else filename
+    return send_precompressed(DIST_ASSETS_DIR, filename, etag, IMMUTABLE_CACHE)
+
+
+def send_built_index():
+    """Serve the rewritten index.html, revalidated on every load"""
+    manifest = load_manifest()
+    return send_precompressed(DIST_DIR, "index.html", manifest["index_etag"], REVALIDATE_CACHE)
+
+
+def send_built_service_worker():
+    """Serve the rewritten service worker, revalidated on every check"""
+    manifest = load_manifest()
+    return send_precompressed(DIST_DIR, SERVICE_WORKER, manifest["service_worker_etag"], REVALIDATE_CACHE)
+
+
+if __name__ == "__main__":
+    build()
@@ -2,59 +2,93 @@ import os
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from backend.answer_cache import AnswerCache
+from backend.context_cache import lecture_prefix
+from backend.memory import MemoryStore
+from backend.routing import ModelRouter
+
 load_dotenv()
 
 class LectureChatbot:
-    def __init__(self):
-        """Initialize the chatbot with Google Gemini"""
+    def __init__(self, memory_dir=None, context_cache=None):
+        """
+        Initialize the chatbot with Google Gemini
+        
+        Args:
+            memory_dir: Directory to persist per-session chat memory in
+            context_cache: Shared ContextCache for lecture prefixes
+        """
+        self._configure()
+        # Picks the model per operation (see backend/routing.py)
+        self.router = ModelRouter(self._create_model, context_cache=context_cache)
+        
+        # One instance serves every request thread, so the lecture is passed
+        # to each call rather than kept here
+        
+        # Recent turns verbatim, older ones folded into a summary in the background
+        self.memory = MemoryStore(
+            self._summarize_turns,
+            storage_dir=memory_dir,
+            token_budget=int(os.getenv('GAKU_CHAT_HISTORY_TOKENS', 1200)),
+            max_age=float(os.getenv('GAKU_CHAT_MEMORY_DAYS', 7)) * 24 * 3600
+        )
+        
+        # Answers to standalone questions, reused for rephrasings of them
+        self.answers = AnswerCache(
+            threshold=float(os.getenv('GAKU_ANSWER_CACHE_THRESHOLD', 0.9)),
+            max_entries=int(os.getenv('GAKU_ANSWER_CACHE_SIZE', 1000))
+        )
+    
+    def _configure(self):
         self.api_key = os.getenv('GEMINI_API_KEY')
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
         
         genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('models/gemini-2.5-flash')
-
-        self.chat_history = []
-        self.lecture_context = None
     
-    def set_lecture_context(self, transcript_text):
-        """
-        Set the lecture transcript as context for the chatbot
-        
-        Args:
-            transcript_text: The full lecture transcription
-        """
-        self.lecture_context = transcript_text
-        self.chat_history = []
-        print(f"✅ Lecture context set ({len(transcript_text)} characters)")
+    def _create_model(self, model_name):
+        return genai.GenerativeModel(model_name)
     
-    def ask_question(self, question):
+    def ask_question(self, question, transcript_text, lecture_id=None, session_id=None):
         """
         Ask a question about the lecture
         
         Args:
             question: User's question about the lecture
+            transcript_text: The full lecture transcription
+            lecture_id: Content-hash ID of the transcript (see LectureStore)
+            session_id: Browser session the conversation belongs to
             
         Returns:
             dict: Contains answer and status
         """
-        if not self.lecture_context:
+        if not transcript_text:
             return {
                 'status': 'error',
                 'answer': '⚠️ No lecture has been transcribed yet. Please:\n\n1. Go to "Upload & Transcribe"\n2. Upload your audio file\n3. Click "Transcribe Now"\n4. Then come back here to chat!',
                 'error': 'No context'
             }
         
+        session_key = self._session_key(lecture_id, session_id)
+        cached = self.answers.lookup(lecture_id, question)
+        if cached:
+            self.memory.record(session_key, question, cached['answer'])
+            print(f"⚡ Answer cache hit ({cached['similarity']:.2f} similar to: {cached['question'][:50]}), "
+                  f"hit rate {self.answers.stats()['hit_rate']:.0%}")
+            return {
+                'status': 'success',
+                'answer': cached['answer'],
+                'cached': True,
+                'error': None
+            }
+        
         try:
-            # Create a comprehensive prompt with context
+            # The lecture itself is the shared prefix sent before this (see lecture_prefix)
             prompt = f"""
 You are Gaku, a helpful AI tutor assisting a student with their lecture notes. Your goal is to help them understand the material better.
 
-LECTURE CONTENT:
-{self.lecture_context}
-
 PREVIOUS CONVERSATION:
-{self._format_chat_history()}
+{self._format_chat_history(lecture_id, session_id)}
 
 STUDENT'S QUESTION:
 {question}
@@ -82,24 +116,19 @@ Your answer in Markdown:
 """
             
             print(f"💬 Processing question: {question[:50]}...")
-            response = self.model.generate_content(prompt)
+            response = self.router.generate('chat', prompt, lecture_prefix(transcript_text))
             answer = response.text
             
-            # Add to chat history (keep only last 10 exchanges)
-            self.chat_history.append({
-                'question': question,
-                'answer': answer
-            })
-            
-            # Limit chat history to prevent memory issues
-            if len(self.chat_history) > 10:
-                self.chat_history = self.chat_history[-10:]
+            # Older turns are summarised off the request path once over budget
+            self.memory.record(session_key, question, answer)
+            self.answers.store(lecture_id, question, answer)
             
             print(f"✅ Answer generated ({len(answer)} characters)")
             
             return {
                 'status': 'success',
                 'answer': answer,
+                'cached': False,
                 'error': None
             }
             
@@ -111,33 +140,59 @@ Your answer in Markdown:
                 'error': str(e)
             }
     
-    def _format_chat_history(self):
+    def _session_key(self, lecture_id, session_id):
+        """Chat memory is kept per lecture and browser session"""
+        return f"{lecture_id or 'default'}:{session_id or 'default'}"
+    
+    def _format_chat_history(self, lecture_id=None, session_id=None):
         """Format chat history for context"""
-        if not self.chat_history:
-            return "No previous questions."
-        
-        formatted = []
-        for i, item in enumerate(self.chat_history[-5:], 1):  # Last 5 questions
-            formatted.append(f"Q{i}: {item['question']}\nA{i}: {item['answer']}\n")
+        return self.memory.get(self._session_key(lecture_id, session_id)).render()
+    
+    def _summarize_turns(self, summary, turns):
+        """
+        Fold older question/answer pairs into the running conversation summary
         
-        return "\n".join(formatted)
+        Args:
+            summary: The current running summary (may be empty)
+            turns: Question/answer dicts to fold in, oldest first
+            
+        Returns:
+            str: The updated summary
+        """
+        formatted = "\n".join(f"Q: {t['question']}\nA: {t['answer']}\n" for t in turns)
+        prompt = f"""
+Update the running summary of a tutoring conversation about a lecture.
+
+CURRENT SUMMARY:
+{summary or "(empty)"}
+
+NEW EXCHANGES:
+{formatted}
+
+Write the updated summary as at most 8 short bullet points (-). Keep what the student
+asked about, what was explained, and any misunderstandings. Under 150 words. No preamble.
+"""
+        print(f"🧠 Summarising {len(turns)} older chat turns...")
+        response = self.router.generate('memory', prompt)
+        return response.text
     
-    def clear_history(self):
+    def clear_history(self, lecture_id=None, session_id=None):
         """Clear chat history"""
-        self.chat_history = []
+        self.memory.clear(self._session_key(lecture_id, session_id))
         print("🗑️ Chat history cleared")
     
-    def get_quiz_questions(self, num_questions=5):
+    def get_quiz_questions(self, transcript_text, num_questions=5):
         """
         Generate quiz questions based on the lecture
         
         Args:
+            transcript_text: The full lecture transcription
             num_questions: Number of quiz questions to generate
             
         Returns:
             dict: Contains questions and status
         """
-        if not self.lecture_context:
+        if not transcript_text:
             return {
                 'status': 'error',
                 'questions': None,
@@ -145,11 +200,7 @@ Your answer in Markdown:
             }
         
         try:
-            prompt = f"""
-Based on this lecture, create {num_questions} multiple-choice quiz questions to test understanding.
-
-LECTURE CONTENT:
-{self.lecture_context}
+            prompt = f"""TASK: Based on the lecture above, create {num_questions} multiple-choice quiz questions to test understanding.
 
 Format each question EXACTLY like this:
 
@@ -196,7 +247,7 @@ Create exactly {num_questions} questions following this format.
 """
             
             print(f"📝 Generating {num_questions} quiz questions...")
-            response = self.model.generate_content(prompt)
+            response = self.router.generate('quiz', prompt, lecture_prefix(transcript_text))
             
             print(f"✅ Quiz generated successfully")
             
@@ -214,29 +265,43 @@ Create exactly {num_questions} questions following this format.
                 'error': str(e)
             }
     
-    def explain_concept(self, concept):
+    def explain_concept(self, concept, transcript_text, excerpts=None, lecture_terms=None):
         """
         Get detailed explanation of a specific concept from the lecture
         
         Args:
             concept: The concept to explain
+            transcript_text: The full lecture transcription
+            excerpts: Transcript passages about the concept (see ConceptIndex).
+                The whole lecture is sent when None.
+            lecture_terms: Key terms of the lecture, to suggest related topics
             
         Returns:
             dict: Contains explanation and status
         """
-        if not self.lecture_context:
+        if not transcript_text:
             return {
                 'status': 'error',
                 'explanation': None,
                 'error': 'No lecture context set. Please transcribe a lecture first.'
             }
         
+        if excerpts is None:
+            # The whole lecture, as the shared (cached) prefix
+            prefix = lecture_prefix(transcript_text)
+            lecture_content = "the lecture above"
+        else:
+            # Only the passages that discuss the concept, to keep the prompt small
+            prefix = None
+            passages = "\n\n[...]\n\n".join(excerpts) or "(The lecture does not mention this concept directly.)"
+            lecture_content = f"this lecture\n\nRELEVANT LECTURE EXCERPTS:\n{passages}"
+            if lecture_terms:
+                lecture_content += f"\n\nTOPICS COVERED IN THE LECTURE:\n{', '.join(lecture_terms)}"
+        
         try:
-            prompt = f"""
-From this lecture, provide a detailed explanation of: "{concept}" using MARKDOWN formatting.
+            prompt = f"""TASK: Provide a detailed explanation of "{concept}" from {lecture_content}
 
-LECTURE CONTENT:
-{self.lecture_context}
+Use MARKDOWN formatting.
 
 Structure your explanation using PROPER MARKDOWN:
 
@@ -301,7 +366,7 @@ Structure your explanation using PROPER MARKDOWN:
 """
             
             print(f"💡 Explaining concept: {concept}")
-            response = self.model.generate_content(prompt)
+            response = self.router.generate('explain', prompt, prefix)
             
             print(f"✅ Explanation generated")
             
@@ -0,0 +1,239 @@
+"""
+Per-lecture concept index: key terms mapped to the transcript passages
+that discuss them.
+
+Concept names are normalised (case, articles, plurals, a few synonyms) so
+"TCP handshake", "tcp handshakes" and "the TCP handshake" share one key,
+which is also used to cache explanations.
+"""
+import hashlib
+import re
+import threading
+from collections import Counter, OrderedDict
+
+ARTICLES = {'a', 'an', 'the'}
+
+# Abbreviations students commonly type, mapped to the lecture's wording
+SYNONYMS = {
+    '&': 'and',
+    'vs': 'versus',
+    'algo': 'algorithm',
+    'app': 'application',
+    'db': 'database',
+    'info': 'information',
+    'intro': 'introduction',
+    'os': 'operating system',
+}
+
+STOPWORDS = ARTICLES | {
+    'and', 'or', 'but', 'if', 'then', 'so', 'of', 'to', 'in', 'on', 'at', 'by',
+    'for', 'with', 'from', 'as', 'is', 'are', 'was', 'were', 'be', 'been', 'it',
+    'this', 'that', 'these', 'those', 'we', 'you', 'i', 'they', 'he', 'she',
+    'our', 'your', 'their', 'its', 'not', 'no', 'do', 'does', 'did', 'have',
+    'has', 'had', 'can', 'will', 'would', 'should', 'could', 'what', 'which',
+    'who', 'how', 'when', 'where', 'why', 'there', 'here', 'about', 'into',
+    'just', 'like', 'also', 'very', 'really', 'some', 'all', 'more', 'one',
+    'okay', 'right', 'um', 'uh', 'yeah', 'going', 'get', 'got', 'let', 'thing',
+}
+
+TOKEN = re.compile(r"[a-z0-9+#&]+")
+SENTENCE = re.compile(r"[^.!?\n]+[.!?]*")
+ACRONYM = re.compile(r"\b[A-Z][A-Z0-9]{1,9}s?\b")
+
+# Sentences either side of a match included for context
+CONTEXT_SENTENCES = 1
+# Upper bound on the excerpt text sent for one concept
+MAX_SPAN_CHARS = 3000
+# Key terms indexed up front
+MAX_TERMS = 50
+
+
+def _singular(word):
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('sses', 'ches', 'shes', 'xes')):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+def normalise_tokens(text):
+    """Lowercase words without articles, singular, abbreviations expanded"""
+    words = []
+    for word in TOKEN.findall(text.lower().replace("'", "")):
+        word = SYNONYMS.get(word, word)
+        for part in word.split():
+            if part not in ARTICLES:
+                words.append(_singular(part))
+    return words
+
+
+def normalize_concept(name):
+    """
+    Cache key for a concept name
+
+    Args:
+        name: Concept as typed by the student or found in the notes
+
+    Returns:
+        str: e.g. 'tcp handshake' for "The TCP Handshakes"
+    """
+    return ' '.join(normalise_tokens(name))
+
+
+def concept_cache_key(name):
+    """Short, filename-safe form of normalize_concept(name)"""
+    return hashlib.sha256(normalize_concept(name).encode('utf-8')).hexdigest()[:16]
+
+
+class ConceptIndex:
+    def __init__(self, transcript_text, terms=()):
+        """
+        Initialize the concept index of one lecture
+
+        The transcript is split into sentences with an inverted index from
+        normalised words to sentences. Key terms (from the notes when given,
+        plus acronyms and repeated phrases in the transcript) are looked up
+        once up front; other concepts are looked up on demand and cached.
+
+        Args:
+            transcript_text: The full lecture transcription
+            terms: Concept names from the lecture notes, if available
+        """
+        self.text = transcript_text
+        self.seed_terms = tuple(terms)
+        self.sentences = [(m.start(), m.end()) for m in SENTENCE.finditer(transcript_text)
+                          if m.group().strip()]
+        self.sentence_tokens = [normalise_tokens(transcript_text[start:end])
+                                for start, end in self.sentences]
+
+        self.postings = {}
+        for i, tokens in enumerate(self.sentence_tokens):
+            for token in tokens:
+                self.postings.setdefault(token, set()).add(i)
+
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.key_terms = []
+        for name in self.seed_terms + tuple(self._extract_terms()):
+            if len(self.key_terms) >= MAX_TERMS:
+                break
+            entry = self.lookup(name)
+            if entry['spans'] and entry['name'] not in self.key_terms:
+                self.key_terms.append(entry['name'])
+
+    def lookup(self, concept):
+        """
+        Find the passages discussing a concept
+
+        Args:
+            concept: Concept name in any form
+
+        Returns:
+            dict: {'key', 'name', 'spans': [{'start', 'end', 'text'}]}
+        """
+        key = normalize_concept(concept)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        entry = {'key': key, 'name': concept.strip(), 'spans': self._find_spans(key.split())}
+        with self._lock:
+            return self._entries.setdefault(key, entry)
+
+    def excerpts(self, concept):
+        """Passage texts for a concept, in transcript order"""
+        return [span['text'] for span in self.lookup(concept)['spans']]
+
+    def terms(self):
+        """Names of the key terms the lecture covers"""
+        return list(self.key_terms)
+
+    def _find_spans(self, tokens):
+        if not tokens:
+            return []
+
+        postings = [self.postings.get(token, set()) for token in tokens]
+        matches = sorted(set.intersection(*postings))
+        phrase = [i for i in matches if self._has_phrase(self.sentence_tokens[i], tokens)]
+        matches = phrase or matches
+        if not matches and len(tokens) > 1:
+            # Partial matches: sentences containing most of the words
+            counts = Counter(i for posting in postings for i in posting)
+            needed = len(tokens) // 2 + 1
+            matches = sorted(i for i, count in counts.items() if count >= needed)
+
+        spans = []
+        total = 0
+        for i in matches:
+            first = max(0, i - CONTEXT_SENTENCES)
+            last = min(len(self.sentences) - 1, i + CONTEXT_SENTENCES)
+            if spans and first <= spans[-1][1] + 1:
+                spans[-1][1] = max(spans[-1][1], last)
+            else:
+                spans.append([first, last])
+
+        result = []
+        for first, last in spans:
+            start, end = self.sentences[first][0], self.sentences[last][1]
+            text = self.text[start:end].strip()
+            if total + len(text) > MAX_SPAN_CHARS and result:
+                break
+            result.append({'start': start, 'end': end, 'text': text[:MAX_SPAN_CHARS]})
+            total += len(text)
+        return result
+
+    @staticmethod
+    def _has_phrase(sentence, tokens):
+        n = len(tokens)
+        return any(sentence[i:i + n] == tokens for i in range(len(sentence) - n + 1))
+
+    def _extract_terms(self):
+        """Acronyms and phrases the lecturer keeps repeating"""
+        counts = Counter(ACRONYM.findall(self.text))
+        for tokens in self.sentence_tokens:
+            words = [t if t not in STOPWORDS else None for t in tokens]
+            for n in (2, 3):
+                for i in range(len(words) - n + 1):
+                    gram = words[i:i + n]
+                    if all(gram) and not any(w.isdigit() for w in gram):
+                        counts[' '.join(gram)] += 1
+        return [term for term, count in counts.most_common(MAX_TERMS * 2) if count >= 3]
+
+
+class ConceptIndexCache:
+    def __init__(self, max_cached=32):
+        """
+        Initialize a cache of concept indexes for recently used lectures
+
+        Args:
+            max_cached: Number of lecture indexes kept in memory
+        """
+        self.max_cached = max_cached
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, lecture_id, transcript_text, terms=()):
+        """
+        Return the index for a lecture, building it on first use
+
+        Rebuilt when notes with different concept names become available.
+        """
+        terms = tuple(terms)
+        with self._lock:
+            index = self._indexes.get(lecture_id)
+            if index is not None and (index.seed_terms == terms or not terms):
+                self._indexes.move_to_end(lecture_id)
+                return index
+
+        index = ConceptIndex(transcript_text, terms)
+        with self._lock:
+            self._indexes[lecture_id] = index
+            self._indexes.move_to_end(lecture_id)
+            while len(self._indexes) > self.max_cached:
+                self._indexes.popitem(last=False)
+        return index
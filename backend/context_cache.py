@@ -0,0 +1,315 @@
+"""
+Provider-side caching of the lecture context.
+
+Every prompt about a lecture starts with the same lecture_prefix() and puts
+the operation's instructions after it. When a lecture's prefix is used a
+second time with a model, it is registered with the provider, and later
+calls (chat, quiz, explain, flashcards...) on that model send only their
+suffix, paying the cached-token rate for the transcript. Cached content is
+bound to a model, so operations routed to the same tier share one entry.
+
+Two implementations share the bookkeeping (TTL, eviction, stats):
+    GeminiContextCache   Gemini's context caching API
+    LocalContextCache    Stand-in that sends the full prompt, for the fakes
+                         and for providers without caching
+
+Settings (environment):
+    GAKU_CONTEXT_CACHE        gemini, local or off (default gemini, or local
+                              with GAKU_FAKE_PROVIDERS=1)
+    GAKU_CONTEXT_CACHE_TTL    Seconds an unused lecture stays cached (default 3600)
+"""
+import hashlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from pathlib import Path
+
+# Gemini rejects caches smaller than this many tokens; shorter prefixes are
+# sent inline. Roughly 4 characters per token.
+MIN_CACHE_TOKENS = {'pro': 4096}
+DEFAULT_MIN_CACHE_TOKENS = 1024
+CHARS_PER_TOKEN = 4
+
+
+def lecture_prefix(transcript_text):
+    """
+    The part of every lecture prompt that comes before the task
+
+    Must not depend on the operation, so all prompts about one lecture
+    share it byte for byte.
+    """
+    return f"""You are Gaku, an AI study assistant. Below is the transcript of a lecture, followed by a task about it.
+
+LECTURE TRANSCRIPT:
+{transcript_text}
+
+---
+
+"""
+
+
+def prefix_key(model_name, prefix):
+    """Cached content is bound to one model, so the key covers both"""
+    digest = hashlib.sha256(prefix.encode('utf-8')).hexdigest()[:32]
+    return f"{model_name.rsplit('/', 1)[-1]}.{digest}"
+
+
+class ContextCache(ABC):
+    def __init__(self, ttl=3600, max_entries=64, storage_dir=None, min_uses=2):
+        """
+        Initialize the cache bookkeeping
+
+        Args:
+            ttl: Seconds a cached prefix lives after its last use
+            max_entries: Registrations remembered by this process; the least
+                recently used are forgotten (the provider expires them by TTL)
+            storage_dir: Directory to share registrations between workers in.
+                Memory only when None.
+            min_uses: Calls with a prefix before it is registered. The first
+                call sends it inline anyway, and one-off prompts (e.g. live
+                summaries of a growing transcript) never pay for storage.
+        """
+        self.ttl = ttl
+        self.min_uses = min_uses
+        self.max_entries = max_entries
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+        if self.storage_dir:
+            self.storage_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._counts = {'registered': 0, 'hits': 0, 'inline': 0, 'extended': 0,
+                        'cached_chars': 0, 'sent_chars': 0}
+
+    def generate(self, model_name, prefix, suffix, get_model):
+        """
+        Run prefix + suffix on a model, with the prefix served from the cache
+
+        Args:
+            model_name: Model the router picked
+            prefix: lecture_prefix() of the lecture
+            suffix: Operation-specific part of the prompt
+            get_model: Callable (model_name) -> model, for uncached calls
+
+        Returns:
+            The model's response (with .text)
+        """
+        entry = self.register(model_name, prefix)
+        if entry['name'] is None:
+            self._count(inline=1, sent_chars=len(prefix) + len(suffix))
+            return get_model(model_name).generate_content(prefix + suffix)
+
+        try:
+            response = self._generate(entry, model_name, prefix, suffix, get_model)
+        except LookupError:
+            # Released elsewhere (another worker, or the provider expired it
+            # early); the next call registers it again
+            self._forget(entry['key'])
+            self._count(inline=1, sent_chars=len(prefix) + len(suffix))
+            return get_model(model_name).generate_content(prefix + suffix)
+
+        self._count(hits=1, cached_chars=len(prefix), sent_chars=len(suffix))
+        return response
+
+    def register(self, model_name, prefix):
+        """
+        Count a use of the prefix and cache it for the model once it repeats
+
+        Registration happens once per lecture and model. An entry close to
+        expiry has its TTL extended, so lectures that are being studied stay
+        cached and idle ones lapse on their own.
+
+        Returns:
+            dict: The entry; its 'name' is None when the prefix is sent inline
+        """
+        key = prefix_key(model_name, prefix)
+        with self._lock:
+            # Concurrent first calls for one lecture register it only once
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            now = time.time()
+            with self._lock:
+                entry = self._entries.get(key)
+            # Another worker may have registered or extended it since; the
+            # most up to date registration wins
+            candidates = [e for e in (entry, self._load(key)) if e]
+            entry = max(candidates, key=lambda e: (e['name'] is not None, e['expires']), default=None)
+            if entry and entry['expires'] <= now + 30:
+                entry = None
+
+            if entry is None:
+                entry = {'key': key, 'name': None, 'model': model_name, 'expires': now + self.ttl,
+                         'uses': 0, 'failed': False}
+            entry['uses'] += 1
+
+            if entry['name'] is None:
+                if (entry['uses'] >= self.min_uses and not entry['failed']
+                        and len(prefix) >= self.min_chars(model_name)):
+                    try:
+                        entry['name'] = self._create(key, model_name, prefix)
+                        entry['expires'] = now + self.ttl
+                        self._count(registered=1)
+                        self._save(entry)
+                        print(f"🗄️ Cached lecture context for {model_name} ({len(prefix)} characters)")
+                    except Exception as e:
+                        # Not retried until the entry expires
+                        entry['failed'] = True
+                        print(f"⚠️ Could not cache lecture context for {model_name}: {e}")
+            elif entry['expires'] - now < self.ttl / 2:
+                try:
+                    self._extend(entry)
+                    entry['expires'] = now + self.ttl
+                    self._count(extended=1)
+                    self._save(entry)
+                except Exception as e:
+                    print(f"⚠️ Could not extend cached lecture context {entry['name']}: {e}")
+
+        with self._lock:
+            # Most recently used last
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                old = self._entries.pop(next(iter(self._entries)))
+                self._key_locks.pop(old['key'], None)
+        return entry
+
+    def min_chars(self, model_name):
+        tokens = next((t for key, t in MIN_CACHE_TOKENS.items() if key in model_name), DEFAULT_MIN_CACHE_TOKENS)
+        return tokens * CHARS_PER_TOKEN
+
+    def stats(self):
+        """Registrations, cache hits and how much prompt text was served cached"""
+        with self._lock:
+            counts = dict(self._counts)
+            counts['entries'] = len(self._entries)
+        total = counts['cached_chars'] + counts['sent_chars']
+        counts['cached_fraction'] = round(counts['cached_chars'] / total, 3) if total else 0.0
+        return counts
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self._counts[name] += amount
+
+    def _save(self, entry):
+        if self.storage_dir and entry['name']:
+            path = self.storage_dir / f"{entry['key']}.json"
+            tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+            tmp_path.write_text(json.dumps(entry), encoding='utf-8')
+            tmp_path.replace(path)
+
+    def _load(self, key):
+        if not self.storage_dir:
+            return None
+        path = self.storage_dir / f'{key}.json'
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except ValueError:
+            return None
+
+    def _forget(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            if self.storage_dir:
+                (self.storage_dir / f'{key}.json').unlink(missing_ok=True)
+
+    # Provider hooks
+    @abstractmethod
+    def _create(self, key, model_name, prefix):
+        """Register the prefix with the provider and return its name"""
+
+    @abstractmethod
+    def _extend(self, entry):
+        """Reset the TTL of a registered prefix"""
+
+    @abstractmethod
+    def _generate(self, entry, model_name, prefix, suffix, get_model):
+        """Run the suffix against the cached prefix; LookupError if it is gone"""
+
+
+class GeminiContextCache(ContextCache):
+    def __init__(self, ttl=3600, max_entries=64, storage_dir=None):
+        """Initialize context caching through the Gemini caching API"""
+        super().__init__(ttl, max_entries, storage_dir)
+        self._models = {}
+
+    def _create(self, key, model_name, prefix):
+        from google.generativeai import caching
+
+        cached = caching.CachedContent.create(
+            model=model_name,
+            display_name=f'gaku-{key}'[:128],
+            contents=[prefix],
+            ttl=timedelta(seconds=self.ttl)
+        )
+        return cached.name
+
+    def _extend(self, entry):
+        from google.generativeai import caching
+
+        caching.CachedContent.get(entry['name']).update(ttl=timedelta(seconds=self.ttl))
+
+    def _generate(self, entry, model_name, prefix, suffix, get_model):
+        import google.generativeai as genai
+        from google.api_core.exceptions import NotFound, PermissionDenied
+
+        try:
+            model = self._models.get(entry['name'])
+            if model is None:
+                model = genai.GenerativeModel.from_cached_content(entry['name'])
+                with self._lock:
+                    self._models[entry['name']] = model
+                    while len(self._models) > self.max_entries:
+                        self._models.pop(next(iter(self._models)))
+            return model.generate_content(suffix)
+        except (NotFound, PermissionDenied) as e:
+            self._models.pop(entry['name'], None)
+            raise LookupError(entry['name']) from e
+
+
+class LocalContextCache(ContextCache):
+    def __init__(self, ttl=3600, max_entries=64, storage_dir=None):
+        """
+        Initialize a stand-in that tracks registrations but sends the full prompt
+
+        Registrations are per process, so storage_dir is not used.
+        """
+        super().__init__(ttl, max_entries, None)
+
+    def min_chars(self, model_name):
+        return 0
+
+    def _create(self, key, model_name, prefix):
+        return f'local/{key}'
+
+    def _extend(self, entry):
+        pass
+
+    def _generate(self, entry, model_name, prefix, suffix, get_model):
+        return get_model(model_name).generate_content(prefix + suffix)
+
+
+def create_context_cache(kind, ttl=3600, storage_dir=None):
+    """
+    Build the context cache named by GAKU_CONTEXT_CACHE
+
+    Returns:
+        ContextCache, or None when caching is off
+
+    Raises:
+        ValueError: If kind is not gemini, local or off
+    """
+    kind = (kind or 'off').lower()
+    if kind == 'off':
+        return None
+    if kind == 'gemini':
+        return GeminiContextCache(ttl=ttl, storage_dir=storage_dir)
+    if kind == 'local':
+        return LocalContextCache(ttl=ttl)
+    raise ValueError(f"GAKU_CONTEXT_CACHE must be gemini, local or off, not {kind!r}")
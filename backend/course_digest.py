@@ -0,0 +1,218 @@
+import hashlib
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from backend.notes import concept_names, parse_notes
+
+COURSE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def _node_key(*parts):
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+
+class CourseDigest:
+    def __init__(self, combine, storage_dir=None, max_workers=4):
+        """
+        Initialize course-level digests built as a reduction tree
+
+        Each lecture summary is a leaf. Adjacent nodes are combined pairwise
+        level by level up to a single root, the course summary. Nodes are
+        keyed by the hash of their children, so adding or changing one
+        lecture only recomputes the nodes on its path to the root.
+
+        Args:
+            combine: Callable (left_summary, right_summary) -> merged summary
+            storage_dir: Directory to persist courses and tree nodes in
+            max_workers: Nodes on the same level combined concurrently
+        """
+        self.combine = combine
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+        if self.storage_dir:
+            (self.storage_dir / 'nodes').mkdir(parents=True, exist_ok=True)
+
+        self.max_workers = max_workers
+        self._courses = {}
+        self._nodes = {}
+        self._lock = threading.Lock()
+        self._course_locks = {}
+
+    @staticmethod
+    def is_valid_course_id(course_id):
+        return isinstance(course_id, str) and bool(COURSE_ID_PATTERN.match(course_id))
+
+    def set_lecture(self, course_id, lecture_id, summary, title=None, position=None):
+        """
+        Add a lecture to a course, or replace one
+
+        Args:
+            course_id: Course identifier
+            lecture_id: Lecture ID (see LectureStore)
+            summary: The lecture's notes
+            title: Display title (defaults to "Lecture N")
+            position: Index of the lecture to replace; appends when None
+                and the lecture isn't in the course yet
+
+        Returns:
+            dict: The updated digest (see get_digest)
+        """
+        with self._course_lock(course_id):
+            lectures = self._load_course(course_id)
+            entry = {
+                'lecture_id': lecture_id,
+                'title': title,
+                'leaf': self._store_leaf(summary)
+            }
+
+            existing = [i for i, lecture in enumerate(lectures) if lecture['lecture_id'] == lecture_id]
+            if position is None and existing:
+                position = existing[0]
+
+            if position is None or position >= len(lectures):
+                lectures.append(entry)
+            else:
+                entry['title'] = title or lectures[position]['title']
+                lectures[position] = entry
+
+            for i, lecture in enumerate(lectures, 1):
+                lecture['title'] = lecture['title'] or f'Lecture {i}'
+            self._save_course(course_id, lectures)
+
+            return self._reduce(course_id, lectures)
+
+    def get_digest(self, course_id):
+        """
+        Return the course summary and concept map
+
+        Returns:
+            dict: course_id, lectures, summary, concept_map and the number of
+            nodes that had to be recomputed. None for an unknown course.
+        """
+        with self._course_lock(course_id):
+            lectures = self._load_course(course_id)
+            if not lectures:
+                return None
+            return self._reduce(course_id, lectures)
+
+    # -----------------------------
+    # REDUCTION TREE
+    # -----------------------------
+    def _reduce(self, course_id, lectures):
+        level = [lecture['leaf'] for lecture in lectures]
+        recomputed = 0
+
+        while len(level) > 1:
+            pairs = [level[i:i + 2] for i in range(0, len(level), 2)]
+            next_level = []
+            missing = []
+            for pair in pairs:
+                if len(pair) == 1:
+                    # An odd node out is promoted unchanged, so appending a
+                    # lecture never reshuffles the existing pairs
+                    next_level.append(pair[0])
+                    continue
+                key = _node_key('node', *pair)
+                next_level.append(key)
+                if self._get_node(key) is None:
+                    missing.append((key, pair))
+
+            if missing:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    list(executor.map(lambda item: self._compute_node(*item), missing))
+                recomputed += len(missing)
+            level = next_level
+
+        root = self._get_node(level[0])
+        concept_map = self._concept_map(lectures)
+        print(f"📚 Course digest '{course_id}': {len(lectures)} lectures, {recomputed} nodes recomputed")
+
+        return {
+            'status': 'success',
+            'course_id': course_id,
+            'lectures': [
+                {'lecture_id': lecture['lecture_id'], 'title': lecture['title']}
+                for lecture in lectures
+            ],
+            'summary': root['summary'],
+            'concept_map': concept_map,
+            'recomputed_nodes': recomputed,
+            'error': None
+        }
+
+    def _compute_node(self, key, pair):
+        left, right = (self._get_node(child) for child in pair)
+        self._put_node(key, {'summary': self.combine(left['summary'], right['summary'])})
+
+    def _store_leaf(self, summary):
+        key = _node_key('leaf', summary)
+        if self._get_node(key) is None:
+            # Concepts are read from the leaves only (see _concept_map)
+            concepts = list(dict.fromkeys(concept_names(parse_notes(summary))))
+            self._put_node(key, {'summary': summary, 'concepts': concepts})
+        return key
+
+    def _concept_map(self, lectures):
+        """Concept name -> titles of the lectures that cover it"""
+        concept_map = {}
+        names = {}
+        for lecture in lectures:
+            for concept in self._get_node(lecture['leaf'])['concepts']:
+                key = concept.lower()
+                names.setdefault(key, concept)
+                titles = concept_map.setdefault(names[key], [])
+                if lecture['title'] not in titles:
+                    titles.append(lecture['title'])
+        return concept_map
+
+    # -----------------------------
+    # STORAGE
+    # -----------------------------
+    def _course_lock(self, course_id):
+        with self._lock:
+            return self._course_locks.setdefault(course_id, threading.Lock())
+
+    def _get_node(self, key):
+        with self._lock:
+            node = self._nodes.get(key)
+        if node is not None or not self.storage_dir:
+            return node
+
+        path = self.storage_dir / 'nodes' / f'{key}.json'
+        if not path.exists():
+            return None
+        node = json.loads(path.read_text(encoding='utf-8'))
+        with self._lock:
+            self._nodes[key] = node
+        return node
+
+    def _put_node(self, key, node):
+        with self._lock:
+            self._nodes[key] = node
+        if self.storage_dir:
+            self._write_json(self.storage_dir / 'nodes' / f'{key}.json', node)
+
+    def _load_course(self, course_id):
+        # Read from disk when persisted, other workers may have updated it
+        if self.storage_dir:
+            path = self.storage_dir / f'{course_id}.json'
+            if path.exists():
+                return json.loads(path.read_text(encoding='utf-8'))
+            return []
+        with self._lock:
+            return [dict(lecture) for lecture in self._courses.get(course_id, [])]
+
+    def _save_course(self, course_id, lectures):
+        if self.storage_dir:
+            self._write_json(self.storage_dir / f'{course_id}.json', lectures)
+            return
+        with self._lock:
+            self._courses[course_id] = [dict(lecture) for lecture in lectures]
+
+    @staticmethod
+    def _write_json(path, value):
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        tmp_path.write_text(json.dumps(value), encoding='utf-8')
+        tmp_path.replace(path)
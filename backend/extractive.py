@@ -0,0 +1,256 @@
+"""
+Local extractive summaries: key sentences and terms picked straight from
+the transcript, with no model call.
+
+Sentences are scored by TF-IDF similarity to the lecture as a whole, with
+near-duplicates skipped, and key terms come from RAKE (runs of content
+words scored by co-occurrence). It takes tens of milliseconds, so it is
+shown as a preview while Gemini writes the notes, and returned instead of
+them when Gemini is slow or failing.
+"""
+import re
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from backend.concepts import SENTENCE, STOPWORDS, TOKEN, normalize_concept
+
+# Sentences shorter than this many words are never picked
+MIN_SENTENCE_WORDS = 6
+# Sentences longer than this are cut in the preview
+MAX_SENTENCE_CHARS = 300
+# A sentence this similar to one already picked is skipped
+MAX_OVERLAP = 0.5
+# Longest phrase RAKE may return
+MAX_PHRASE_WORDS = 3
+
+WORD = re.compile(r"[A-Za-z0-9+#&]+")
+
+# RAKE splits phrases at these, on top of concepts.STOPWORDS; spoken
+# lectures are full of verbs and fillers that would otherwise glue onto terms
+PHRASE_BREAKS = STOPWORDS | {
+    'about', 'above', 'after', 'again', 'against', 'any', 'around', 'because',
+    'before', 'behind', 'being', 'below', 'between', 'both', 'come', 'comes',
+    'different', 'down', 'during', 'each', 'else', 'even', 'every', 'example',
+    'few', 'first', 'further', 'give', 'go', 'goes', 'good', 'great', 'him',
+    'her', 'his', 'important', 'kind', 'know', 'last', 'lets', 'look', 'lot',
+    'make', 'makes', 'many', 'matter', 'may', 'me', 'mean', 'means', 'might',
+    'most', 'much', 'must', 'my', 'need', 'new', 'next', 'now', 'off', 'once',
+    'only', 'other', 'out', 'over', 'own', 'part', 'people', 'point', 'pretty',
+    'put', 'quite', 'remember', 'said', 'same', 'say', 'see', 'seen', 'sort',
+    'start', 'starting', 'step', 'still', 'such', 'sure', 'take', 'talk',
+    'talking', 'tell', 'than', 'them', 'think', 'through', 'time', 'today',
+    'too', 'try', 'two', 'under', 'understand', 'until', 'up', 'us', 'use',
+    'used', 'using', 'want', 'way', 'well', 'while', 'whole', 'without',
+    'word', 'words', 'work', 'works', 'yes', 'yet',
+}
+
+# Live transcripts prefix lines with [mm:ss]
+TIMESTAMP = re.compile(r'^\s*\[\d+:\d{2}\]\s*')
+
+
+def split_sentences(text):
+    """Sentences of the transcript, in order, without live-mode timestamps"""
+    sentences = []
+    for match in SENTENCE.finditer(text):
+        sentence = TIMESTAMP.sub('', match.group()).strip()
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def _tokens(sentence):
+    return [word for word in TOKEN.findall(sentence.lower().replace("'", "")) if word not in STOPWORDS]
+
+
+def rank_sentences(sentences):
+    """
+    Score sentences by TF-IDF cosine similarity to the whole lecture
+
+    Args:
+        sentences: Sentences of one transcript
+
+    Returns:
+        tuple: (scores, weights) - a score per sentence, and the sparse
+        TF-IDF rows as (row, column, weight) arrays for overlap checks
+    """
+    vocabulary = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        for word in _tokens(sentence):
+            rows.append(i)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    n = len(sentences)
+    if not rows:
+        return np.zeros(n), (np.array([], int), np.array([], int), np.array([]))
+
+    rows = np.asarray(rows)
+    cols = np.asarray(cols)
+    # Merge repeated (sentence, word) pairs into counts
+    pairs, counts = np.unique(rows * len(vocabulary) + cols, return_counts=True)
+    rows, cols = np.divmod(pairs, len(vocabulary))
+
+    lengths = np.bincount(rows, weights=counts, minlength=n)
+    df = np.bincount(cols, minlength=len(vocabulary))
+    idf = np.log((1 + n) / (1 + df)) + 1
+    weights = counts / lengths[rows] * idf[cols]
+
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n))
+    unit = weights / norms[rows]
+    centroid = np.bincount(cols, weights=unit, minlength=len(vocabulary))
+    centroid /= np.linalg.norm(centroid) or 1.0
+
+    scores = np.bincount(rows, weights=unit * centroid[cols], minlength=n)
+    return scores, (rows, cols, unit)
+
+
+def _row(weights, i):
+    """One sentence's TF-IDF row as {column: weight}"""
+    rows, cols, unit = weights
+    start, end = np.searchsorted(rows, [i, i + 1])
+    return dict(zip(cols[start:end].tolist(), unit[start:end].tolist()))
+
+
+def _overlap(a, b):
+    """Cosine similarity of two unit-length rows"""
+    return sum(value * b.get(col, 0.0) for col, value in a.items())
+
+
+def key_sentences(sentences, count=8):
+    """
+    The most representative sentences, in lecture order
+
+    Args:
+        sentences: Sentences of one transcript
+        count: Number of sentences to pick
+
+    Returns:
+        list: Picked sentences
+    """
+    scores, weights = rank_sentences(sentences)
+    long_enough = np.array([len(s.split()) >= MIN_SENTENCE_WORDS for s in sentences], dtype=bool)
+    candidates = np.argsort(-np.where(long_enough, scores, -1.0), kind='stable')
+
+    picked = {}
+    for i in candidates[:count * 10].tolist():
+        if len(picked) >= count or not long_enough[i]:
+            break
+        row = _row(weights, i)
+        if all(_overlap(row, other) < MAX_OVERLAP for other in picked.values()):
+            picked[i] = row
+
+    return [sentences[i] for i in sorted(picked)]
+
+
+def key_terms(sentences, count=12):
+    """
+    Key phrases by RAKE: runs of content words, each word scored by how
+    often it co-occurs with others (degree) relative to its frequency
+
+    Args:
+        sentences: Sentences of one transcript
+        count: Number of terms to return
+
+    Returns:
+        list: Phrases as they appear in the transcript, best first
+    """
+    phrases = []
+    for sentence in sentences:
+        run = []
+        for word in WORD.findall(sentence.replace("'", "")) + ['.']:
+            if word == '.' or word.lower() in PHRASE_BREAKS or word.isdigit():
+                if run:
+                    phrases.append(run[:MAX_PHRASE_WORDS])
+                run = []
+            else:
+                run.append(word)
+
+    frequency = Counter()
+    degree = Counter()
+    for phrase in phrases:
+        for word in phrase:
+            frequency[word.lower()] += 1
+            degree[word.lower()] += len(phrase)
+
+    totals = defaultdict(float)
+    occurrences = Counter()
+    spelling = {}
+    for phrase in phrases:
+        key = normalize_concept(' '.join(phrase))
+        if len(key) < 3:
+            continue
+        score = sum(degree[w.lower()] / frequency[w.lower()] for w in phrase)
+        totals[key] = max(totals[key], score)
+        occurrences[key] += 1
+        spelling.setdefault(key, ' '.join(phrase))
+
+    # Phrases mentioned once are usually incidental
+    ranked = sorted(totals, key=lambda k: (occurrences[k] > 1, totals[k] * occurrences[k] ** 0.5), reverse=True)
+    terms = []
+    for key in ranked:
+        # Skip single words already covered by a longer phrase
+        if any(key in chosen.split() for chosen in terms):
+            continue
+        terms.append(key)
+        if len(terms) >= count:
+            break
+    return [spelling[key] for key in terms]
+
+
+def render_preview(sentences, terms, degraded_reason=None):
+    """Markdown in the same style as the Gemini notes"""
+    if degraded_reason:
+        intro = ("*The AI notes aren't available right now, so these are the key sentences "
+                 "picked straight from the transcript. Try generating the summary again later.*")
+    else:
+        intro = "*Key sentences picked straight from the transcript while the full notes are written...*"
+
+    lines = ["# ⚡ QUICK PREVIEW", "", intro, "", "---", ""]
+    if terms:
+        lines += ["# 🎯 KEY TERMS", "", " · ".join(f"**{term}**" for term in terms), "", "---", ""]
+    lines += ["# 💡 KEY SENTENCES", ""]
+    for sentence in sentences:
+        if len(sentence) > MAX_SENTENCE_CHARS:
+            sentence = sentence[:MAX_SENTENCE_CHARS].rsplit(' ', 1)[0] + '...'
+        lines.append(f"- {sentence}")
+    return "\n".join(lines) + "\n"
+
+
+def extractive_summary(transcript_text, num_sentences=8, num_terms=12, degraded_reason=None):
+    """
+    Summarise a lecture locally, without calling a model
+
+    Args:
+        transcript_text: The full lecture transcription
+        num_sentences: Key sentences to pick
+        num_terms: Key terms to extract
+        degraded_reason: Why the model summary is unavailable, if this is
+            served in its place
+
+    Returns:
+        dict: Contains summary (Markdown), key_sentences, key_terms and status
+    """
+    started = time.perf_counter()
+    try:
+        sentences = split_sentences(transcript_text)
+        picked = key_sentences(sentences, num_sentences)
+        terms = key_terms(sentences, num_terms)
+        return {
+            'status': 'success',
+            'summary': render_preview(picked, terms, degraded_reason),
+            'key_sentences': picked,
+            'key_terms': terms,
+            'extractive': True,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            'error': None
+        }
+
+    except Exception as e:
+        print(f"Error building extractive summary: {str(e)}")
+        return {
+            'status': 'error',
+            'summary': None,
+            'error': str(e)
+        }
@@ -0,0 +1,255 @@
+"""
+Local stand-ins for the AssemblyAI and Gemini providers, for load tests.
+
+Enabled with GAKU_FAKE_PROVIDERS=1. No network calls are made; instead
+each call sleeps for a latency drawn from a log-normal distribution (the
+long tail real APIs have) and a per-process quota answers with 429 errors
+when exceeded, like Gemini's per-minute rate limits.
+
+Settings (environment):
+    GAKU_FAKE_TIME_SCALE       Multiplier for all latencies (default 1.0)
+    GAKU_FAKE_GEMINI_MS        Median Gemini latency in ms (default 2500)
+    GAKU_FAKE_TRANSCRIBE_MS    Median transcription latency in ms (default 8000)
+    GAKU_FAKE_RPM              Gemini requests per minute per process before
+                               429s (default 1000, 0 for no limit)
+    GAKU_FAKE_ERROR_RATE       Fraction of calls failing with a 500 (default 0.01)
+    GAKU_FAKE_WEBHOOK_LOSS     Fraction of transcription webhooks never sent,
+                               to exercise the sweeper (default 0)
+"""
+import json
+import math
+import os
+import random
+import threading
+import time
+import urllib.request
+import zlib
+
+from backend.chatbot import LectureChatbot
+from backend.jobs import WEBHOOK_AUTH_HEADER
+from backend.summarizer import Summarizer
+
+TOPICS = [
+    ('TCP handshake', 'SYN', 'ACK', 'sequence numbers', 'connection setup'),
+    ('virtualization', 'hypervisor', 'virtual machine', 'isolation', 'containers'),
+    ('paging', 'page table', 'TLB', 'page fault', 'virtual memory'),
+    ('photosynthesis', 'chlorophyll', 'light reactions', 'Calvin cycle', 'ATP'),
+    ('supply and demand', 'equilibrium price', 'elasticity', 'surplus', 'shortage'),
+    ('recursion', 'base case', 'call stack', 'memoization', 'divide and conquer'),
+]
+
+SENTENCES = [
+    "Today we are going to talk about {0}.",
+    "The key idea behind {0} is how {1} relates to {2}.",
+    "Remember that {1} is not the same thing as {3}.",
+    "A common exam question asks you to explain {3} in your own words.",
+    "If you look at the example on the slide, {2} happens before {4}.",
+    "So why does {0} matter? Because without {1} nothing else works.",
+    "Let's go through {4} step by step, starting with {1}.",
+    "Many students confuse {2} and {3}, so be careful there.",
+]
+
+
+class RateLimitError(Exception):
+    """Raised by the fakes the way the Gemini SDK reports quota errors"""
+
+
+def _setting(name, default):
+    return float(os.getenv(name, default))
+
+
+class LatencyModel:
+    def __init__(self, median_ms, sigma=0.5, per_kchar_ms=0.0):
+        """
+        Initialize a log-normal latency distribution
+
+        Args:
+            median_ms: Median latency
+            sigma: Spread of the underlying normal (0.5 gives p99 ~3x median)
+            per_kchar_ms: Extra latency per 1000 characters of input
+        """
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.per_kchar_ms = per_kchar_ms
+
+    def sample(self, chars=0):
+        """Latency in seconds, scaled by GAKU_FAKE_TIME_SCALE"""
+        ms = self.median_ms * math.exp(random.gauss(0, self.sigma)) + chars / 1000 * self.per_kchar_ms
+        return ms / 1000 * _setting('GAKU_FAKE_TIME_SCALE', 1.0)
+
+
+class Quota:
+    def __init__(self, requests_per_minute):
+        """Initialize a token bucket shared by all fake models in a process"""
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1.0, requests_per_minute / 6.0)  # 10 seconds of burst
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+_quota = None
+_quota_lock = threading.Lock()
+
+
+def gemini_quota():
+    global _quota
+    with _quota_lock:
+        if _quota is None:
+            _quota = Quota(_setting('GAKU_FAKE_RPM', 1000))
+        return _quota
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+# Latency of each model tier relative to GAKU_FAKE_GEMINI_MS
+MODEL_SPEED = {'lite': 0.4, 'pro': 2.5}
+
+
+class FakeGenerativeModel:
+    def __init__(self, model_name='models/gemini-2.5-flash'):
+        """Initialize a stand-in for genai.GenerativeModel"""
+        self.model_name = model_name
+        factor = next((f for key, f in MODEL_SPEED.items() if key in model_name), 1.0)
+        self.latency = LatencyModel(_setting('GAKU_FAKE_GEMINI_MS', 2500) * factor, per_kchar_ms=40 * factor)
+        self.error_rate = _setting('GAKU_FAKE_ERROR_RATE', 0.01)
+
+    def generate_content(self, prompt):
+        if not gemini_quota().acquire():
+            # Real quota errors come back fast
+            time.sleep(self.latency.sample() / 20)
+            raise RateLimitError("429 Resource has been exhausted (e.g. check quota).")
+
+        time.sleep(self.latency.sample(len(prompt)))
+        if random.random() < self.error_rate:
+            raise RuntimeError("500 An internal error has occurred.")
+        return FakeResponse(self._answer(prompt))
+
+    @staticmethod
+    def _answer(prompt):
+        topic = TOPICS[zlib.crc32(prompt[-2000:].encode('utf-8')) % len(TOPICS)]
+        concepts = "\n\n".join(f"**{i}. {name.upper()}**\n→ How {name} fits into {topic[0]}."
+                               for i, name in enumerate(topic, 1))
+        return (
+            f"# 📚 LECTURE OVERVIEW\n\nThis lecture covered {topic[0]}.\n\n---\n\n"
+            f"# 🎯 KEY CONCEPTS\n\n{concepts}\n\n---\n\n"
+            f"# ✅ KEY TAKEAWAYS\n\n1. **{topic[1]}**: Review it before the exam.\n"
+        )
+
+
+class FakeTranscriber:
+    def __init__(self):
+        """Initialize a stand-in for Transcriber"""
+        self.latency = LatencyModel(_setting('GAKU_FAKE_TRANSCRIBE_MS', 8000), sigma=0.4)
+        print("🧪 Fake transcriber initialized")
+
+    def transcribe_audio(self, audio_file_path):
+        """
+        Make up a transcript, the same one for the same file contents
+
+        Returns:
+            dict: Same shape as Transcriber.transcribe_audio
+        """
+        try:
+            with open(audio_file_path, 'rb') as f:
+                seed = zlib.crc32(f.read())
+        except OSError:
+            return {'status': 'error', 'text': None, 'words': None, 'duration': None,
+                    'error': 'Audio file not found'}
+
+        time.sleep(self.latency.sample())
+        text = self.lecture_text(seed)
+        return {
+            'status': 'success',
+            'text': text,
+            'words': [],
+            'duration': len(text.split()) * 400,
+            'word_count': len(text.split()),
+            'error': None
+        }
+
+    def submit_audio(self, audio_file_path, webhook_url, webhook_secret):
+        """
+        Start a fake job that calls webhook_url when its latency has passed
+
+        The provider ID encodes the seed and completion time, so any worker
+        can answer fetch_result for it.
+        """
+        try:
+            with open(audio_file_path, 'rb') as f:
+                seed = zlib.crc32(f.read())
+        except OSError:
+            return {'status': 'error', 'provider_id': None, 'error': 'Audio file not found'}
+
+        delay = self.latency.sample()
+        provider_id = f"fake-{seed}-{int((time.time() + delay) * 1000)}"
+        if random.random() >= _setting('GAKU_FAKE_WEBHOOK_LOSS', 0.0):
+            timer = threading.Timer(delay, self._call_webhook, (webhook_url, webhook_secret, provider_id))
+            timer.daemon = True
+            timer.start()
+        return {'status': 'success', 'provider_id': provider_id, 'error': None}
+
+    def fetch_result(self, provider_id):
+        """Result of a job started by submit_audio"""
+        _, seed, ready_ms = provider_id.split('-')
+        if time.time() * 1000 < int(ready_ms):
+            return {'status': 'processing', 'text': None, 'error': None}
+        text = self.lecture_text(int(seed))
+        return {
+            'status': 'success',
+            'text': text,
+            'words': [],
+            'duration': len(text.split()) * 400,
+            'word_count': len(text.split()),
+            'error': None
+        }
+
+    @staticmethod
+    def _call_webhook(webhook_url, webhook_secret, provider_id):
+        body = json.dumps({'transcript_id': provider_id, 'status': 'completed'}).encode()
+        request = urllib.request.Request(webhook_url, data=body, method='POST', headers={
+            'Content-Type': 'application/json',
+            WEBHOOK_AUTH_HEADER: webhook_secret
+        })
+        try:
+            urllib.request.urlopen(request, timeout=10).close()
+        except OSError as e:
+            print(f"⚠️ Fake webhook to {webhook_url} failed: {e}")
+
+    @staticmethod
+    def lecture_text(seed, sentences=150):
+        """A repetitive but lecture-shaped transcript"""
+        rng = random.Random(seed)
+        topic = TOPICS[seed % len(TOPICS)]
+        return ' '.join(rng.choice(SENTENCES).format(*topic) for _ in range(sentences))
+
+
+class FakeSummarizer(Summarizer):
+    def _configure(self):
+        pass
+
+    def _create_model(self, model_name):
+        return FakeGenerativeModel(model_name)
+
+
+class FakeChatbot(LectureChatbot):
+    def _configure(self):
+        pass
+
+    def _create_model(self, model_name):
+        return FakeGenerativeModel(model_name)
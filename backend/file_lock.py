@@ -0,0 +1,43 @@
+"""
+Locks for data shared by all workers.
+
+A read-modify-write of a JSON file under data/ must not interleave with
+another worker's. locked(lock_path) holds an exclusive lock on lock_path
+across processes (flock) and across threads of this process. Stores lock
+one file per directory and only around the short read-modify-write, never
+around provider calls. On platforms without fcntl the lock only covers
+threads of this process, which is enough for the development server.
+"""
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: threads of this process only
+    fcntl = None
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+@contextmanager
+def locked(lock_path):
+    """
+    Hold an exclusive lock on lock_path while the block runs
+
+    Args:
+        lock_path: Lock file, created if missing
+    """
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(str(lock_path), threading.Lock())
+
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
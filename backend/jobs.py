@@ -0,0 +1,301 @@
+"""
+Transcription jobs completed by provider webhooks.
+
+A job is created when an upload is submitted, finished when the provider
+calls our webhook, and polled by the sweeper if the webhook never comes.
+Jobs are files on disk so any worker can receive the webhook or answer
+the browser's status checks.
+
+On disk, a job waiting for its webhook has a marker in pending/. A sweeper
+moves the marker to claimed/ before polling the provider, so only one
+worker polls a given job; the rename is atomic, the loser skips the job.
+Finished jobs are deleted once they are older than the store's TTL.
+"""
+import json
+import re
+import secrets
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from backend.file_lock import locked
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# Header the provider echoes back on webhook calls
+WEBHOOK_AUTH_HEADER = 'X-Gaku-Webhook-Token'
+
+# Finished jobs are kept this long for the browser to collect the result
+JOB_TTL_SECONDS = 24 * 3600
+
+
+class JobStore:
+    def __init__(self, storage_dir=None, ttl=JOB_TTL_SECONDS):
+        """
+        Initialize the transcription job store
+
+        Args:
+            storage_dir: Directory to persist jobs in (shared by all workers).
+                Memory only when None.
+            ttl: Seconds a finished job is kept before purge() deletes it
+        """
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+        if self.storage_dir:
+            (self.storage_dir / 'pending').mkdir(parents=True, exist_ok=True)
+            (self.storage_dir / 'claimed').mkdir(parents=True, exist_ok=True)
+
+        self.ttl = ttl
+        self._jobs = {}
+        self._claimed = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_valid_id(job_id):
+        return isinstance(job_id, str) and bool(JOB_ID_PATTERN.match(job_id))
+
+    def create(self):
+        """
+        Start a job
+
+        Returns:
+            dict: The job, with its id and the secret the webhook must send
+        """
+        now = time.time()
+        job = {
+            'id': uuid.uuid4().hex,
+            'token': secrets.token_urlsafe(24),
+            'provider_id': None,
+            'status': 'processing',
+            'created': now,
+            'checked': now,
+            'result': None
+        }
+        self._save(job)
+        if self.storage_dir:
+            (self.storage_dir / 'pending' / job['id']).touch()
+        return job
+
+    def get(self, job_id):
+        """Look up a job, None if unknown"""
+        if not self.is_valid_id(job_id):
+            return None
+        if self.storage_dir:
+            path = self.storage_dir / f'{job_id}.json'
+            if not path.exists():
+                return None
+            return json.loads(path.read_text(encoding='utf-8'))
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id, **fields):
+        """
+        Change a job that is still processing
+
+        The read-modify-write holds the store's lock, so an update racing
+        the webhook's finish() cannot write 'processing' back over the
+        result. A finished job is returned unchanged.
+
+        Returns:
+            dict: The job as stored, None if unknown
+        """
+        if not self.storage_dir:
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return None
+                if job['status'] == 'processing':
+                    job.update(fields)
+                return dict(job)
+
+        with locked(self.storage_dir / '.lock'):
+            job = self.get(job_id)
+            if job is None or job['status'] != 'processing':
+                return job
+            job.update(fields)
+            self._save(job)
+            return job
+
+    def finish(self, job_id, result):
+        """
+        Record the outcome of a job
+
+        Args:
+            job_id: Job to finish
+            result: Transcriber result dict ('success' or 'error')
+        """
+        return self.update(job_id, status=result['status'], result=result, checked=time.time())
+
+    def stale(self, older_than):
+        """
+        Jobs still processing that haven't been checked for older_than seconds
+
+        A claim older than that belongs to a sweeper that died mid-poll; its
+        job is put back in pending/ first.
+        """
+        cutoff = time.time() - older_than
+        if self.storage_dir:
+            for marker in (self.storage_dir / 'claimed').iterdir():
+                try:
+                    if marker.stat().st_mtime < cutoff:
+                        marker.rename(self.storage_dir / 'pending' / marker.name)
+                except FileNotFoundError:
+                    pass  # released, finished or taken back by another worker
+            ids = [path.name for path in (self.storage_dir / 'pending').iterdir()]
+        else:
+            with self._lock:
+                ids = [job_id for job_id, job in self._jobs.items()
+                       if job['status'] == 'processing' and job_id not in self._claimed]
+
+        jobs = []
+        for job_id in ids:
+            job = self.get(job_id)
+            if job and job['status'] == 'processing' and job['checked'] < cutoff:
+                jobs.append(job)
+        return jobs
+
+    def claim(self, job_id):
+        """
+        Take a pending job so no other sweeper polls it
+
+        Returns:
+            bool: True if this caller now holds the job, False if another
+                worker claimed or finished it first
+        """
+        if not self.storage_dir:
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if not job or job['status'] != 'processing' or job_id in self._claimed:
+                    return False
+                self._claimed.add(job_id)
+                return True
+
+        marker = self.storage_dir / 'claimed' / job_id
+        try:
+            (self.storage_dir / 'pending' / job_id).rename(marker)
+            marker.touch()  # the claim's age is counted from now
+        except FileNotFoundError:
+            return False
+        return True
+
+    def release(self, job_id):
+        """Hand a claimed job back; a no-op once the job has finished"""
+        if not self.storage_dir:
+            with self._lock:
+                self._claimed.discard(job_id)
+            return
+
+        try:
+            (self.storage_dir / 'claimed' / job_id).rename(self.storage_dir / 'pending' / job_id)
+        except FileNotFoundError:
+            pass
+        job = self.get(job_id)
+        if job is None or job['status'] != 'processing':
+            # Finished while we held it
+            (self.storage_dir / 'pending' / job_id).unlink(missing_ok=True)
+
+    def purge(self):
+        """
+        Delete finished jobs older than the TTL
+
+        Returns:
+            int: Number of jobs deleted
+        """
+        cutoff = time.time() - self.ttl
+        if not self.storage_dir:
+            with self._lock:
+                expired = [job_id for job_id, job in self._jobs.items()
+                           if job['status'] != 'processing' and job['checked'] < cutoff]
+                for job_id in expired:
+                    del self._jobs[job_id]
+            return len(expired)
+
+        deleted = 0
+        for path in self.storage_dir.glob('*.json'):
+            try:
+                # A finished job is never written again, so its mtime is when it finished
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                job = json.loads(path.read_text(encoding='utf-8'))
+            except (FileNotFoundError, ValueError):
+                continue
+            if job['status'] != 'processing':
+                path.unlink(missing_ok=True)
+                deleted += 1
+        return deleted
+
+    def _save(self, job):
+        if not self.storage_dir:
+            with self._lock:
+                self._jobs[job['id']] = dict(job)
+            return
+
+        path = self.storage_dir / f"{job['id']}.json"
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        tmp_path.write_text(json.dumps(job), encoding='utf-8')
+        tmp_path.replace(path)
+
+        if job['status'] != 'processing':
+            (self.storage_dir / 'pending' / job['id']).unlink(missing_ok=True)
+            (self.storage_dir / 'claimed' / job['id']).unlink(missing_ok=True)
+
+
+class JobSweeper:
+    def __init__(self, jobs, poll, interval=30, grace=120):
+        """
+        Initialize the fallback for webhooks that never arrive
+
+        Args:
+            jobs: JobStore
+            poll: Callable (job) that asks the provider for the job's result
+            interval: Seconds between sweeps
+            grace: Seconds a job may wait for its webhook before it is polled
+        """
+        self.jobs = jobs
+        self.poll = poll
+        self.interval = interval
+        self.grace = grace
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start sweeping in this process (no-op if already running)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='gaku-job-sweeper', daemon=True)
+            self._thread.start()
+
+    def sweep(self):
+        """
+        Poll every job that has waited longer than the grace period
+
+        Returns:
+            int: Number of jobs this sweeper polled
+        """
+        polled = 0
+        for job_id in [job['id'] for job in self.jobs.stale(self.grace)]:
+            if not self.jobs.claim(job_id):
+                continue  # another worker is polling it
+            try:
+                # The webhook may have finished it since stale() read it
+                job = self.jobs.get(job_id)
+                if job and job['status'] == 'processing':
+                    self.poll(job)
+                    polled += 1
+            except Exception as e:
+                print(f"⚠️ Could not poll transcription job {job_id}: {e}")
+            finally:
+                self.jobs.release(job_id)
+        return polled
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            count = self.sweep()
+            if count:
+                print(f"🧹 Polled {count} transcription jobs whose webhook hasn't arrived")
+            purged = self.jobs.purge()
+            if purged:
+                print(f"🗑️ Deleted {purged} finished transcription jobs")
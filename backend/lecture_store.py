@@ -0,0 +1,159 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+LECTURE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class LectureStore:
+    def __init__(self, storage_dir=None, max_cached=64):
+        """
+        Initialize a content-addressed store of lecture transcripts
+
+        Transcripts are keyed by a hash of their text, so the browser can
+        refer to a lecture by ID instead of uploading the text again.
+
+        Args:
+            storage_dir: Directory to persist transcripts in (shared by all
+                workers). Memory only when None.
+            max_cached: Number of transcripts kept in memory
+        """
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+        if self.storage_dir:
+            self.storage_dir.mkdir(parents=True, exist_ok=True)
+
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._artifacts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def lecture_id_for(transcript_text):
+        """Content hash used as the lecture ID"""
+        return hashlib.sha256(transcript_text.encode('utf-8')).hexdigest()[:32]
+
+    @staticmethod
+    def is_valid_id(lecture_id):
+        return isinstance(lecture_id, str) and bool(LECTURE_ID_PATTERN.match(lecture_id))
+
+    def add(self, transcript_text):
+        """
+        Store a transcript
+
+        Args:
+            transcript_text: The full lecture transcription
+
+        Returns:
+            str: The lecture ID
+        """
+        lecture_id = self.lecture_id_for(transcript_text)
+
+        path = self._path(lecture_id)
+        if path and not path.exists():
+            # Write then rename so other workers never read a partial file
+            tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+            tmp_path.write_text(transcript_text, encoding='utf-8')
+            tmp_path.replace(path)
+
+        self._remember(lecture_id, transcript_text)
+        return lecture_id
+
+    def get(self, lecture_id):
+        """
+        Look up a transcript by ID
+
+        Args:
+            lecture_id: ID returned by add()
+
+        Returns:
+            str: The transcript, or None if this lecture is unknown
+        """
+        if not self.is_valid_id(lecture_id):
+            return None
+
+        with self._lock:
+            if lecture_id in self._cache:
+                self._cache.move_to_end(lecture_id)
+                return self._cache[lecture_id]
+
+        path = self._path(lecture_id)
+        if not path or not path.exists():
+            return None
+
+        transcript_text = path.read_text(encoding='utf-8')
+        self._remember(lecture_id, transcript_text)
+        return transcript_text
+
+    def discard(self, lecture_id):
+        """
+        Delete a transcript, e.g. a superseded checkpoint of a live lecture
+
+        Artifacts derived from it are kept, so notes made from it can still
+        be extended.
+        """
+        if not self.is_valid_id(lecture_id):
+            return
+        with self._lock:
+            self._cache.pop(lecture_id, None)
+        path = self._path(lecture_id)
+        if path:
+            path.unlink(missing_ok=True)
+
+    def get_artifact(self, lecture_id, name):
+        """
+        Look up something derived from a lecture (summary, notes, ...)
+
+        Args:
+            lecture_id: ID returned by add()
+            name: Artifact name, e.g. 'summary'
+
+        Returns:
+            The stored JSON value, or None if it hasn't been stored
+        """
+        path = self._artifact_path(lecture_id, name)
+        if path and path.exists():
+            return json.loads(path.read_text(encoding='utf-8'))
+
+        with self._lock:
+            return self._artifacts.get((lecture_id, name))
+
+    def set_artifact(self, lecture_id, name, value):
+        """
+        Store something derived from a lecture, keyed by its content hash
+
+        Args:
+            lecture_id: ID returned by add()
+            name: Artifact name, e.g. 'summary'
+            value: Any JSON-serialisable value
+        """
+        path = self._artifact_path(lecture_id, name)
+        if path:
+            tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+            tmp_path.write_text(json.dumps(value), encoding='utf-8')
+            tmp_path.replace(path)
+        else:
+            with self._lock:
+                self._artifacts[(lecture_id, name)] = value
+
+    def __contains__(self, lecture_id):
+        return self.get(lecture_id) is not None
+
+    def _path(self, lecture_id):
+        if not self.storage_dir:
+            return None
+        return self.storage_dir / f'{lecture_id}.txt'
+
+    def _artifact_path(self, lecture_id, name):
+        if not self.storage_dir or not self.is_valid_id(lecture_id):
+            return None
+        return self.storage_dir / f'{lecture_id}.{name}.json'
+
+    def _remember(self, lecture_id, transcript_text):
+        with self._lock:
+            self._cache[lecture_id] = transcript_text
+            self._cache.move_to_end(lecture_id)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
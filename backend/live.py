@@ -0,0 +1,366 @@
+"""
+Live lecture mode: stream microphone audio, get transcript segments back.
+
+The browser sends 16 kHz mono PCM16 chunks over a WebSocket. A streaming
+adapter turns them into partial and final segments, which are pushed back
+to the browser as they arrive and appended to the lecture transcript.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2  # 16-bit mono
+
+# Audio buffered for the provider before the oldest chunks are dropped
+MAX_BUFFERED_SECONDS = 5
+# Events buffered for a slow client before partials are discarded
+MAX_PENDING_EVENTS = 200
+# Events where a newer one replaces any still waiting to be sent
+COALESCED_EVENTS = {'partial', 'backpressure'}
+# The growing transcript is stored at most this often (and when the session
+# stops), not on every final segment
+CHECKPOINT_SECONDS = 30
+CHECKPOINT_SEGMENTS = 20
+
+
+def format_timestamp(ms):
+    seconds = int(ms // 1000)
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+# -----------------------------
+# STREAMING ADAPTERS
+# -----------------------------
+class AssemblyAIStreamingAdapter:
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        """Initialize the AssemblyAI streaming (v3) adapter"""
+        self.api_key = os.getenv('ASSEMBLYAI_API_KEY')
+        if not self.api_key:
+            raise ValueError("ASSEMBLYAI_API_KEY not found in environment variables")
+
+        self.sample_rate = sample_rate
+        self.client = None
+
+    def start(self, on_segment, on_error):
+        """
+        Open the streaming session
+
+        Args:
+            on_segment: Called with (kind, text, start_ms, end_ms), kind is
+                'partial' or 'final'
+            on_error: Called with an error message
+        """
+        from assemblyai.streaming.v3 import (
+            StreamingClient,
+            StreamingClientOptions,
+            StreamingError,
+            StreamingEvents,
+            StreamingParameters,
+        )
+
+        def handle_turn(client, event):
+            if not event.transcript:
+                return
+            start = event.words[0].start if event.words else None
+            end = event.words[-1].end if event.words else None
+            if event.end_of_turn and event.turn_is_formatted:
+                on_segment('final', event.transcript, start, end)
+            elif not event.end_of_turn:
+                on_segment('partial', event.transcript, start, end)
+
+        def handle_error(client, error: StreamingError):
+            on_error(str(error))
+
+        self.client = StreamingClient(StreamingClientOptions(api_key=self.api_key))
+        self.client.on(StreamingEvents.Turn, handle_turn)
+        self.client.on(StreamingEvents.Error, handle_error)
+        self.client.connect(StreamingParameters(sample_rate=self.sample_rate, format_turns=True))
+        print("🎙️ AssemblyAI streaming session started")
+
+    def send_audio(self, chunk):
+        self.client.stream(chunk)
+
+    def stop(self):
+        if self.client:
+            self.client.disconnect(terminate=True)
+            print("🛑 AssemblyAI streaming session closed")
+
+
+class LocalStreamingAdapter:
+    def __init__(self, words_per_second=2.5, segment_seconds=3, delay=0.0):
+        """
+        Initialize a local stand-in for the streaming provider
+
+        Makes up one word per 1/words_per_second of audio received, emits a
+        partial after every chunk and a final every segment_seconds of audio.
+        No network, so the live pipeline can be exercised offline.
+
+        Args:
+            words_per_second: Fake speaking rate
+            segment_seconds: Audio per final segment
+            delay: Seconds of artificial latency per chunk (to simulate a
+                slow provider)
+        """
+        self.words_per_second = words_per_second
+        self.segment_seconds = segment_seconds
+        self.delay = delay
+        self.on_segment = None
+        self.received_bytes = 0
+        self.segment_start_ms = 0
+        self.words = []
+
+    def start(self, on_segment, on_error):
+        self.on_segment = on_segment
+
+    def send_audio(self, chunk):
+        if self.delay:
+            time.sleep(self.delay)
+        self.received_bytes += len(chunk)
+        now_ms = self.received_bytes * 1000 // BYTES_PER_SECOND
+
+        target_words = int((now_ms - self.segment_start_ms) / 1000 * self.words_per_second)
+        while len(self.words) < target_words:
+            self.words.append(f"word{len(self.words) + 1}")
+
+        if now_ms - self.segment_start_ms >= self.segment_seconds * 1000:
+            self._flush(now_ms)
+        elif self.words:
+            self.on_segment('partial', ' '.join(self.words), self.segment_start_ms, now_ms)
+
+    def stop(self):
+        now_ms = self.received_bytes * 1000 // BYTES_PER_SECOND
+        if self.words:
+            self._flush(now_ms)
+
+    def _flush(self, now_ms):
+        text = ' '.join(self.words).capitalize() + '.'
+        self.on_segment('final', text, self.segment_start_ms, now_ms)
+        self.words = []
+        self.segment_start_ms = now_ms
+
+
+def create_adapter():
+    """
+    Create the streaming adapter selected by GAKU_LIVE_PROVIDER
+
+    'assemblyai' (default) or 'local' for the offline stand-in.
+    """
+    provider = os.getenv('GAKU_LIVE_PROVIDER', 'assemblyai').lower()
+    if provider == 'local':
+        return LocalStreamingAdapter()
+    return AssemblyAIStreamingAdapter()
+
+
+# -----------------------------
+# LIVE SESSION
+# -----------------------------
+class LiveSession:
+    def __init__(self, adapter, on_transcript=None, max_buffered_seconds=MAX_BUFFERED_SECONDS,
+                 max_pending_events=MAX_PENDING_EVENTS, checkpoint_seconds=CHECKPOINT_SECONDS,
+                 checkpoint_segments=CHECKPOINT_SEGMENTS):
+        """
+        Initialize one live lecture session
+
+        Audio from the browser is queued for a sender thread feeding the
+        adapter. When the provider falls behind, the oldest queued audio is
+        dropped and the browser is told, instead of buffering without bound.
+        Events for the browser are coalesced: only the latest partial is
+        kept, so a slow client never accumulates stale partials.
+
+        Args:
+            adapter: Streaming adapter (see AssemblyAIStreamingAdapter)
+            on_transcript: Called with the full timestamped transcript at
+                checkpoints and when the session stops. Whatever dict it
+                returns is added to that final segment's event.
+            max_buffered_seconds: Audio buffered for the provider
+            max_pending_events: Events buffered for the browser
+            checkpoint_seconds: Longest time between checkpoints
+            checkpoint_segments: Most final segments between checkpoints
+        """
+        self.adapter = adapter
+        self.on_transcript = on_transcript
+        self.max_buffered_bytes = max_buffered_seconds * BYTES_PER_SECOND
+        self.max_pending_events = max_pending_events
+        self.checkpoint_seconds = checkpoint_seconds
+        self.checkpoint_segments = checkpoint_segments
+
+        self.segments = []
+        self.checkpoint = {}
+        self._checkpointed_segments = 0
+        self._checkpointed_at = None
+        self._checkpoint_lock = threading.Lock()
+        self.dropped_bytes = 0
+        self.started_at = None
+
+        self._audio = deque()
+        self._audio_bytes = 0
+        self._audio_ready = threading.Condition()
+        self._events = deque()
+        self._events_lock = threading.Lock()
+        self._closed = False
+        self._sender = threading.Thread(target=self._send_loop, name='gaku-live-sender', daemon=True)
+
+    def start(self):
+        self.started_at = time.time()
+        self._checkpointed_at = time.monotonic()
+        self.adapter.start(self._on_segment, self._on_error)
+        self._sender.start()
+
+    def push_audio(self, chunk):
+        """
+        Queue an audio chunk for the provider without blocking the socket
+
+        Args:
+            chunk: PCM16 mono bytes
+        """
+        with self._audio_ready:
+            self._audio.append(chunk)
+            self._audio_bytes += len(chunk)
+            dropped = 0
+            while self._audio_bytes > self.max_buffered_bytes and len(self._audio) > 1:
+                old = self._audio.popleft()
+                self._audio_bytes -= len(old)
+                dropped += len(old)
+            self._audio_ready.notify()
+
+        if dropped:
+            self.dropped_bytes += dropped
+            self._emit({
+                'type': 'backpressure',
+                'dropped_ms': self.dropped_bytes * 1000 // BYTES_PER_SECOND
+            })
+
+    def drain_events(self):
+        """Take the events waiting to be sent to the browser"""
+        with self._events_lock:
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+    def stop(self, timeout=10):
+        """
+        Flush queued audio, close the provider session and return the transcript
+
+        The transcript is checkpointed a last time; self.checkpoint holds
+        what on_transcript returned for it.
+        """
+        with self._audio_ready:
+            self._closed = True
+            self._audio_ready.notify()
+        self._sender.join(timeout)
+        self.adapter.stop()
+        self._checkpoint()
+        return self.transcript()
+
+    def transcript(self):
+        """Final segments as timestamped lines"""
+        return '\n'.join(
+            f"[{format_timestamp(segment['start'])}] {segment['text']}"
+            for segment in self.segments
+        )
+
+    def _send_loop(self):
+        while True:
+            with self._audio_ready:
+                while not self._audio and not self._closed:
+                    self._audio_ready.wait()
+                if not self._audio and self._closed:
+                    return
+                chunk = self._audio.popleft()
+                self._audio_bytes -= len(chunk)
+            try:
+                self.adapter.send_audio(chunk)
+            except Exception as e:
+                self._on_error(str(e))
+                return
+
+    def _on_segment(self, kind, text, start_ms, end_ms):
+        elapsed_ms = int((time.time() - self.started_at) * 1000)
+        start_ms = elapsed_ms if start_ms is None else start_ms
+        end_ms = elapsed_ms if end_ms is None else end_ms
+        event = {'type': kind, 'text': text, 'start': start_ms, 'end': end_ms}
+
+        if kind == 'final':
+            self.segments.append(event)
+            if self._checkpoint_due():
+                event.update(self._checkpoint())
+        self._emit(event)
+
+    def _checkpoint_due(self):
+        new_segments = len(self.segments) - self._checkpointed_segments
+        return (new_segments >= self.checkpoint_segments
+                or time.monotonic() - self._checkpointed_at >= self.checkpoint_seconds)
+
+    def _checkpoint(self):
+        """Hand the transcript to on_transcript if it grew since the last checkpoint"""
+        with self._checkpoint_lock:
+            if not self.on_transcript or len(self.segments) == self._checkpointed_segments:
+                return {}
+            self._checkpointed_segments = len(self.segments)
+            self._checkpointed_at = time.monotonic()
+            self.checkpoint = self.on_transcript(self.transcript()) or {}
+            return self.checkpoint
+
+    def _on_error(self, message):
+        print(f"❌ Live transcription error: {message}")
+        self._emit({'type': 'error', 'error': message})
+
+    def _emit(self, event):
+        with self._events_lock:
+            if event['type'] in COALESCED_EVENTS:
+                # Only the newest partial / backpressure report matters
+                self._events = deque(e for e in self._events if e['type'] != event['type'])
+            self._events.append(event)
+            while len(self._events) > self.max_pending_events:
+                partials = [e for e in self._events if e['type'] == 'partial']
+                if not partials:
+                    break
+                self._events.remove(partials[0])
+
+
+def run_live_session(ws, session, poll_interval=0.1):
+    """
+    Pump a WebSocket connection through a LiveSession until the browser stops
+
+    Binary messages are audio; the text message '{"type": "stop"}' ends the
+    session. Runs on the request thread. If the provider session can't be
+    opened, the browser gets an error event and the socket is closed.
+
+    Args:
+        ws: flask-sock WebSocket
+        session: LiveSession (not started yet)
+        poll_interval: Seconds to wait for audio before flushing events
+    """
+    try:
+        session.start()
+    except Exception as e:
+        # Auth, network or quota failure while connecting to the provider
+        print(f"❌ Could not start live transcription: {e}")
+        ws.send(json.dumps({'type': 'error', 'error': f'Could not start live transcription: {e}'}))
+        ws.close(reason=1011)
+        return
+    ws.send(json.dumps({'type': 'ready', 'sample_rate': SAMPLE_RATE}))
+    try:
+        while True:
+            message = ws.receive(timeout=poll_interval)
+            if isinstance(message, (bytes, bytearray)):
+                session.push_audio(bytes(message))
+            elif isinstance(message, str):
+                try:
+                    control = json.loads(message)
+                except ValueError:
+                    control = {}
+                if control.get('type') == 'stop':
+                    break
+
+            for event in session.drain_events():
+                ws.send(json.dumps(event))
+    finally:
+        transcript = session.stop()
+
+    for event in session.drain_events():
+        ws.send(json.dumps(event))
+    ws.send(json.dumps(dict(session.checkpoint, type='done', transcript=transcript)))
@@ -0,0 +1,309 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+
+from backend.file_lock import locked
+
+# Rough conversion used for budgeting; close enough for English prose
+CHARS_PER_TOKEN = 4
+
+# Saved conversations idle this long are deleted
+MEMORY_MAX_AGE_SECONDS = 7 * 24 * 3600
+# How often a store looks for them
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+def estimate_tokens(text):
+    """Approximate token count of a piece of text"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class ConversationMemory:
+    def __init__(self, token_budget=1200, state=None):
+        """
+        Initialize the memory of one tutoring conversation
+
+        Recent turns are kept verbatim up to token_budget. Older turns move
+        to `pending` and are later folded into a short running `summary`.
+
+        Args:
+            token_budget: Max tokens of verbatim turns kept in the prompt
+            state: Dict previously produced by to_dict()
+        """
+        self.token_budget = token_budget
+        self.lock = threading.Lock()
+        self.load(state)
+
+    def load(self, state):
+        """Replace the contents with a dict previously produced by to_dict()"""
+        state = state or {}
+        with self.lock:
+            self.summary = state.get('summary', '')
+            self.turns = state.get('turns', [])
+            self.pending = state.get('pending', [])
+
+    def add_turn(self, question, answer):
+        """
+        Record a question/answer pair, evicting the oldest turns over budget
+
+        Returns:
+            bool: True if there are evicted turns waiting to be summarised
+        """
+        with self.lock:
+            self.turns.append({'question': question, 'answer': answer})
+            # Always keep the latest turn verbatim, even if it alone is over budget
+            while len(self.turns) > 1 and self._turn_tokens() > self.token_budget:
+                self.pending.append(self.turns.pop(0))
+            return bool(self.pending)
+
+    def fold(self, summarize):
+        """
+        Fold pending turns into the running summary
+
+        Runs off the request path. Turns added while the summariser is
+        working stay pending for the next fold. If the memory is cleared or
+        folded elsewhere meanwhile, the result is dropped.
+
+        Args:
+            summarize: Callable (summary, turns) -> new summary
+        """
+        summary, folding = self.fold_input()
+        if folding:
+            self.apply_fold(summary, folding, self.summarize_turns(summarize, summary, folding))
+
+    def fold_input(self):
+        """The summary and pending turns a fold starts from"""
+        with self.lock:
+            return self.summary, list(self.pending)
+
+    def apply_fold(self, summary, folding, new_summary):
+        """
+        Replace the folded turns with their summary
+
+        Returns:
+            bool: False if the memory no longer starts from summary and
+                folding (cleared, or folded by another worker)
+        """
+        with self.lock:
+            if self.summary != summary or self.pending[:len(folding)] != folding:
+                return False
+            self.summary = new_summary.strip()
+            self.pending = self.pending[len(folding):]
+            return True
+
+    @classmethod
+    def summarize_turns(cls, summarize, summary, turns):
+        try:
+            return summarize(summary, turns)
+        except Exception as e:
+            print(f"⚠️ Could not summarise chat history, keeping questions only: {e}")
+            return cls._fallback_summary(summary, turns)
+
+    def render(self):
+        """Format the memory for a prompt"""
+        with self.lock:
+            if not (self.summary or self.pending or self.turns):
+                return "No previous questions."
+
+            parts = []
+            if self.summary:
+                parts.append(f"Summary of earlier conversation:\n{self.summary}\n")
+            if self.pending:
+                # Not summarised yet - include the questions only to stay within budget
+                asked = "\n".join(f"- {turn['question']}" for turn in self.pending)
+                parts.append(f"Earlier questions:\n{asked}\n")
+            for i, turn in enumerate(self.turns, 1):
+                parts.append(f"Q{i}: {turn['question']}\nA{i}: {turn['answer']}\n")
+            return "\n".join(parts)
+
+    def clear(self):
+        self.load(None)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'summary': self.summary,
+                'turns': list(self.turns),
+                'pending': list(self.pending)
+            }
+
+    def _turn_tokens(self):
+        return sum(estimate_tokens(t['question']) + estimate_tokens(t['answer']) for t in self.turns)
+
+    @staticmethod
+    def _fallback_summary(summary, turns):
+        lines = [summary] if summary else []
+        lines += [f"- Student asked: {turn['question']}" for turn in turns]
+        return "\n".join(lines)
+
+
+class MemoryStore:
+    def __init__(self, summarize, storage_dir=None, token_budget=1200, max_cached=256,
+                 max_age=MEMORY_MAX_AGE_SECONDS):
+        """
+        Initialize per-session conversation memories
+
+        With storage_dir, every change reloads the session's file, applies
+        the change and saves it under a lock shared by all workers, so turns
+        recorded by different workers are merged rather than overwritten.
+
+        Args:
+            summarize: Callable (summary, turns) -> new summary, run in the
+                background to fold older turns
+            storage_dir: Directory to persist memories in (memory only when None)
+            token_budget: Verbatim history budget per conversation
+            max_cached: Number of conversations kept in memory
+            max_age: Seconds a saved conversation may sit idle before its
+                file is deleted
+        """
+        self.summarize = summarize
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+        if self.storage_dir:
+            self.storage_dir.mkdir(parents=True, exist_ok=True)
+
+        self.token_budget = token_budget
+        self.max_cached = max_cached
+        self.max_age = max_age
+        self._pruned_at = time.time()
+        self._memories = OrderedDict()
+        # Modification time of each session's file when last read or written
+        self._mtimes = {}
+        self._folding = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gaku-memory')
+
+    def get(self, session_key, reload=False):
+        """
+        Return the memory for a session, loading it from disk if needed
+
+        Reloaded when its file changed since this process last read or wrote
+        it, i.e. another worker recorded turns in the conversation, or always
+        with reload=True (used under the file lock).
+        """
+        with self._lock:
+            memory = self._memories.get(session_key)
+            mtime = self._mtime(session_key)
+            if memory is None:
+                memory = ConversationMemory(self.token_budget, self._load(session_key))
+                self._memories[session_key] = memory
+            elif (reload and self.storage_dir) or mtime != self._mtimes.get(session_key):
+                memory.load(self._load(session_key))
+            self._mtimes[session_key] = mtime
+            self._memories.move_to_end(session_key)
+            while len(self._memories) > self.max_cached:
+                old_key, _ = self._memories.popitem(last=False)
+                self._mtimes.pop(old_key, None)
+            return memory
+
+    def record(self, session_key, question, answer):
+        """
+        Add a turn to a session and schedule summarisation of evicted turns
+
+        Args:
+            session_key: Conversation identifier
+            question: The student's question
+            answer: Gaku's answer
+        """
+        with self._file_lock():
+            memory = self.get(session_key, reload=True)
+            needs_fold = memory.add_turn(question, answer)
+            self._save(session_key, memory)
+
+        if self.storage_dir and time.time() - self._pruned_at > PRUNE_INTERVAL_SECONDS:
+            self._pruned_at = time.time()
+            self._executor.submit(self.prune)
+
+        if needs_fold:
+            with self._lock:
+                if session_key in self._folding:
+                    return
+                self._folding.add(session_key)
+            self._executor.submit(self._fold, session_key, memory)
+
+    def clear(self, session_key):
+        with self._file_lock():
+            memory = self.get(session_key, reload=True)
+            memory.clear()
+            self._save(session_key, memory)
+
+    def prune(self):
+        """
+        Delete saved conversations idle for longer than max_age
+
+        Returns:
+            int: Number of conversations deleted
+        """
+        if not self.storage_dir:
+            return 0
+        cutoff = time.time() - self.max_age
+        deleted = 0
+        with self._file_lock():
+            for path in self.storage_dir.glob('*.json'):
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                        deleted += 1
+                except FileNotFoundError:
+                    pass
+        if deleted:
+            print(f"🗑️ Deleted {deleted} idle chat memories")
+        return deleted
+
+    def _fold(self, session_key, memory):
+        try:
+            # Turns evicted while the summariser was busy are folded in the next pass
+            while True:
+                summary, folding = memory.fold_input()
+                if not folding:
+                    break
+                new_summary = memory.summarize_turns(self.summarize, summary, folding)
+                with self._file_lock():
+                    # Applied to the saved state, which other workers may have changed
+                    memory = self.get(session_key, reload=True)
+                    if memory.apply_fold(summary, folding, new_summary):
+                        self._save(session_key, memory)
+        finally:
+            with self._lock:
+                self._folding.discard(session_key)
+
+    def _file_lock(self):
+        return locked(self.storage_dir / '.lock') if self.storage_dir else nullcontext()
+
+    def _path(self, session_key):
+        if not self.storage_dir:
+            return None
+        name = hashlib.sha256(session_key.encode('utf-8')).hexdigest()[:32]
+        return self.storage_dir / f'{name}.json'
+
+    def _mtime(self, session_key):
+        path = self._path(session_key)
+        try:
+            return path.stat().st_mtime_ns if path else None
+        except FileNotFoundError:
+            return None
+
+    def _load(self, session_key):
+        path = self._path(session_key)
+        if not path or not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load chat memory, starting fresh: {e}")
+            return None
+
+    def _save(self, session_key, memory):
+        path = self._path(session_key)
+        if not path:
+            return
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        tmp_path.write_text(json.dumps(memory.to_dict()), encoding='utf-8')
+        with self._lock:
+            tmp_path.replace(path)
+            if session_key in self._memories:
+                self._mtimes[session_key] = path.stat().st_mtime_ns
@@ -0,0 +1,156 @@
+"""
+Structured lecture notes: parse the Markdown produced by the summary prompt
+into sections and entries, merge two sets of notes, and render them back.
+
+Used for incremental summaries, where only the new tail of a growing
+transcript is summarised and merged into the existing notes.
+"""
+import re
+
+# Order of the sections in the summary prompt
+SECTION_ORDER = [
+    'LECTURE OVERVIEW',
+    'KEY CONCEPTS',
+    'IMPORTANT DETAILS',
+    'DEFINITIONS & TERMINOLOGY',
+    'KEY TAKEAWAYS',
+    'STUDY QUESTIONS',
+]
+
+# Sections whose entries are capped when merging (newest kept)
+SECTION_LIMITS = {
+    'LECTURE OVERVIEW': 3,
+    'KEY TAKEAWAYS': 7,
+    'STUDY QUESTIONS': 7,
+}
+
+ENTRY_START = re.compile(r'^(\*\*|- |\d+\.\s)')
+NUMBERED = re.compile(r'^(\*\*)?\d+\.\s*')
+BOLD = re.compile(r'\*\*([^*]+)\*\*')
+
+
+def section_key(heading):
+    """'# 🎯 KEY CONCEPTS' -> 'KEY CONCEPTS'"""
+    return re.sub(r'[^A-Z& ]', '', heading.upper()).strip()
+
+
+def entry_key(entry):
+    """Normalised title of an entry, used to spot duplicates"""
+    match = BOLD.search(entry)
+    title = match.group(1) if match else entry[:60]
+    title = NUMBERED.sub('', title.strip())
+    return re.sub(r'[^a-z0-9 ]', '', title.lower()).strip()
+
+
+def parse_notes(markdown):
+    """
+    Split notes into sections of entries
+
+    Args:
+        markdown: Notes in the format of Summarizer.generate_summary
+
+    Returns:
+        list: [{'heading': str, 'entries': [str]}] in document order
+    """
+    sections = []
+    current = None
+    entry = []
+
+    def finish_entry():
+        if current is not None and entry:
+            text = '\n'.join(entry).strip()
+            if text:
+                current['entries'].append(text)
+        entry.clear()
+
+    for line in markdown.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('# '):
+            finish_entry()
+            current = {'heading': stripped, 'entries': []}
+            sections.append(current)
+        elif current is None or stripped == '---':
+            continue
+        elif not stripped:
+            # Blank lines end list entries but not paragraphs of prose
+            if entry and ENTRY_START.match(entry[0]):
+                finish_entry()
+            elif entry:
+                entry.append('')
+        elif ENTRY_START.match(stripped):
+            finish_entry()
+            entry.append(stripped)
+        else:
+            entry.append(stripped)
+    finish_entry()
+    return sections
+
+
+def merge_notes(base, update):
+    """
+    Merge notes for a later part of the lecture into existing notes
+
+    Entries already present (same normalised title) are skipped, new ones
+    are appended to their section, and capped sections keep the newest.
+
+    Args:
+        base: Sections from parse_notes for the part already summarised
+        update: Sections from parse_notes for the new part
+
+    Returns:
+        list: Merged sections
+    """
+    merged = [{'heading': s['heading'], 'entries': list(s['entries'])} for s in base]
+    by_key = {section_key(s['heading']): s for s in merged}
+
+    for section in update:
+        key = section_key(section['heading'])
+        target = by_key.get(key)
+        if target is None:
+            target = {'heading': section['heading'], 'entries': []}
+            merged.append(target)
+            by_key[key] = target
+
+        seen = {entry_key(e) for e in target['entries']}
+        for entry in section['entries']:
+            if entry_key(entry) not in seen:
+                target['entries'].append(entry)
+                seen.add(entry_key(entry))
+
+        limit = SECTION_LIMITS.get(key)
+        if limit and len(target['entries']) > limit:
+            target['entries'] = target['entries'][-limit:]
+
+    def order(section):
+        key = section_key(section['heading'])
+        return SECTION_ORDER.index(key) if key in SECTION_ORDER else len(SECTION_ORDER)
+
+    return sorted(merged, key=order)
+
+
+def render_notes(sections):
+    """Turn sections back into Markdown, renumbering numbered entries"""
+    parts = []
+    for section in sections:
+        entries = []
+        number = 0
+        for entry in section['entries']:
+            match = NUMBERED.match(entry)
+            if match:
+                number += 1
+                entry = f"{match.group(1) or ''}{number}. " + entry[match.end():]
+            entries.append(entry)
+        parts.append(section['heading'] + '\n\n' + '\n\n'.join(entries))
+    return '\n\n---\n\n'.join(parts) + '\n'
+
+
+def concept_names(sections):
+    """Titles of the concepts and terms already covered, for the tail prompt"""
+    names = []
+    for section in sections:
+        if section_key(section['heading']) in ('KEY CONCEPTS', 'DEFINITIONS & TERMINOLOGY'):
+            for entry in section['entries']:
+                match = BOLD.search(entry)
+                if match:
+                    names.append(NUMBERED.sub('', match.group(1)).strip().rstrip(':'))
+    return names
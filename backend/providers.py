@@ -0,0 +1,111 @@
+import importlib
+import threading
+
+
+class ProviderUnavailable(Exception):
+    """Raised when a provider client can't be created (e.g. missing API key)"""
+
+    def __init__(self, name, error):
+        super().__init__(f"{name} is unavailable: {error}")
+        self.name = name
+        self.error = error
+
+
+class ProviderRegistry:
+    def __init__(self):
+        """
+        Initialize an empty registry of lazily created provider clients
+
+        Providers are registered by import path ("module:Class") so that
+        neither the SDKs (assemblyai, google.generativeai) nor the clients
+        are loaded until something needs them.
+        """
+        self._specs = {}
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, spec, **kwargs):
+        """
+        Register a provider
+
+        Args:
+            name: Name used to look the provider up
+            spec: "module.path:ClassName", or a callable
+            **kwargs: Arguments the provider is created with
+        """
+        with self._lock:
+            self._specs[name] = (spec, kwargs)
+            self._instances.pop(name, None)
+
+    def get(self, name):
+        """
+        Return the provider client, creating it on first use
+
+        A failed creation is not cached, so the next request retries
+        (e.g. after the missing key has been configured).
+
+        Raises:
+            ProviderUnavailable: If the client could not be created
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                spec, kwargs = self._specs[name]
+                try:
+                    instance = self._load(spec)(**kwargs)
+                except Exception as e:
+                    print(f"❌ Could not initialize {name}: {e}")
+                    raise ProviderUnavailable(name, e) from e
+                self._instances[name] = instance
+            return instance
+
+    def is_initialized(self, name):
+        return name in self._instances
+
+    def preload_modules(self):
+        """
+        Import every provider module without creating any clients
+
+        Meant for the gunicorn master with preload_app: the SDK imports are
+        paid once and shared copy-on-write by the forked workers, while the
+        clients (and their network connections) are still created per worker.
+        """
+        for spec, _ in list(self._specs.values()):
+            if isinstance(spec, str):
+                importlib.import_module(spec.split(':')[0])
+        print(f"📦 Preloaded provider modules: {', '.join(self._specs)}")
+
+    def warm_up(self, names=None):
+        """
+        Create provider clients ahead of the first request
+
+        Args:
+            names: Providers to create (all registered ones when None)
+
+        Returns:
+            dict: name -> None on success, or the error message
+        """
+        results = {}
+        for name in names or list(self._specs):
+            try:
+                self.get(name)
+                results[name] = None
+            except ProviderUnavailable as e:
+                results[name] = str(e.error)
+        return results
+
+    def reset(self):
+        """Drop all created clients (call after fork so none are shared)"""
+        with self._lock:
+            self._instances.clear()
+
+    @staticmethod
+    def _load(spec):
+        if callable(spec):
+            return spec
+        module_path, attr = spec.split(':')
+        return getattr(importlib.import_module(module_path), attr)
@@ -0,0 +1,272 @@
+"""
+Model routing: pick a Gemini model per operation and prompt size, and
+optionally hedge slow requests with a second model.
+
+The default policy sends short, frequent operations (chat, explain, memory
+folding) to a light model and summaries to a stronger one. Override it
+without code changes with GAKU_MODEL_CONFIG, either a path to a JSON file
+or the JSON itself, e.g.
+
+    {
+      "tiers": {"fast": "models/gemini-2.5-flash-lite"},
+      "routes": {"chat": [{"max_chars": 40000, "tier": "fast"}, {"tier": "balanced"}],
+                 "summary": "balanced"},
+      "hedge": {"enabled": true, "percentile": 95}
+    }
+
+Keys left out keep their defaults.
+"""
+import copy
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait
+from pathlib import Path
+
+DEFAULT_CONFIG = {
+    'tiers': {
+        'fast': 'models/gemini-2.5-flash-lite',
+        'balanced': 'models/gemini-2.5-flash',
+        'strong': 'models/gemini-2.5-pro',
+    },
+    # Rules are tried in order; the first whose max_chars fits the prompt wins
+    'routes': {
+        'chat': [{'max_chars': 60000, 'tier': 'fast'}, {'tier': 'balanced'}],
+        'explain': [{'max_chars': 60000, 'tier': 'fast'}, {'tier': 'balanced'}],
+        'memory': 'fast',
+        'quiz': 'balanced',
+        'flashcards': 'balanced',
+        'combine': 'balanced',
+        'summary_update': 'balanced',
+        'summary': 'strong',
+        'study_guide': 'strong',
+    },
+    'default_tier': 'balanced',
+    'hedge': {
+        'enabled': False,
+        # Hedge once a call takes longer than this percentile of recent calls
+        'percentile': 95,
+        'min_samples': 20,
+        # Used until min_samples calls have been seen
+        'initial_delay_s': 15,
+        'fallbacks': {'fast': 'balanced', 'balanced': 'fast', 'strong': 'balanced'},
+    },
+}
+
+# Recent latencies kept per operation and model
+LATENCY_WINDOW = 200
+
+
+def load_routing_config(raw=None):
+    """
+    Merge GAKU_MODEL_CONFIG (or `raw`) over the default policy
+
+    Raises:
+        ValueError: If the configuration is not valid JSON or names an
+            unknown tier
+    """
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    raw = raw if raw is not None else os.getenv('GAKU_MODEL_CONFIG', '')
+    if raw.strip():
+        path = Path(raw)
+        if not raw.lstrip().startswith('{') and path.exists():
+            raw = path.read_text(encoding='utf-8')
+        try:
+            override = json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"GAKU_MODEL_CONFIG is not valid JSON: {e}") from e
+
+        for key, value in override.items():
+            if isinstance(value, dict) and isinstance(config.get(key), dict):
+                config[key].update(value)
+            else:
+                config[key] = value
+
+    tiers = config['tiers']
+    used = [config['default_tier'], *config['hedge']['fallbacks'].values()]
+    for rules in config['routes'].values():
+        rules = [rules] if isinstance(rules, str) else rules
+        used += [rule if isinstance(rule, str) else rule['tier'] for rule in rules]
+    unknown = sorted(set(used) - set(tiers))
+    if unknown:
+        raise ValueError(f"GAKU_MODEL_CONFIG uses unknown model tiers: {', '.join(unknown)}")
+    return config
+
+
+class ModelRouter:
+    def __init__(self, create_model, config=None, max_workers=16, context_cache=None):
+        """
+        Initialize a router over lazily created models
+
+        Args:
+            create_model: Callable (model_name) -> object with generate_content
+            config: Routing policy (see DEFAULT_CONFIG); loaded from the
+                environment when None
+            max_workers: Threads for hedge calls; a slow call is not hedged
+                while all of them are busy
+            context_cache: ContextCache for lecture prefixes (see
+                backend/context_cache.py); prefixes are sent inline when None
+        """
+        self.create_model = create_model
+        self.context_cache = context_cache
+        self.config = config or load_routing_config()
+        self.hedge = self.config['hedge']
+
+        self._models = {}
+        self._latencies = {}
+        self._counts = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'hedges_skipped': 0, 'fallbacks': 0}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.max_workers = max_workers
+        self._hedge_slots = threading.BoundedSemaphore(max_workers)
+
+    def tier_for(self, operation, prompt):
+        """Tier the policy assigns to an operation with a prompt this long"""
+        rules = self.config['routes'].get(operation, self.config['default_tier'])
+        if isinstance(rules, str):
+            return rules
+        for rule in rules:
+            if rule.get('max_chars') is None or len(prompt) <= rule['max_chars']:
+                return rule['tier']
+        return self.config['default_tier']
+
+    def generate(self, operation, prompt, prefix=None):
+        """
+        Run a prompt on the model chosen for the operation
+
+        With hedging enabled, a call that runs past the recent latency
+        percentile is raced against the tier's fallback model and the first
+        successful response wins. A primary that fails outright is retried
+        once on the fallback.
+
+        The primary call starts at once on its own thread, never queued,
+        so the hedge delay only counts time spent on the model. Hedges run
+        on the bounded pool and are skipped when it is full: under overload
+        they would only add load.
+
+        Args:
+            operation: Name of the calling operation, e.g. 'chat'
+            prompt: The prompt text (everything after the prefix)
+            prefix: Shared lecture prefix, served from the context cache
+
+        Returns:
+            The model's response (with .text)
+        """
+        tier = self.tier_for(operation, (prefix or '') + prompt)
+        model_name = self.config['tiers'][tier]
+        fallback_tier = self.hedge['fallbacks'].get(tier)
+        fallback = self.config['tiers'].get(fallback_tier)
+        with self._lock:
+            self._counts['calls'] += 1
+
+        if not self.hedge['enabled'] or not fallback or fallback == model_name:
+            return self._call(operation, model_name, prompt, prefix)
+
+        delay = self.hedge_delay(operation, model_name)
+        primary = self._start(self._call, operation, model_name, prompt, prefix)
+        try:
+            return primary.result(timeout=delay)
+        except FuturesTimeout:
+            pass
+        except Exception as e:
+            print(f"⚠️ {operation} failed on {model_name} ({e}), retrying on {fallback}")
+            with self._lock:
+                self._counts['fallbacks'] += 1
+            return self._call(operation, fallback, prompt, prefix)
+
+        if not self._hedge_slots.acquire(blocking=False):
+            with self._lock:
+                self._counts['hedges_skipped'] += 1
+            return primary.result()
+
+        print(f"⏱️ {operation} on {model_name} slower than {delay:.2f}s, hedging with {fallback}")
+        hedge = self._pool().submit(self._call, operation, fallback, prompt, prefix)
+        hedge.add_done_callback(lambda _: self._hedge_slots.release())
+        with self._lock:
+            self._counts['hedged'] += 1
+
+        # The losing call can't be cancelled mid-request; it finishes in the
+        # background and still feeds the latency window
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            self._counts['hedge_wins'] += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def hedge_delay(self, operation, model_name):
+        """Seconds to wait before hedging: the configured percentile of recent calls"""
+        with self._lock:
+            samples = sorted(self._latencies.get((operation, model_name), ()))
+        if len(samples) < self.hedge['min_samples']:
+            return self.hedge['initial_delay_s']
+        rank = math.ceil(self.hedge['percentile'] / 100 * len(samples))
+        return samples[max(0, rank - 1)]
+
+    def stats(self):
+        """Call counts and latency percentiles per operation and model"""
+        with self._lock:
+            latencies = {key: sorted(values) for key, values in self._latencies.items()}
+            counts = dict(self._counts)
+
+        def pick(values, p):
+            return round(values[max(0, math.ceil(p / 100 * len(values)) - 1)], 3)
+
+        counts['models'] = [
+            {'operation': operation, 'model': model, 'samples': len(values),
+             'p50_s': pick(values, 50), 'p95_s': pick(values, 95)}
+            for (operation, model), values in sorted(latencies.items()) if values
+        ]
+        return counts
+
+    def _model(self, model_name):
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = self._models[model_name] = self.create_model(model_name)
+            return model
+
+    def _call(self, operation, model_name, prompt, prefix=None):
+        started = time.perf_counter()
+        if prefix is None:
+            response = self._model(model_name).generate_content(prompt)
+        elif self.context_cache is None:
+            response = self._model(model_name).generate_content(prefix + prompt)
+        else:
+            response = self.context_cache.generate(model_name, prefix, prompt, self._model)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            window = self._latencies.setdefault((operation, model_name), deque(maxlen=LATENCY_WINDOW))
+            window.append(elapsed)
+        return response
+
+    @staticmethod
+    def _start(fn, *args):
+        """Run fn(*args) on a new thread, returning its Future"""
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name='gaku-model-call', daemon=True).start()
+        return future
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='gaku-hedge')
+            return self._executor
@@ -1,37 +1,16 @@
+import hashlib
 import os
 import google.generativeai as genai
 from dotenv import load_dotenv
 
-load_dotenv()
+from backend.context_cache import lecture_prefix
+from backend.notes import concept_names, merge_notes, parse_notes, render_notes
+from backend.routing import ModelRouter
 
-class Summarizer:
-    def __init__(self):
-        """Initialize the summarizer with Google Gemini"""
-        self.api_key = os.getenv('GEMINI_API_KEY')
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
-        
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('models/gemini-2.5-flash')
-    
-    def generate_summary(self, transcript_text):
-        """
-        Generate a comprehensive summary of the lecture with enhanced formatting
-        
-        Args:
-            transcript_text: The full lecture transcription
-            
-        Returns:
-            dict: Contains summary, key points, and status
-        """
-        try:
-            prompt = f"""
-You are an expert educational note-taker. Create comprehensive, well-structured study notes from this lecture using PROPER MARKDOWN FORMATTING.
-
-LECTURE TRANSCRIPT:
-{transcript_text}
+load_dotenv()
 
-Create notes using MARKDOWN with this structure:
+# Shared by full and incremental summaries so their notes can be merged
+NOTES_FORMAT = """Create notes using MARKDOWN with this structure:
 
 # 📚 LECTURE OVERVIEW
 
@@ -110,9 +89,50 @@ Create notes using MARKDOWN with this structure:
 - NO ASCII art boxes or special characters
 - Keep language simple and clear
 """
+
+# Tails shorter than this wait for more transcript before being summarised
+MIN_TAIL_CHARS = 400
+
+
+class Summarizer:
+    def __init__(self, context_cache=None):
+        """
+        Initialize the summarizer with Google Gemini
+        
+        Args:
+            context_cache: Shared ContextCache for lecture prefixes
+        """
+        self._configure()
+        # Picks the model per operation (see backend/routing.py)
+        self.router = ModelRouter(self._create_model, context_cache=context_cache)
+    
+    def _configure(self):
+        self.api_key = os.getenv('GEMINI_API_KEY')
+        if not self.api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        
+        genai.configure(api_key=self.api_key)
+    
+    def _create_model(self, model_name):
+        return genai.GenerativeModel(model_name)
+    
+    def generate_summary(self, transcript_text):
+        """
+        Generate a comprehensive summary of the lecture with enhanced formatting
+        
+        Args:
+            transcript_text: The full lecture transcription
+            
+        Returns:
+            dict: Contains summary, key points, and status
+        """
+        try:
+            prompt = f"""TASK: You are an expert educational note-taker. Create comprehensive, well-structured study notes from the lecture above using PROPER MARKDOWN FORMATTING.
+
+{NOTES_FORMAT}"""
             
             print("Generating enhanced summary with Gemini...")
-            response = self.model.generate_content(prompt)
+            response = self.router.generate('summary', prompt, lecture_prefix(transcript_text))
             
             return {
                 'status': 'success',
@@ -128,6 +148,98 @@ Create notes using MARKDOWN with this structure:
                 'error': str(e)
             }
     
+    def update_summary(self, transcript_text, previous_state=None, growing=False):
+        """
+        Summarise a growing transcript, only paying for the part that is new
+        
+        previous_state records how much of the transcript its notes cover.
+        When transcript_text extends that prefix, only the new tail is
+        summarised and merged into the existing notes. Otherwise the whole
+        transcript is summarised.
+        
+        Args:
+            transcript_text: The full lecture transcription so far
+            previous_state: notes_state returned by an earlier call, or None
+            growing: The lecture is still going on (live mode); a tail
+                shorter than MIN_TAIL_CHARS then waits for more text
+            
+        Returns:
+            dict: Contains summary, notes_state, incremental flag and status,
+                plus pending_chars when the notes leave a short tail out
+        """
+        covered = previous_state['summarized_chars'] if previous_state else 0
+        extends_previous = (
+            previous_state is not None
+            and len(transcript_text) >= covered
+            and self._prefix_hash(transcript_text[:covered]) == previous_state['prefix_hash']
+        )
+        
+        if not extends_previous:
+            result = self.generate_summary(transcript_text)
+            if result['status'] == 'success':
+                result['notes_state'] = self._notes_state(transcript_text, parse_notes(result['summary']))
+                result['incremental'] = False
+            return result
+        
+        tail = transcript_text[covered:]
+        new_chars = len(tail.strip())
+        if not new_chars or (growing and new_chars < MIN_TAIL_CHARS):
+            # Nothing new, or too little to be worth a call while the lecture
+            # goes on; pending_chars tells the caller what the notes leave out
+            return {
+                'status': 'success',
+                'summary': render_notes(previous_state['sections']),
+                'notes_state': previous_state,
+                'incremental': True,
+                'pending_chars': new_chars,
+                'error': None
+            }
+        
+        try:
+            covered_names = ", ".join(concept_names(previous_state['sections'])) or "none yet"
+            prompt = f"""
+You are an expert educational note-taker. Notes already exist for the first part of this lecture.
+Create study notes for the NEW PART below only, using PROPER MARKDOWN FORMATTING.
+
+Concepts and terms already covered (do not repeat them unless the new part adds something): {covered_names}
+
+NEW PART OF THE LECTURE TRANSCRIPT:
+{tail}
+
+{NOTES_FORMAT}"""
+            
+            print(f"Summarising {len(tail)} new characters (of {len(transcript_text)}) with Gemini...")
+            response = self.router.generate('summary_update', prompt)
+            
+            sections = merge_notes(previous_state['sections'], parse_notes(response.text))
+            return {
+                'status': 'success',
+                'summary': render_notes(sections),
+                'notes_state': self._notes_state(transcript_text, sections),
+                'incremental': True,
+                'error': None
+            }
+            
+        except Exception as e:
+            print(f"Error updating summary: {str(e)}")
+            return {
+                'status': 'error',
+                'summary': None,
+                'error': str(e)
+            }
+    
+    @staticmethod
+    def _prefix_hash(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    
+    def _notes_state(self, transcript_text, sections):
+        """Remember which part of the transcript the notes cover"""
+        return {
+            'summarized_chars': len(transcript_text),
+            'prefix_hash': self._prefix_hash(transcript_text),
+            'sections': sections
+        }
+    
     def generate_study_guide(self, transcript_text):
         """
         Generate a structured study guide
@@ -139,8 +251,7 @@ Create notes using MARKDOWN with this structure:
             dict: Contains study guide and status
         """
         try:
-            prompt = f"""
-Create a comprehensive study guide from this lecture transcript. Include:
+            prompt = """TASK: Create a comprehensive study guide from the lecture transcript above. Include:
 
 1. Main Topics Covered
 2. Detailed explanations of each topic
@@ -148,14 +259,11 @@ Create a comprehensive study guide from this lecture transcript. Include:
 4. Questions for self-assessment (5-10 questions)
 5. Key takeaways
 
-Lecture Transcript:
-{transcript_text}
-
 Make it well-structured and easy to study from.
 """
             
             print("Generating study guide...")
-            response = self.model.generate_content(prompt)
+            response = self.router.generate('study_guide', prompt, lecture_prefix(transcript_text))
             
             return {
                 'status': 'success',
@@ -183,11 +291,7 @@ Make it well-structured and easy to study from.
             dict: Contains flashcards and status
         """
         try:
-            prompt = f"""
-Create {num_cards} flashcards from this lecture to help students study effectively using MARKDOWN formatting.
-
-LECTURE TRANSCRIPT:
-{transcript_text}
+            prompt = f"""TASK: Create {num_cards} flashcards from the lecture above to help students study effectively using MARKDOWN formatting.
 
 Format each flashcard using PROPER MARKDOWN:
 
@@ -240,7 +344,7 @@ Format each flashcard using PROPER MARKDOWN:
 """
             
             print(f"Generating {num_cards} flashcards...")
-            response = self.model.generate_content(prompt)
+            response = self.router.generate('flashcards', prompt, lecture_prefix(transcript_text))
             
             return {
                 'status': 'success',
@@ -254,4 +358,73 @@ Format each flashcard using PROPER MARKDOWN:
                 'status': 'error',
                 'flashcards': None,
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+    
+    def combine_summaries(self, left_summary, right_summary):
+        """
+        Merge the notes of two consecutive parts of a course into one overview
+        
+        Used for the internal nodes of a CourseDigest, so the output is fed
+        back in as input further up the tree and must stay compact.
+        
+        Args:
+            left_summary: Notes covering the earlier lectures
+            right_summary: Notes covering the later lectures
+            
+        Returns:
+            dict: Contains summary and status
+        """
+        try:
+            prompt = f"""
+You are building a course-level overview from study notes. Merge the two sets of notes
+below (EARLIER covers lectures before LATER) into ONE overview using MARKDOWN.
+
+EARLIER NOTES:
+{left_summary}
+
+LATER NOTES:
+{right_summary}
+
+Use this structure:
+
+# 📚 COURSE OVERVIEW
+[3-4 sentences on what these lectures cover together and how they build on each other]
+
+---
+
+# 🧭 TOPIC PROGRESSION
+- **Topic**: One line on what was covered, in lecture order
+
+---
+
+# 🎯 CORE CONCEPTS
+**CONCEPT NAME**
+→ One sentence, noting where concepts connect across lectures
+
+---
+
+# ✅ KEY TAKEAWAYS
+1. **Takeaway**: One sentence
+
+**RULES**:
+- Merge duplicate concepts instead of repeating them
+- Stay under 500 words in total, however long the input is
+- Use proper Markdown only, no ASCII art
+"""
+            
+            print("Combining course notes with Gemini...")
+            response = self.router.generate('combine', prompt)
+            
+            return {
+                'status': 'success',
+                'summary': response.text,
+                'error': None
+            }
+            
+        except Exception as e:
+            print(f"Error combining summaries: {str(e)}")
+            return {
+                'status': 'error',
+                'summary': None,
+                'error': str(e)
+            }
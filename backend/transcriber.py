@@ -2,6 +2,8 @@ import os
 import assemblyai as aai
 from dotenv import load_dotenv
 
+from backend.jobs import WEBHOOK_AUTH_HEADER
+
 load_dotenv()
 
 class Transcriber:
@@ -41,68 +43,78 @@ class Transcriber:
             file_size = os.path.getsize(audio_file_path)
             print(f"📁 File size: {file_size / (1024*1024):.2f}MB")
             
-            # Configure transcriber with optimal settings
-            config = aai.TranscriptionConfig(
-                speaker_labels=False,  # Don't need speaker identification for lectures
-                punctuate=True,        # Add punctuation
-                format_text=True,      # Format the text nicely
-                word_boost=[],         # Can add technical terms here if needed
-                boost_param="default"  # default, low, or high
-            )
-            
             # Create transcriber and transcribe
-            transcriber = aai.Transcriber(config=config)
+            transcriber = aai.Transcriber(config=self._config())
             print("⏳ Uploading and transcribing audio...")
             transcript = transcriber.transcribe(audio_file_path)
             
-            # Check if transcription was successful
-            if transcript.status == aai.TranscriptStatus.error:
-                print(f"❌ Transcription error: {transcript.error}")
-                return {
-                    'status': 'error',
-                    'text': None,
-                    'words': None,
-                    'duration': None,
-                    'error': transcript.error or 'Transcription failed'
-                }
+            return self._result(transcript)
+            
+        except Exception as e:
+            print(f"❌ Error during transcription: {str(e)}")
+            return {
+                'status': 'error',
+                'text': None,
+                'words': None,
+                'duration': None,
+                'error': str(e)
+            }
+    
+    def submit_audio(self, audio_file_path, webhook_url, webhook_secret):
+        """
+        Upload audio and start transcription without waiting for it
+        
+        AssemblyAI calls webhook_url when the job is done; no thread or
+        connection is held while it runs.
+        
+        Args:
+            audio_file_path: Path to the audio file
+            webhook_url: Our endpoint the provider calls on completion
+            webhook_secret: Sent back in the WEBHOOK_AUTH_HEADER header
+            
+        Returns:
+            dict: Contains 'provider_id' (the transcript ID) and 'status'
+        """
+        try:
+            config = self._config()
+            config.set_webhook(webhook_url, WEBHOOK_AUTH_HEADER, webhook_secret)
             
-            # Extract word-level timestamps (optional - can be used for navigation)
-            words_with_timestamps = []
-            if hasattr(transcript, 'words') and transcript.words:
-                # Only store first 100 words with timestamps to avoid large payload
-                for word in transcript.words[:100]:
-                    words_with_timestamps.append({
-                        'text': word.text,
-                        'start': word.start,  # milliseconds
-                        'end': word.end,
-                        'confidence': word.confidence
-                    })
-            
-            # Get audio duration if available
-            duration = None
-            if hasattr(transcript, 'audio_duration'):
-                duration = transcript.audio_duration  # in milliseconds
-                print(f"⏱️ Audio duration: {duration / 1000:.1f} seconds")
-            
-            # Get transcript text
-            text = transcript.text
-            word_count = len(text.split())
-            
-            print(f"✅ Transcription completed successfully!")
-            print(f"📝 Word count: {word_count}")
-            print(f"📏 Character count: {len(text)}")
+            print(f"📤 Submitting for transcription: {audio_file_path}")
+            transcript = aai.Transcriber(config=config).submit(audio_file_path)
             
             return {
                 'status': 'success',
-                'text': text,
-                'words': words_with_timestamps,  # First 100 words with timestamps
-                'duration': duration,
-                'word_count': word_count,
+                'provider_id': transcript.id,
                 'error': None
             }
             
         except Exception as e:
-            print(f"❌ Error during transcription: {str(e)}")
+            print(f"❌ Error submitting transcription: {str(e)}")
+            return {
+                'status': 'error',
+                'provider_id': None,
+                'error': str(e)
+            }
+    
+    def fetch_result(self, provider_id):
+        """
+        Get the result of a submitted transcription
+        
+        Args:
+            provider_id: ID returned by submit_audio
+            
+        Returns:
+            dict: Same as transcribe_audio, or status 'processing' if the
+            job hasn't finished
+        """
+        try:
+            transcript = aai.Transcript.get_by_id(provider_id)
+            if transcript.status in (aai.TranscriptStatus.queued, aai.TranscriptStatus.processing):
+                return {'status': 'processing', 'text': None, 'error': None}
+            return self._result(transcript)
+            
+        except Exception as e:
+            print(f"❌ Error fetching transcription {provider_id}: {str(e)}")
             return {
                 'status': 'error',
                 'text': None,
@@ -111,6 +123,66 @@ class Transcriber:
                 'error': str(e)
             }
     
+    @staticmethod
+    def _config():
+        """Transcription settings shared by blocking and webhook modes"""
+        return aai.TranscriptionConfig(
+            speaker_labels=False,  # Don't need speaker identification for lectures
+            punctuate=True,        # Add punctuation
+            format_text=True,      # Format the text nicely
+            word_boost=[],         # Can add technical terms here if needed
+            boost_param="default"  # default, low, or high
+        )
+    
+    @staticmethod
+    def _result(transcript):
+        """Turn a finished AssemblyAI transcript into our result dict"""
+        # Check if transcription was successful
+        if transcript.status == aai.TranscriptStatus.error:
+            print(f"❌ Transcription error: {transcript.error}")
+            return {
+                'status': 'error',
+                'text': None,
+                'words': None,
+                'duration': None,
+                'error': transcript.error or 'Transcription failed'
+            }
+        
+        # Extract word-level timestamps (optional - can be used for navigation)
+        words_with_timestamps = []
+        if hasattr(transcript, 'words') and transcript.words:
+            # Only store first 100 words with timestamps to avoid large payload
+            for word in transcript.words[:100]:
+                words_with_timestamps.append({
+                    'text': word.text,
+                    'start': word.start,  # milliseconds
+                    'end': word.end,
+                    'confidence': word.confidence
+                })
+        
+        # Get audio duration if available
+        duration = None
+        if getattr(transcript, 'audio_duration', None):
+            duration = transcript.audio_duration  # in milliseconds
+            print(f"⏱️ Audio duration: {duration / 1000:.1f} seconds")
+        
+        # Get transcript text
+        text = transcript.text
+        word_count = len(text.split())
+        
+        print(f"✅ Transcription completed successfully!")
+        print(f"📝 Word count: {word_count}")
+        print(f"📏 Character count: {len(text)}")
+        
+        return {
+            'status': 'success',
+            'text': text,
+            'words': words_with_timestamps,  # First 100 words with timestamps
+            'duration': duration,
+            'word_count': word_count,
+            'error': None
+        }
+    
     def transcribe_from_url(self, audio_url):
         """
         Transcribe audio from URL
@@ -0,0 +1,356 @@
+"""
+Load test: a classroom of students using Gaku at the same time.
+
+Each simulated student arrives at a random time (Poisson arrivals) and runs
+a realistic session with think time between steps:
+
+    transcribe -> set_context -> summary -> several chats -> quiz -> flashcards
+
+Students share a handful of recordings, as a class would. The report has
+per-endpoint p50/p95/p99 latency, error, 429 and degraded rates, and
+throughput over time. A degraded response (200 with "degraded": true, e.g. a
+summary built without the model) is counted on its own, not as ok.
+
+By default the app runs in this process with the fake providers
+(backend/fakes.py), so no API keys or network are needed:
+
+    python benchmarks/loadtest.py --students 200 --arrival-rate 5 --time-scale 0.2
+
+To size a real deployment, start it with fake providers and point the
+harness at it:
+
+    GAKU_FAKE_PROVIDERS=1 WEB_CONCURRENCY=2 gunicorn backend.api:app
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 --students 200
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Students ask the same things in different words
+QUESTIONS = [
+    "What is the main idea of this lecture?",
+    "what's the main idea of the lecture",
+    "Can you explain the key concepts again in simple terms?",
+    "What will probably be on the exam?",
+    "What is likely to be on the exam?",
+    "Give me an example from the lecture.",
+    "What is the difference between the first two concepts?",
+    "Why does this topic matter?",
+    "Summarise the lecture in three bullet points.",
+    "Which part of the lecture is the hardest?",
+]
+
+
+# -----------------------------
+# HTTP CLIENT
+# -----------------------------
+class Recorder:
+    def __init__(self):
+        """Collects one record per request"""
+        self.records = []
+        self.active = []  # (time, active sessions) samples
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.sessions = 0
+
+    def now(self):
+        return time.perf_counter() - self.started
+
+    def add(self, endpoint, start, latency, outcome, status):
+        with self.lock:
+            self.records.append({
+                'endpoint': endpoint,
+                'start': start,
+                'end': start + latency,
+                'latency': latency,
+                'outcome': outcome,
+                'status': status
+            })
+
+    def session_delta(self, delta):
+        with self.lock:
+            self.sessions += delta
+            self.active.append((self.now(), self.sessions))
+
+
+def classify(status, body):
+    """'ok', 'degraded', 'rate_limited' or 'error' for one response"""
+    error = str((body or {}).get('error') or '')
+    if status == 429 or error.startswith('429') or 'Resource has been exhausted' in error:
+        return 'rate_limited'
+    if status >= 400 or (body or {}).get('status') == 'error':
+        return 'error'
+    if (body or {}).get('degraded'):
+        return 'degraded'
+    return 'ok'
+
+
+def request(recorder, base_url, method, path, endpoint, payload=None, files=None, timeout=120):
+    """
+    Send one request and record how it went; returns the JSON body
+
+    With files, payload holds the other multipart form fields.
+    """
+    headers = {}
+    data = None
+    if files:
+        boundary = uuid.uuid4().hex
+        parts = [
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            for name, value in (payload or {}).items()
+        ]
+        for field, (filename, content) in files.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; '
+                f'filename="{filename}"\r\nContent-Type: application/octet-stream\r\n\r\n'.encode()
+                + content + b'\r\n'
+            )
+        data = b''.join(parts) + f'--{boundary}--\r\n'.encode()
+        headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+    elif payload is not None:
+        data = json.dumps(payload).encode()
+        headers['Content-Type'] = 'application/json'
+
+    req = urllib.request.Request(base_url + path, data=data, headers=headers, method=method)
+    start = recorder.now()
+    status, body = 0, None
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            status = response.status
+            body = json.loads(response.read() or b'null')
+    except urllib.error.HTTPError as e:
+        status = e.code
+        try:
+            body = json.loads(e.read() or b'null')
+        except ValueError:
+            body = None
+    except (OSError, ValueError) as e:
+        body = {'status': 'error', 'error': str(e)}
+
+    recorder.add(endpoint, start, recorder.now() - start, classify(status, body), status)
+    return body or {}
+
+
+# -----------------------------
+# STUDENT SESSION
+# -----------------------------
+def student_session(recorder, args, recording, rng):
+    """One student's visit, from upload to flashcards"""
+    recorder.session_delta(+1)
+    session_id = uuid.uuid4().hex
+
+    def think():
+        time.sleep(rng.expovariate(1 / args.think_time) if args.think_time else 0)
+
+    def post(path, payload):
+        return request(recorder, args.url, 'POST', path, path, payload, timeout=args.timeout)
+
+    try:
+        form = {'mode': 'async'} if args.async_transcribe else None
+        result = request(recorder, args.url, 'POST', '/transcribe', '/transcribe', form,
+                         files={'file': ('lecture.mp3', recording)}, timeout=args.timeout)
+        while result.get('status') == 'processing' and result.get('job_id'):
+            time.sleep(args.poll_interval)
+            result = request(recorder, args.url, 'GET', f"/jobs/{result['job_id']}", '/jobs/<id>',
+                             timeout=args.timeout)
+        lecture_id = result.get('lecture_id')
+        transcript = result.get('text')
+        if not lecture_id:
+            return
+        think()
+
+        reference = {'lecture_id': lecture_id}
+        if post('/set_context', reference).get('unknown_lecture') and transcript:
+            post('/set_context', {'transcript': transcript})
+        think()
+
+        post('/summary', reference)
+        think()
+
+        for question in rng.sample(QUESTIONS, min(args.chats, len(QUESTIONS))):
+            post('/chat', dict(reference, question=question, session_id=session_id))
+            think()
+
+        post('/quiz', dict(reference, num_questions=5))
+        think()
+        post('/flashcards', dict(reference, num_questions=10))
+    finally:
+        recorder.session_delta(-1)
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    recordings = [rng.randbytes(64 * 1024) for _ in range(args.lectures)]
+    recorder = Recorder()
+
+    threads = []
+    arrival = 0.0
+    for _ in range(args.students):
+        arrival += rng.expovariate(args.arrival_rate)
+        delay = arrival - recorder.now()
+        if delay > 0:
+            time.sleep(delay)
+        thread = threading.Thread(
+            target=student_session,
+            args=(recorder, args, rng.choice(recordings), random.Random(rng.random())),
+            daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+    return recorder
+
+
+# -----------------------------
+# REPORT
+# -----------------------------
+def percentile(values, p):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(p / 100 * len(ordered))
+    return ordered[max(0, rank - 1)]
+
+
+def summarize(recorder, bucket_seconds):
+    records = recorder.records
+    duration = max((r['end'] for r in records), default=0.0)
+
+    endpoints = {}
+    for name in sorted({r['endpoint'] for r in records}):
+        rows = [r for r in records if r['endpoint'] == name]
+        latencies = [r['latency'] * 1000 for r in rows]
+        endpoints[name] = {
+            'requests': len(rows),
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'error_rate': sum(r['outcome'] == 'error' for r in rows) / len(rows),
+            'rate_limited_rate': sum(r['outcome'] == 'rate_limited' for r in rows) / len(rows),
+            'degraded_rate': sum(r['outcome'] == 'degraded' for r in rows) / len(rows),
+            'throughput_rps': len(rows) / duration if duration else 0.0
+        }
+
+    timeline = []
+    buckets = int(duration // bucket_seconds) + 1 if records else 0
+    for b in range(buckets):
+        start, end = b * bucket_seconds, (b + 1) * bucket_seconds
+        done = [r for r in records if start <= r['end'] < end]
+        active = [count for t, count in recorder.active if t < end]
+        timeline.append({
+            'start_s': start,
+            'completed_rps': len(done) / bucket_seconds,
+            'ok_rps': sum(r['outcome'] == 'ok' for r in done) / bucket_seconds,
+            'rate_limited': sum(r['outcome'] == 'rate_limited' for r in done),
+            'errors': sum(r['outcome'] == 'error' for r in done),
+            'degraded': sum(r['outcome'] == 'degraded' for r in done),
+            'active_sessions': active[-1] if active else 0,
+            'p95_ms': percentile([r['latency'] * 1000 for r in done], 95)
+        })
+
+    return {
+        'duration_s': duration,
+        'requests': len(records),
+        'throughput_rps': len(records) / duration if duration else 0.0,
+        'error_rate': sum(r['outcome'] == 'error' for r in records) / len(records) if records else 0.0,
+        'rate_limited_rate': sum(r['outcome'] == 'rate_limited' for r in records) / len(records) if records else 0.0,
+        'degraded_rate': sum(r['outcome'] == 'degraded' for r in records) / len(records) if records else 0.0,
+        'endpoints': endpoints,
+        'timeline': timeline
+    }
+
+
+def print_report(report, args):
+    print(f"\n📊 Load test: {args.students} students, {args.arrival_rate}/s arrivals, {args.url}")
+    print(f"   {report['requests']} requests in {report['duration_s']:.1f}s "
+          f"({report['throughput_rps']:.1f} req/s), "
+          f"{report['error_rate']:.1%} errors, {report['rate_limited_rate']:.1%} rate limited, "
+          f"{report['degraded_rate']:.1%} degraded\n")
+
+    print(f"{'endpoint':14} {'reqs':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'err':>7} {'429':>7} {'degr':>7} {'req/s':>7}")
+    for name, row in report['endpoints'].items():
+        print(f"{name:14} {row['requests']:6d} {row['p50_ms']:9.0f} {row['p95_ms']:9.0f} {row['p99_ms']:9.0f} "
+              f"{row['error_rate']:7.1%} {row['rate_limited_rate']:7.1%} {row['degraded_rate']:7.1%} {row['throughput_rps']:7.2f}")
+
+    print(f"\n{'t (s)':>7} {'req/s':>7} {'ok/s':>7} {'429':>5} {'err':>5} {'degr':>5} {'active':>7} {'p95 ms':>8}")
+    peak = max((row['completed_rps'] for row in report['timeline']), default=0) or 1
+    for row in report['timeline']:
+        bar = '█' * int(30 * row['completed_rps'] / peak)
+        print(f"{row['start_s']:7.0f} {row['completed_rps']:7.1f} {row['ok_rps']:7.1f} {row['rate_limited']:5d} "
+              f"{row['errors']:5d} {row['degraded']:5d} {row['active_sessions']:7d} {row['p95_ms']:8.0f} {bar}")
+
+
+# -----------------------------
+# IN-PROCESS SERVER
+# -----------------------------
+def start_local_server(time_scale):
+    """Serve backend.api with fake providers on a free local port"""
+    os.environ['GAKU_FAKE_PROVIDERS'] = '1'
+    os.environ['GAKU_FAKE_TIME_SCALE'] = str(time_scale)
+    os.environ.setdefault('GAKU_DATA_DIR', tempfile.mkdtemp(prefix='gaku-loadtest-'))
+    sys.path.insert(0, str(ROOT))
+
+    from werkzeug.serving import make_server
+    import backend.api as api
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # no per-request access log
+
+    server = make_server('127.0.0.1', 0, api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target server (default: run the app here with fake providers)")
+    parser.add_argument("--students", type=int, default=50)
+    parser.add_argument("--arrival-rate", type=float, default=2.0, help="students arriving per second")
+    parser.add_argument("--lectures", type=int, default=3, help="distinct recordings the class shares")
+    parser.add_argument("--chats", type=int, default=4, help="chat questions per student")
+    parser.add_argument("--think-time", type=float, default=2.0, help="mean seconds between a student's requests")
+    parser.add_argument("--async-transcribe", action="store_true",
+                        help="submit uploads as webhook jobs and poll /jobs/<id>")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between job status checks")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="fake provider latency multiplier (local mode)")
+    parser.add_argument("--bucket", type=float, default=5.0, help="seconds per throughput bucket")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    server = None
+    if not args.url:
+        server, args.url = start_local_server(args.time_scale)
+    args.url = args.url.rstrip('/')
+
+    try:
+        recorder = run(args)
+    finally:
+        if server:
+            server.shutdown()
+
+    report = summarize(recorder, args.bucket)
+    print_report(report, args)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
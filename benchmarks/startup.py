@@ -0,0 +1,81 @@
+"""
+Startup benchmark for the Flask app.
+
+Measures, in a fresh interpreter per run:
+- import time of backend.api
+- latency of the first and second request to / and /set_context
+  (the first /set_context pays for creating the chatbot provider)
+
+Placeholder API keys are used and no provider calls are made, so this runs
+offline:
+
+    python benchmarks/startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+import backend.api as api
+timings = {"import backend.api": time.perf_counter() - t0}
+
+client = api.app.test_client()
+body = {"transcript": "Benchmark lecture about startup latency."}
+for label, call in [
+    ("GET / (first)", lambda: client.get("/")),
+    ("GET / (second)", lambda: client.get("/")),
+    ("POST /set_context (first)", lambda: client.post("/set_context", json=body)),
+    ("POST /set_context (second)", lambda: client.post("/set_context", json=body)),
+]:
+    t = time.perf_counter()
+    response = call()
+    timings[label] = time.perf_counter() - t
+    assert response.status_code < 500, (label, response.status_code)
+
+print(json.dumps(timings))
+"""
+
+
+def run_once(data_dir):
+    env = dict(os.environ)
+    env.setdefault("GEMINI_API_KEY", "benchmark-placeholder")
+    env.setdefault("ASSEMBLYAI_API_KEY", "benchmark-placeholder")
+    env["GAKU_DATA_DIR"] = str(data_dir)
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        runs = [run_once(data_dir) for _ in range(args.runs)]
+
+    if args.json:
+        print(json.dumps(runs, indent=2))
+        return
+
+    print(f"⏱️ Startup benchmark ({args.runs} runs, milliseconds)")
+    print(f"{'':32} {'median':>8} {'min':>8} {'max':>8}")
+    for label in runs[0]:
+        values = [run[label] * 1000 for run in runs]
+        print(f"{label:32} {statistics.median(values):8.1f} {min(values):8.1f} {max(values):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -85,6 +85,288 @@ function enableButton(button) {
   button.style.pointerEvents = "auto";
 }
 
+// ==============================
+// MARKDOWN WORKER
+// ==============================
+// Chat messages and study tool output are parsed in static/markdown_worker.js,
+// a block (message, card or section) at a time. Parsed HTML is memoised by
+// block text, so re-rendering a message or a restored deck costs nothing.
+const MARKDOWN_CACHE_ENTRIES = 2000;
+const MARKDOWN_BATCH_BLOCKS = 8;
+
+const markdownHtml = new Map(); // block text → HTML, most recently used last
+const markdownJobs = new Map();
+let markdownWorker = startMarkdownWorker();
+let nextMarkdownJob = 0;
+
+function startMarkdownWorker() {
+  if (typeof Worker === "undefined") return null;
+  try {
+    const worker = new Worker('/static/markdown_worker.js');
+    worker.onmessage = (event) => {
+      const job = markdownJobs.get(event.data.id);
+      if (!job) return;
+      job.onBatch(event.data.start, event.data.html);
+      if (event.data.done) markdownJobs.delete(event.data.id);
+    };
+    // e.g. marked could not be loaded offline: parse on the main thread
+    worker.onerror = (event) => {
+      event.preventDefault();
+      console.warn("⚠️ Markdown worker unavailable, parsing on the main thread");
+      markdownWorker = null;
+      worker.terminate();
+      const jobs = [...markdownJobs.values()];
+      markdownJobs.clear();
+      jobs.forEach(job => parseBlocksLocally(job.blocks, job.onBatch));
+    };
+    return worker;
+  } catch (error) {
+    return null;
+  }
+}
+
+// In batches, yielding between them so input stays responsive
+async function parseBlocksLocally(blocks, onBatch) {
+  for (let start = 0; start < blocks.length; start += MARKDOWN_BATCH_BLOCKS) {
+    if (start) await new Promise(resolve => setTimeout(resolve));
+    onBatch(start, blocks.slice(start, start + MARKDOWN_BATCH_BLOCKS).map(renderMarkdown));
+  }
+  if (!blocks.length) onBatch(0, []);
+}
+
+function rememberMarkdown(block, html) {
+  markdownHtml.delete(block);
+  markdownHtml.set(block, html);
+  if (markdownHtml.size > MARKDOWN_CACHE_ENTRIES) {
+    markdownHtml.delete(markdownHtml.keys().next().value);
+  }
+}
+
+// Split Markdown before each # and ## heading outside code blocks, so every
+// flashcard, quiz question or summary section is its own block
+function splitMarkdownBlocks(text) {
+  const blocks = [];
+  let current = [];
+  let fenced = false;
+
+  for (const line of (text || "").split("\n")) {
+    if (/^\s*(```|~~~)/.test(line)) {
+      fenced = !fenced;
+    } else if (!fenced && /^#{1,2}\s/.test(line) && current.some(l => l.trim())) {
+      blocks.push(current.join("\n"));
+      current = [];
+    }
+    current.push(line);
+  }
+  if (current.some(l => l.trim())) blocks.push(current.join("\n"));
+  return blocks;
+}
+
+/**
+ * Render Markdown blocks to HTML, from the memo or the worker.
+ * onReady(start, html) is called in block order as parsed HTML arrives.
+ * Resolves to the HTML of every block.
+ */
+function renderMarkdownBlocks(blocks, onReady = () => {}) {
+  return new Promise(resolve => {
+    const html = blocks.map(block => {
+      const cached = markdownHtml.get(block);
+      if (cached !== undefined) rememberMarkdown(block, cached);
+      return cached;
+    });
+    const missing = [];
+    html.forEach((value, i) => { if (value === undefined) missing.push(i); });
+
+    let emitted = 0;
+    const flush = () => {
+      const start = emitted;
+      while (emitted < html.length && html[emitted] !== undefined) emitted++;
+      if (emitted > start) onReady(start, html.slice(start, emitted));
+      if (emitted === html.length) resolve(html);
+    };
+
+    // Blocks parsed before are shown straight away
+    flush();
+    if (!missing.length) return;
+
+    const missingBlocks = missing.map(i => blocks[i]);
+    const onBatch = (start, parsed) => {
+      parsed.forEach((value, offset) => {
+        const i = missing[start + offset];
+        html[i] = value;
+        rememberMarkdown(blocks[i], value);
+      });
+      flush();
+    };
+
+    if (markdownWorker) {
+      const id = ++nextMarkdownJob;
+      markdownJobs.set(id, { blocks: missingBlocks, onBatch });
+      markdownWorker.postMessage({ id, blocks: missingBlocks });
+    } else {
+      parseBlocksLocally(missingBlocks, onBatch);
+    }
+  });
+}
+
+function renderMarkdownAsync(text) {
+  return renderMarkdownBlocks([text]).then(html => html[0]);
+}
+
+// ==============================
+// VIRTUAL LIST
+// ==============================
+// Keeps only the items near the visible part of a scrolling container in
+// the DOM; the rest are replaced by spacers of their measured (or
+// estimated) height. Used for chat messages and study tool cards.
+function createVirtualList(container, { renderItem, estimatedHeight = 120, overscan = 800 }) {
+  const root = document.createElement("div");
+  const before = document.createElement("div");
+  const body = document.createElement("div");
+  const after = document.createElement("div");
+  root.append(before, body, after);
+
+  let entries = [];
+  const mounted = new Map(); // entry → element
+  let following = false;     // keep the end in view as items grow
+  let userScrolling = false;
+  let frame = 0;
+
+  const resizeObserver = typeof ResizeObserver !== "undefined" ? new ResizeObserver(observed => {
+    let changed = false;
+    observed.forEach(({ target }) => {
+      const entry = target.virtualEntry;
+      const height = target.offsetHeight;
+      // Hidden sections measure 0; keep the last real height
+      if (entry && height && height !== entry.height) {
+        entry.height = height;
+        changed = true;
+      }
+    });
+    if (changed || observed.some(({ target }) => target === container)) {
+      update();
+      if (following) container.scrollTo({ top: container.scrollHeight, behavior: 'smooth' });
+    }
+  }) : null;
+  if (resizeObserver) resizeObserver.observe(container);
+
+  const heightOf = entry => entry.height || estimatedHeight;
+
+  function schedule() {
+    if (!frame) frame = requestAnimationFrame(update);
+  }
+
+  function update() {
+    if (frame) cancelAnimationFrame(frame);
+    frame = 0;
+    if (!root.isConnected) return;
+
+    const listTop = before.getBoundingClientRect().top - container.getBoundingClientRect().top + container.scrollTop;
+    const top = container.scrollTop - listTop - overscan;
+    const bottom = container.scrollTop + container.clientHeight - listTop + overscan;
+
+    let first = 0;
+    let y = 0;
+    while (first < entries.length && y + heightOf(entries[first]) < top) {
+      y += heightOf(entries[first]);
+      first++;
+    }
+    const beforeHeight = y;
+    let last = first;
+    while (last < entries.length && y < bottom) {
+      y += heightOf(entries[last]);
+      last++;
+    }
+    let afterHeight = 0;
+    for (let i = last; i < entries.length; i++) afterHeight += heightOf(entries[i]);
+
+    const visible = new Set(entries.slice(first, last));
+    mounted.forEach((element, entry) => {
+      if (!visible.has(entry)) {
+        if (resizeObserver) resizeObserver.unobserve(element);
+        element.remove();
+        mounted.delete(entry);
+      }
+    });
+
+    let previous = null;
+    visible.forEach(entry => {
+      let element = mounted.get(entry);
+      if (!element) {
+        element = document.createElement("div");
+        // Contains the item's margins, so its height is all of its space
+        element.style.display = "flow-root";
+        element.virtualEntry = entry;
+        element.appendChild(renderItem(entry.item, !entry.shown));
+        entry.shown = true;
+        mounted.set(entry, element);
+        if (resizeObserver) resizeObserver.observe(element);
+      }
+      const expected = previous ? previous.nextSibling : body.firstChild;
+      if (element !== expected) body.insertBefore(element, expected);
+      previous = element;
+    });
+
+    before.style.height = `${beforeHeight}px`;
+    after.style.height = `${afterHeight}px`;
+  }
+
+  container.addEventListener("scroll", () => {
+    if (userScrolling) {
+      following = container.scrollHeight - container.scrollTop - container.clientHeight < 80;
+    }
+    schedule();
+  }, { passive: true });
+  ["wheel", "touchmove", "pointerdown", "keydown"].forEach(type => {
+    container.addEventListener(type, () => { userScrolling = true; }, { passive: true });
+  });
+
+  return {
+    // Put the list in the container, replacing whatever else (a placeholder,
+    // an error message) is shown there
+    show() {
+      if (root.parentNode !== container) {
+        container.textContent = "";
+        container.appendChild(root);
+      }
+    },
+
+    append(items) {
+      if (!items.length) return;
+      this.show();
+      entries = entries.concat(items.map(item => ({ item, height: 0, shown: false })));
+      schedule();
+    },
+
+    // Replace every item; an empty list leaves the container empty
+    reset(items = []) {
+      mounted.forEach(element => resizeObserver && resizeObserver.unobserve(element));
+      mounted.clear();
+      body.textContent = "";
+      entries = [];
+      following = false;
+      userScrolling = false;
+      if (items.length) {
+        container.scrollTop = 0;
+        this.append(items);
+      } else {
+        root.remove();
+      }
+    },
+
+    scrollToEnd() {
+      following = true;
+      userScrolling = false;
+      update();
+      container.scrollTo({ top: container.scrollHeight, behavior: 'smooth' });
+    },
+
+    get length() {
+      return entries.length;
+    }
+  };
+}
+
 // ==============================
 // IMPROVED ERROR HANDLING
 // ==============================
@@ -128,84 +410,359 @@ function downloadText(content, filename) {
 
 
 
+// ==============================
+// LECTURE REFERENCES
+// ==============================
+// The server keeps transcripts by content hash, so requests only carry the
+// lecture_id. The full text is uploaded again only when the server reports
+// that it doesn't know the ID (e.g. after a restart or on another worker).
+let currentLectureId = localStorage.getItem('gaku_lecture_id');
+
+// Identifies this browser's chat memory on the server
+let sessionId = localStorage.getItem('gaku_session_id');
+if (!sessionId) {
+  sessionId = crypto.randomUUID ? crypto.randomUUID() : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+  localStorage.setItem('gaku_session_id', sessionId);
+}
+
+function setLectureId(lectureId) {
+  currentLectureId = lectureId;
+  if (lectureId) {
+    localStorage.setItem('gaku_lecture_id', lectureId);
+  } else {
+    localStorage.removeItem('gaku_lecture_id');
+  }
+}
+
+async function registerTranscript(transcript) {
+  const res = await fetch(`${API}/set_context`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ transcript })
+  });
+  const data = await res.json();
+  if (data.status === "success") {
+    setLectureId(data.lecture_id);
+  }
+  return data;
+}
+
+// POST to a lecture route by reference, re-sending the transcript only if needed
+async function postLecture(path, body = {}) {
+  const transcript = document.getElementById("transcriptBox").value.trim();
+  if (!currentLectureId && transcript) {
+    await registerTranscript(transcript);
+  }
+
+  const send = async () => {
+    const res = await fetch(`${API}${path}`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ ...body, lecture_id: currentLectureId })
+    });
+    return res.json();
+  };
+
+  let data = await send();
+  if (data.unknown_lecture && transcript) {
+    await registerTranscript(transcript);
+    data = await send();
+  }
+  return data;
+}
+
+// ==============================
+// LECTURE CACHE (IndexedDB)
+// ==============================
+// Every lecture opened in this browser is kept with its summary, quiz and
+// flashcards, keyed by the same content hash the server uses as lecture_id.
+// Metadata and content are separate stores, so listing recent lectures
+// never loads the transcripts. Entries are evicted by age, count and the
+// browser's storage quota.
+const LECTURE_DB_NAME = "gaku";
+const LECTURE_DB_VERSION = 1;
+const LECTURE_MAX_AGE_MS = 30 * 24 * 60 * 60 * 1000;  // Unused for 30 days
+const LECTURE_MAX_ENTRIES = 50;
+const LECTURE_QUOTA_SHARE = 0.8;  // Evict once the site uses this share of its quota
+const RESTORE_PROMPT_MAX_AGE_MS = 24 * 60 * 60 * 1000;
+
+let lectureDbPromise = null;
+
+function openLectureDb() {
+  if (!lectureDbPromise) {
+    lectureDbPromise = new Promise(resolve => {
+      if (!window.indexedDB) return resolve(null);
+      const req = indexedDB.open(LECTURE_DB_NAME, LECTURE_DB_VERSION);
+      req.onupgradeneeded = () => {
+        const db = req.result;
+        db.createObjectStore("lectures", { keyPath: "lectureId" }).createIndex("lastUsed", "lastUsed");
+        db.createObjectStore("content", { keyPath: "lectureId" });
+      };
+      req.onsuccess = () => resolve(req.result);
+      // Private browsing or blocked storage: everything still works, uncached
+      req.onerror = () => {
+        console.warn("IndexedDB unavailable:", req.error);
+        resolve(null);
+      };
+    });
+  }
+  return lectureDbPromise;
+}
+
+function idbRequest(request) {
+  return new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+// Run fn(lectures, content) in one transaction; resolves once it commits.
+// fn may only await requests on these stores, or the transaction closes.
+async function lectureTransaction(mode, fn) {
+  const db = await openLectureDb();
+  if (!db) return null;
+
+  const tx = db.transaction(["lectures", "content"], mode);
+  const done = new Promise((resolve, reject) => {
+    tx.oncomplete = resolve;
+    tx.onerror = () => reject(tx.error);
+    tx.onabort = () => reject(tx.error);
+  });
+  const result = await fn(tx.objectStore("lectures"), tx.objectStore("content"));
+  await done;
+  return result;
+}
+
+// Same as LectureStore.lecture_id_for on the server
+async function lectureIdFor(text) {
+  if (!window.crypto || !crypto.subtle) return null;  // Only on https and localhost
+  const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(text));
+  return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, "0")).join("").slice(0, 32);
+}
+
+function lectureTitle(transcript) {
+  const text = (transcript || "").replace(/^\[\d+:\d+\]\s*/, "").trim();
+  return text.length > 60 ? text.slice(0, 57) + "..." : text || "Untitled lecture";
+}
+
+function recordSize(record) {
+  return ["transcript", "summary", "quiz", "flashcards"]
+    .reduce((total, field) => total + (record[field] || "").length * 2, 0);
+}
+
+async function listCachedLectures() {
+  const metas = await lectureTransaction("readonly", lectures =>
+    idbRequest(lectures.index("lastUsed").getAll())
+  );
+  return (metas || []).reverse();  // Most recently used first
+}
+
+async function getCachedLecture(lectureId) {
+  if (!lectureId) return null;
+  const record = await lectureTransaction("readwrite", async (lectures, content) => {
+    const [meta, stored] = await Promise.all([
+      idbRequest(lectures.get(lectureId)),
+      idbRequest(content.get(lectureId))
+    ]);
+    if (!meta || !stored) return null;
+    lectures.put({ ...meta, lastUsed: Date.now() });
+    return stored;
+  });
+
+  // Only trust entries whose text still hashes to the server's lecture_id
+  const hash = record && await lectureIdFor(record.transcript || "");
+  if (record && hash && hash !== lectureId) {
+    console.warn(`Dropping cached lecture ${lectureId}: content doesn't match its hash`);
+    await deleteCachedLectures([lectureId]);
+    return null;
+  }
+  return record;
+}
+
+async function cacheLecture(lectureId, fields) {
+  if (!lectureId) return;
+
+  const write = () => lectureTransaction("readwrite", async (lectures, content) => {
+    const [meta, stored] = await Promise.all([
+      idbRequest(lectures.get(lectureId)),
+      idbRequest(content.get(lectureId))
+    ]);
+    const record = { ...(stored || {}), ...fields, lectureId };
+    const now = Date.now();
+    content.put(record);
+    lectures.put({
+      lectureId,
+      title: lectureTitle(record.transcript),
+      created: meta ? meta.created : now,
+      lastUsed: now,
+      size: recordSize(record),
+      hasSummary: Boolean(record.summary)
+    });
+  });
+
+  try {
+    await write();
+  } catch (error) {
+    if (!error || error.name !== "QuotaExceededError") {
+      console.warn("Could not cache lecture:", error);
+      return;
+    }
+    await evictLectures(recordSize(fields));
+    await write().catch(e => console.warn("Could not cache lecture:", e));
+  }
+  await evictLectures();
+  refreshRecentLectures();
+}
+
+async function deleteCachedLectures(lectureIds) {
+  if (!lectureIds.length) return;
+  await lectureTransaction("readwrite", (lectures, content) => {
+    lectureIds.forEach(id => {
+      lectures.delete(id);
+      content.delete(id);
+    });
+  });
+}
+
+// Drop entries unused for too long, beyond the count limit, or (oldest
+// first) until the site is back under its storage share. The most
+// recently used lecture is always kept.
+async function evictLectures(neededBytes = 0) {
+  const metas = await listCachedLectures();
+  const now = Date.now();
+  const doomed = metas.filter((meta, i) =>
+    i > 0 && (i >= LECTURE_MAX_ENTRIES || now - meta.lastUsed > LECTURE_MAX_AGE_MS)
+  );
+  const kept = metas.filter(meta => !doomed.includes(meta));
+
+  let excess = neededBytes;
+  if (navigator.storage && navigator.storage.estimate) {
+    const { usage, quota } = await navigator.storage.estimate();
+    excess = Math.max(excess, usage + neededBytes - quota * LECTURE_QUOTA_SHARE);
+  }
+  for (const meta of doomed) excess -= meta.size || 0;
+  while (excess > 0 && kept.length > 1) {
+    const oldest = kept.pop();
+    doomed.push(oldest);
+    excess -= oldest.size || 0;
+  }
+
+  if (doomed.length) {
+    await deleteCachedLectures(doomed.map(meta => meta.lectureId));
+    console.log(`🧹 Evicted ${doomed.length} cached lectures`);
+  }
+}
+
 // ==============================
 // SESSION PERSISTENCE
 // ==============================
-function saveToLocalStorage() {
-  const transcript = document.getElementById("transcriptBox").value;
-  const summaryBox = document.getElementById("summaryBox");
-  const summary = summaryBox.textContent || summaryBox.innerText;
-  
-  if (transcript.trim()) {
-    localStorage.setItem('gaku_transcript', transcript);
-    localStorage.setItem('gaku_timestamp', Date.now().toString());
+// Save what is in the transcript box, plus any output generated from it.
+// The key is the hash of the trimmed text, i.e. the lecture_id the server
+// gives it, so edits and restored text never need a round trip.
+async function saveLecture(fields = {}) {
+  const transcript = document.getElementById("transcriptBox").value.trim();
+  if (!transcript) return;
+
+  const lectureId = await lectureIdFor(transcript) || currentLectureId;
+  await cacheLecture(lectureId, { ...fields, transcript });
+}
+
+async function restoreLecture(lectureId) {
+  const record = await getCachedLecture(lectureId);
+  if (!record) return false;
+
+  document.getElementById("transcriptBox").value = record.transcript || "";
+  document.getElementById("summaryBox").innerHTML = record.summary ? renderMarkdown(record.summary) : "";
+  const tool = record.lastTool && record[record.lastTool];
+  showToolOutput(tool);
+
+  // Incremental summaries continue from the notes shown
+  if (record.summary) {
+    localStorage.setItem('gaku_summary_lecture_id', lectureId);
+  } else {
+    localStorage.removeItem('gaku_summary_lecture_id');
   }
-  
-  if (summary.trim()) {
-    localStorage.setItem('gaku_summary', summary);
+
+  setLectureId(lectureId);
+  // Set context for chat (by reference - the text is only re-sent if the server lost it)
+  await postLecture('/set_context');
+  updateChatStatus();
+  return true;
+}
+
+// Older versions kept one lecture in localStorage
+async function migrateLocalStorage() {
+  const transcript = (localStorage.getItem('gaku_transcript') || "").trim();
+  if (transcript) {
+    const lectureId = await lectureIdFor(transcript) || currentLectureId;
+    const summary = localStorage.getItem('gaku_summary');
+    await cacheLecture(lectureId, summary ? { transcript, summary } : { transcript });
   }
+  ['gaku_transcript', 'gaku_summary', 'gaku_timestamp'].forEach(key => localStorage.removeItem(key));
 }
 
-function loadFromLocalStorage() {
-  const transcript = localStorage.getItem('gaku_transcript');
-  const summary = localStorage.getItem('gaku_summary');
-  const timestamp = localStorage.getItem('gaku_timestamp');
-  
-  if (transcript && timestamp) {
-    const hoursSince = (Date.now() - parseInt(timestamp)) / (1000 * 60 * 60);
-    
-    // Only load if less than 24 hours old
-    if (hoursSince < 24) {
-      if (confirm('📚 Found a saved transcript from earlier today. Would you like to restore it?')) {
-        document.getElementById("transcriptBox").value = transcript;
-        
-        if (summary) {
-          document.getElementById("summaryBox").innerHTML = renderMarkdown(summary);
-        }
-        
-        // Set context for chat
-        fetch(`${API}/set_context`, {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ transcript })
-        }).then(() => {
-          updateChatStatus();
-          alert("✅ Previous session restored!");
-        });
+async function restoreLastSession() {
+  await migrateLocalStorage();
+  const [latest] = await listCachedLectures();
+  refreshRecentLectures();
+
+  if (latest && Date.now() - latest.lastUsed < RESTORE_PROMPT_MAX_AGE_MS) {
+    if (confirm('📚 Found a saved transcript from earlier today. Would you like to restore it?')) {
+      if (await restoreLecture(latest.lectureId)) {
+        alert("✅ Previous session restored!");
       }
-    } else {
-      // Clear old data
-      clearLocalStorage();
     }
   }
 }
 
-function clearLocalStorage() {
-  localStorage.removeItem('gaku_transcript');
-  localStorage.removeItem('gaku_summary');
-  localStorage.removeItem('gaku_timestamp');
+async function refreshRecentLectures() {
+  const select = document.getElementById("recentLectures");
+  if (!select) return;
+
+  const metas = await listCachedLectures();
+  select.innerHTML = "";
+  const placeholder = document.createElement("option");
+  placeholder.value = "";
+  placeholder.textContent = metas.length ? `📚 ${metas.length} saved lectures - pick one to reopen` : "No saved lectures yet";
+  select.appendChild(placeholder);
+
+  metas.forEach(meta => {
+    const option = document.createElement("option");
+    option.value = meta.lectureId;
+    const date = new Date(meta.lastUsed).toLocaleDateString();
+    option.textContent = `${date} · ${meta.title}${meta.hasSummary ? " · 📝" : ""}`;
+    select.appendChild(option);
+  });
 }
 
 // Load on page load
 window.addEventListener('DOMContentLoaded', () => {
-  loadFromLocalStorage();
+  restoreLastSession();
 });
 
-// Save whenever transcript or summary changes
 window.addEventListener('load', () => {
-  document.getElementById("transcriptBox").addEventListener('change', saveToLocalStorage);
-  
-  // For the summary div, we'll save after generation (already handled in generateSummary)
-});
+  document.getElementById("transcriptBox").addEventListener('change', () => {
+    // An edited transcript hashes to a different lecture
+    setLectureId(null);
+    saveLecture();
+  });
+
+  document.getElementById("recentLectures").addEventListener('change', async (e) => {
+    const lectureId = e.target.value;
+    if (!lectureId) return;
+    if (!(await restoreLecture(lectureId))) {
+      alert("⚠️ That lecture is no longer saved in this browser.");
+    }
+    refreshRecentLectures();
+  });
 
-// Auto-save every 30 seconds
-setInterval(() => {
-  const transcript = document.getElementById("transcriptBox").value;
-  if (transcript.trim()) {
-    saveToLocalStorage();
-    console.log("📝 Auto-saved transcript");
+  // App shell for offline use; lecture data stays in IndexedDB
+  if ('serviceWorker' in navigator) {
+    navigator.serviceWorker.register('/sw.js').catch(error => {
+      console.warn("Service worker not registered:", error);
+    });
   }
-}, 30000);
+});
 
 // ==============================
 // CHAT STATUS INDICATOR
@@ -282,25 +839,29 @@ async function transcribeAudio() {
   try {
     const formData = new FormData();
     formData.append("file", selectedFile);
+    // The server returns a job to poll when it can take provider webhooks,
+    // otherwise it answers with the transcript as before
+    formData.append("mode", "async");
 
     const res = await fetch(`${API}/transcribe`, {
       method: "POST",
       body: formData
     });
 
-    const data = await res.json();
+    let data = await res.json();
+    if (data.status === "processing" && data.job_id) {
+      disableButton(button, "🔄 Transcribing (uploaded)...");
+      data = await waitForJob(data.job_id);
+    }
 
     if (data.status === "success") {
       document.getElementById("transcriptBox").value = data.text;
 
-      await fetch(`${API}/set_context`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ transcript: data.text })
-      });
+      // The server already set this lecture as chat context
+      setLectureId(data.lecture_id);
 
       updateChatStatus();
-      saveToLocalStorage();
+      saveLecture();
       alert("✅ Transcription completed successfully!");
     } else {
       alert("❌ " + (data.error || "Transcription failed"));
@@ -314,6 +875,17 @@ async function transcribeAudio() {
   }
 }
 
+const JOB_POLL_INTERVAL_MS = 3000;
+
+async function waitForJob(jobId) {
+  while (true) {
+    await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    const res = await fetch(`${API}/jobs/${jobId}`);
+    const data = await res.json();
+    if (data.status !== "processing") return data;
+  }
+}
+
 // create button in UI
 (function initTranscribeButton() {
   const section = document.getElementById("section-upload");
@@ -394,6 +966,159 @@ async function transcribeAudio() {
   console.log("✅ Transcribe button and actions initialized");
 })();
 
+// ==============================
+// 🎙️ LIVE LECTURE → /live (WebSocket)
+// ==============================
+// Streams microphone audio while the lecture happens. Final segments are
+// appended to the transcript with timestamps as they arrive; the newest
+// partial is shown below the button until it is finalised.
+
+const LIVE_MAX_BUFFERED_BYTES = 64 * 1024;  // ~2s of audio waiting on a slow uplink
+
+let liveSession = null;
+
+function liveSocketUrl() {
+  return API.replace(/^http/, 'ws') + '/live';
+}
+
+async function startLiveLecture() {
+  const button = document.querySelector('[data-action="live"]');
+  const status = document.getElementById("liveStatus");
+
+  if (!navigator.mediaDevices || !window.AudioWorkletNode) {
+    alert("❌ Live mode needs microphone access, which this browser doesn't support.");
+    return;
+  }
+
+  const transcriptBox = document.getElementById("transcriptBox");
+  if (transcriptBox.value.trim() && !confirm("Start a new live lecture? The current transcript will be replaced.")) {
+    return;
+  }
+
+  disableButton(button, "⏳ Connecting...");
+
+  try {
+    const stream = await navigator.mediaDevices.getUserMedia({ audio: { channelCount: 1, echoCancellation: true } });
+    const audioContext = new AudioContext();
+    await audioContext.audioWorklet.addModule('/static/pcm_worklet.js');
+    const source = audioContext.createMediaStreamSource(stream);
+    const downsampler = new AudioWorkletNode(audioContext, 'pcm-downsampler');
+
+    const ws = new WebSocket(liveSocketUrl());
+    ws.binaryType = "arraybuffer";
+
+    liveSession = { ws, stream, audioContext, source, downsampler, droppedChunks: 0 };
+    transcriptBox.value = "";
+    setLectureId(null);
+
+    downsampler.port.onmessage = (e) => {
+      if (ws.readyState !== WebSocket.OPEN) return;
+      // Client-side backpressure: skip audio rather than queueing it without bound
+      if (ws.bufferedAmount > LIVE_MAX_BUFFERED_BYTES) {
+        liveSession.droppedChunks++;
+        return;
+      }
+      ws.send(e.data);
+    };
+
+    ws.onmessage = (e) => handleLiveEvent(JSON.parse(e.data));
+    ws.onerror = () => {
+      status.textContent = "❌ Live connection error";
+    };
+    ws.onclose = () => {
+      stopLiveAudio();
+      enableButton(button);
+      button.textContent = "🎙️ Start Live Lecture";
+      button.onclick = startLiveLecture;
+    };
+
+    ws.onopen = () => {
+      source.connect(downsampler);
+      enableButton(button);
+      button.textContent = "⏹️ Stop Live Lecture";
+      button.onclick = stopLiveLecture;
+      status.textContent = "🔴 Listening...";
+    };
+  } catch (error) {
+    enableButton(button);
+    stopLiveAudio();
+    alert("❌ " + getUserFriendlyError(error));
+  }
+}
+
+function handleLiveEvent(event) {
+  const status = document.getElementById("liveStatus");
+  const transcriptBox = document.getElementById("transcriptBox");
+
+  if (event.type === "partial") {
+    status.textContent = "🔴 " + event.text;
+  } else if (event.type === "final") {
+    transcriptBox.value += `[${formatLiveTime(event.start)}] ${event.text}\n`;
+    transcriptBox.scrollTop = transcriptBox.scrollHeight;
+    // At checkpoints the server stores the grown transcript under a new ID.
+    // In between, requests use the last checkpoint rather than uploading the
+    // whole transcript again (the newest few segments wait for the next one)
+    if (event.lecture_id) setLectureId(event.lecture_id);
+    status.textContent = "🔴 Listening...";
+    updateChatStatus();
+  } else if (event.type === "backpressure") {
+    status.textContent = `⚠️ Connection is slow - skipped ${(event.dropped_ms / 1000).toFixed(1)}s of audio`;
+  } else if (event.type === "error") {
+    status.textContent = "❌ " + event.error;
+  } else if (event.type === "done") {
+    transcriptBox.value = event.transcript ? event.transcript + "\n" : transcriptBox.value;
+    if (event.lecture_id) setLectureId(event.lecture_id);
+    status.textContent = "✅ Live lecture saved";
+    saveLecture();
+    liveSession && liveSession.ws.close();
+  }
+}
+
+function formatLiveTime(ms) {
+  const seconds = Math.floor(ms / 1000);
+  const minutes = Math.floor(seconds / 60);
+  return `${String(minutes).padStart(2, '0')}:${String(seconds % 60).padStart(2, '0')}`;
+}
+
+function stopLiveAudio() {
+  if (!liveSession || liveSession.audioStopped) return;
+  liveSession.audioStopped = true;
+  liveSession.stream.getTracks().forEach(track => track.stop());
+  liveSession.audioContext.close();
+  if (liveSession.droppedChunks) {
+    console.log(`⚠️ Live mode skipped ${liveSession.droppedChunks} chunks on a slow uplink`);
+  }
+}
+
+function stopLiveLecture() {
+  if (!liveSession) return;
+  const button = document.querySelector('[data-action="live"]');
+  disableButton(button, "⏳ Finishing...");
+  stopLiveAudio();
+  liveSession.ws.send(JSON.stringify({ type: "stop" }));
+}
+
+(function initLiveButton() {
+  const transcribeBtn = document.querySelector('[data-action="transcribe"]');
+  if (!transcribeBtn) return;
+
+  const btn = document.createElement("button");
+  btn.className = "btn-primary";
+  btn.textContent = "🎙️ Start Live Lecture";
+  btn.dataset.action = "live";
+  btn.style.marginTop = "16px";
+  btn.style.marginBottom = "12px";
+  btn.style.marginLeft = "12px";
+  btn.onclick = startLiveLecture;
+
+  const status = document.createElement("p");
+  status.id = "liveStatus";
+  status.className = "info-text";
+
+  transcribeBtn.insertAdjacentElement("afterend", btn);
+  btn.insertAdjacentElement("afterend", status);
+})();
+
 // ==============================
 // 2️⃣ SUMMARY → /summary
 // ==============================
@@ -407,18 +1132,42 @@ async function generateSummary() {
   showLoader("summaryLoader");
 
   try {
-    const res = await fetch(`${API}/summary`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ text })
-    });
+    if (!currentLectureId) {
+      await registerTranscript(text);
+    }
 
-    const data = await res.json();
+    // The lecture the current notes were made from; if this transcript grew
+    // from it, the server only summarises the new part
+    // During a live lecture a short new tail waits for more text
+    const summary = postLecture('/summary', {
+      base_lecture_id: localStorage.getItem('gaku_summary_lecture_id'),
+      growing: Boolean(liveSession && !liveSession.audioStopped)
+    });
 
-    if (data.status === "success") {
+    // Key sentences picked locally on the server, shown until the notes arrive
+    let finished = false;
+    postLecture('/summary/preview').then(preview => {
+      if (!finished && preview.status === "success") {
+        document.getElementById("summaryBox").innerHTML = renderMarkdown(preview.summary);
+      }
+    }).catch(() => {});
+
+    const data = await summary;
+    finished = true;
+
+    if (data.status === "success" && data.degraded) {
+      // Not the real notes, so not saved as the base for the next summary
+      document.getElementById("summaryBox").innerHTML = renderMarkdown(data.summary);
+      alert("⚠️ The AI summary isn't available right now, showing key sentences from the transcript instead.");
+    } else if (data.status === "success") {
+      // Notes that leave out a short new tail keep the old base, so the
+      // next summary picks the tail up
+      if (!data.pending_chars) {
+        localStorage.setItem('gaku_summary_lecture_id', currentLectureId);
+      }
       const summaryBox = document.getElementById("summaryBox");
       summaryBox.innerHTML = renderMarkdown(data.summary);
-      saveToLocalStorage();
+      saveLecture({ summary: data.summary });
       alert("✅ Summary generated successfully!");
     } else {
       alert("Error: " + data.error);
@@ -506,17 +1255,38 @@ const chatLoader = document.getElementById("chatLoader");
 
 let isChatting = false;
 
+// Messages are { type, text, time, html }; html is the parsed Markdown of
+// an AI answer, kept so messages scrolled back into view are not parsed again
+let chatList = null;
+// Messages are shown in order even when an answer takes longer to parse
+let chatRendering = Promise.resolve();
+
 function initChat() {
   chatMessages.innerHTML = '<p style="color: #9ca3af; text-align: center; font-size: 0.9rem;">Start a conversation with Gaku...</p>';
+  chatList = createVirtualList(chatMessages, { renderItem: renderChatMessage, estimatedHeight: 90 });
 }
 
 function addMessage(text, type) {
   if (chatMessages.querySelector('p[style*="color: #9ca3af"]')) {
-    chatMessages.innerHTML = '';
+    chatList.show();
   }
 
+  const message = { type, text, time: getTimestamp(), html: null };
+
+  // Render markdown for AI messages, plain text for user messages
+  const html = type === 'ai' ? renderMarkdownAsync(text) : null;
+  chatRendering = chatRendering.then(() => html).then(parsed => {
+    message.html = parsed;
+    chatList.append([message]);
+    chatList.scrollToEnd();
+  }).catch(error => console.error("❌ Could not show message:", error));
+}
+
+function renderChatMessage(message, fresh) {
   const messageDiv = document.createElement('div');
-  messageDiv.className = `chat-message ${type}`;
+  messageDiv.className = `chat-message ${message.type}`;
+  // Only slide in when first shown, not when scrolled back into view
+  if (!fresh) messageDiv.style.animation = 'none';
   
   // Create header with name and timestamp
   const headerDiv = document.createElement('div');
@@ -524,33 +1294,27 @@ function addMessage(text, type) {
   
   const label = document.createElement('div');
   label.className = 'message-label';
-  label.textContent = type === 'user' ? 'You' : 'Gaku AI';
+  label.textContent = message.type === 'user' ? 'You' : 'Gaku AI';
   
   const timestamp = document.createElement('span');
   timestamp.style.cssText = 'font-size: 0.7rem; color: #9ca3af; font-weight: 400;';
-  timestamp.textContent = getTimestamp();
+  timestamp.textContent = message.time;
   
   headerDiv.appendChild(label);
   headerDiv.appendChild(timestamp);
   
   const bubble = document.createElement('div');
-  bubble.className = `message-bubble ${type}`;
+  bubble.className = `message-bubble ${message.type}`;
   
-  // Render markdown for AI messages, plain text for user messages
-  if (type === 'ai') {
-    bubble.innerHTML = renderMarkdown(text);
+  if (message.html !== null) {
+    bubble.innerHTML = message.html;
   } else {
-    bubble.textContent = text;
+    bubble.textContent = message.text;
   }
   
   messageDiv.appendChild(headerDiv);
   messageDiv.appendChild(bubble);
-  chatMessages.appendChild(messageDiv);
-  
-  chatMessages.scrollTo({
-    top: chatMessages.scrollHeight,
-    behavior: 'smooth'
-  });
+  return messageDiv;
 }
 
 function getTimestamp() {
@@ -627,13 +1391,7 @@ async function sendChatMessage() {
   showLoader("chatLoader");
 
   try {
-    const res = await fetch(`${API}/chat`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ question })
-    });
-
-    const data = await res.json();
+    const data = await postLecture('/chat', { question, session_id: sessionId });
 
     removeTypingIndicator();
 
@@ -680,6 +1438,38 @@ initChat();
 // 4️⃣ STUDY TOOLS
 // ==============================
 
+// Quizzes and decks are shown a question or card per list item, so only the
+// ones in view are in the DOM
+const toolsBox = document.getElementById("toolsBox");
+const toolsList = createVirtualList(toolsBox, {
+  renderItem: (card) => {
+    const div = document.createElement("div");
+    div.innerHTML = card.html;
+    return div;
+  },
+  estimatedHeight: 260
+});
+let toolsRendering = 0;
+
+function showToolOutput(markdown) {
+  const rendering = ++toolsRendering;
+  toolsList.reset();
+  toolsBox.textContent = "";
+  if (!markdown) return Promise.resolve();
+
+  // Cards are listed as they are parsed; a newer output replaces them
+  return renderMarkdownBlocks(splitMarkdownBlocks(markdown), (start, html) => {
+    if (rendering === toolsRendering) {
+      toolsList.append(html.map(cardHtml => ({ html: cardHtml })));
+    }
+  });
+}
+
+function showToolMessage(text) {
+  showToolOutput(null);
+  toolsBox.textContent = text;
+}
+
 async function generateQuiz() {
   const transcriptBox = document.getElementById("transcriptBox");
   if (!transcriptBox.value.trim()) {
@@ -711,23 +1501,19 @@ async function generateQuiz() {
 
 
   try {
-    const res = await fetch(`${API}/quiz`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ num_questions: num })
-    });
-
-    const data = await res.json();
+    const data = await postLecture('/quiz', { num_questions: num });
     
     if (data.questions) {
-      document.getElementById("toolsBox").innerHTML = renderMarkdown(convertQuizToMarkdown(data.questions));
+      const quiz = convertQuizToMarkdown(data.questions);
+      showToolOutput(quiz);
+      saveLecture({ quiz, lastTool: "quiz" });
 
       alert("✅ Quiz generated successfully!");
     } else {
-      document.getElementById("toolsBox").textContent = data.error || "Failed to generate quiz";
+      showToolMessage(data.error || "Failed to generate quiz");
     }
   } catch (error) {
-    document.getElementById("toolsBox").textContent = "❌ Error: " + error.message;
+    showToolMessage("❌ Error: " + error.message);
   } finally {
     enableButton(button);
     hideLoader("quizLoader");
@@ -749,22 +1535,17 @@ async function generateFlashcards() {
   showLoader("flashcardsLoader");
 
   try {
-    const res = await fetch(`${API}/flashcards`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ num_questions: num })
-    });
-
-    const data = await res.json();
+    const data = await postLecture('/flashcards', { num_questions: num });
     
     if (data.status === "success" && data.flashcards) {
-      document.getElementById("toolsBox").innerHTML = renderMarkdown(data.flashcards);
+      showToolOutput(data.flashcards);
+      saveLecture({ flashcards: data.flashcards, lastTool: "flashcards" });
       alert("✅ Flashcards generated successfully!");
     } else {
-      document.getElementById("toolsBox").textContent = data.error || "Failed to generate flashcards";
+      showToolMessage(data.error || "Failed to generate flashcards");
     }
   } catch (error) {
-    document.getElementById("toolsBox").textContent = "❌ Error: " + error.message;
+    showToolMessage("❌ Error: " + error.message);
   } finally {
     enableButton(button);
     hideLoader("flashcardsLoader");
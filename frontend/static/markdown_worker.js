@@ -0,0 +1,30 @@
+// @ts-nocheck
+// ==============================
+// MARKDOWN WORKER
+// ==============================
+// Parses Markdown off the main thread. app.js sends a job as a list of
+// blocks (one per chat message, card or section) and gets the HTML back in
+// batches, so the first cards of a long deck show while the rest are parsed.
+
+importScripts("https://cdn.jsdelivr.net/npm/marked/marked.min.js");
+
+marked.setOptions({
+  breaks: true,
+  gfm: true
+});
+
+const BATCH_BLOCKS = 8;
+
+self.onmessage = (event) => {
+  const { id, blocks } = event.data;
+
+  if (!blocks.length) {
+    self.postMessage({ id, start: 0, html: [], done: true });
+    return;
+  }
+
+  for (let start = 0; start < blocks.length; start += BATCH_BLOCKS) {
+    const html = blocks.slice(start, start + BATCH_BLOCKS).map(block => marked.parse(block));
+    self.postMessage({ id, start, html, done: start + BATCH_BLOCKS >= blocks.length });
+  }
+};
@@ -0,0 +1,39 @@
+// @ts-nocheck
+// ==============================
+// LIVE MODE: MICROPHONE → 16 kHz PCM16
+// ==============================
+// Runs on the audio thread. Downsamples the microphone input and posts
+// 100ms chunks of 16-bit mono PCM, the format the /live socket expects.
+
+const TARGET_RATE = 16000;
+const CHUNK_SAMPLES = TARGET_RATE / 10;
+
+class PcmDownsampler extends AudioWorkletProcessor {
+  constructor() {
+    super();
+    this.ratio = sampleRate / TARGET_RATE;
+    this.position = 0;
+    this.buffer = new Int16Array(CHUNK_SAMPLES);
+    this.length = 0;
+  }
+
+  process(inputs) {
+    const input = inputs[0] && inputs[0][0];
+    if (!input) return true;
+
+    for (; this.position < input.length; this.position += this.ratio) {
+      const sample = Math.max(-1, Math.min(1, input[Math.floor(this.position)]));
+      this.buffer[this.length++] = sample < 0 ? sample * 0x8000 : sample * 0x7fff;
+
+      if (this.length === CHUNK_SAMPLES) {
+        this.port.postMessage(this.buffer.buffer, [this.buffer.buffer]);
+        this.buffer = new Int16Array(CHUNK_SAMPLES);
+        this.length = 0;
+      }
+    }
+    this.position -= input.length;
+    return true;
+  }
+}
+
+registerProcessor('pcm-downsampler', PcmDownsampler);
@@ -0,0 +1,95 @@
+// ==============================
+// GAKU SERVICE WORKER
+// ==============================
+// Caches the app shell so the page opens offline and fingerprinted assets
+// load without touching the network. Lecture data lives in IndexedDB (see app.js) and API
+// requests always go to the network.
+//
+// Served from /sw.js, never fingerprinted: the browser looks for updates at
+// this URL. `python -m backend.assets` rewrites the URLs below to the
+// fingerprinted build and sets SHELL_VERSION to the build's hash.
+
+const SHELL_VERSION = "dev";
+const SHELL_CACHE = `gaku-shell-${SHELL_VERSION}`;
+const RUNTIME_CACHE = "gaku-runtime";
+
+const SHELL_URLS = [
+  "/",
+  "/static/app.js",
+  "/static/pcm_worklet.js",
+  "/static/markdown_worker.js",
+  "/gaku_logo.png",
+  "/gaku_background.png",
+];
+
+// Third-party scripts and fonts the page loads, cached as they are fetched
+const RUNTIME_HOSTS = ["cdn.jsdelivr.net", "fonts.googleapis.com", "fonts.gstatic.com"];
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    caches.open(SHELL_CACHE)
+      .then(cache => cache.addAll(SHELL_URLS))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener("activate", (event) => {
+  // Drop shells of earlier builds
+  event.waitUntil(
+    caches.keys()
+      .then(keys => Promise.all(
+        keys.filter(key => key.startsWith("gaku-shell-") && key !== SHELL_CACHE).map(key => caches.delete(key))
+      ))
+      .then(() => self.clients.claim())
+  );
+});
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  if (request.method !== "GET") return;
+
+  const url = new URL(request.url);
+
+  if (url.origin === self.location.origin) {
+    if (url.pathname.startsWith("/assets/")) {
+      // Fingerprinted build files never change
+      event.respondWith(
+        caches.match(request).then(cached => cached || fetch(request))
+      );
+    } else if (request.mode === "navigate" || SHELL_URLS.includes(url.pathname)) {
+      // Network first so a new version shows up at once, the cached copy offline
+      const key = request.mode === "navigate" ? "/" : request;
+      event.respondWith(
+        fetch(request)
+          .then(response => {
+            if (response.ok) {
+              const copy = response.clone();
+              caches.open(SHELL_CACHE).then(cache => cache.put(key, copy));
+            }
+            return response;
+          })
+          .catch(() => caches.match(key))
+      );
+    }
+    // Anything else (the API, webhooks, job status) is left to the network
+    return;
+  }
+
+  if (RUNTIME_HOSTS.includes(url.hostname)) {
+    // Stale-while-revalidate
+    event.respondWith(
+      caches.open(RUNTIME_CACHE).then(cache =>
+        cache.match(request).then(cached => {
+          const network = fetch(request)
+            .then(response => {
+              // Opaque (no-cors) responses have status 0 but are still usable
+              if (response.ok || response.type === "opaque") cache.put(request, response.clone());
+              return response;
+            })
+            .catch(() => cached);
+          return cached || network;
+        })
+      )
+    );
+  }
+});
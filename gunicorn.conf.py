@@ -0,0 +1,40 @@
+# Gunicorn settings, picked up automatically by `gunicorn backend.api:app`
+# (see Procfile). Workers count still comes from WEB_CONCURRENCY.
+import os
+
+# Import the app (and the provider SDKs) once in the master so workers
+# fork with them already loaded instead of each importing them again.
+preload_app = True
+
+# Live lecture mode holds a WebSocket open per student, so each worker
+# serves requests from a thread pool instead of one at a time. Request
+# handlers share the provider clients, which keep no per-request state.
+worker_class = "gthread"
+threads = int(os.getenv("GAKU_THREADS", 16))
+
+# A live lecture occupies one of those threads until it ends. Each worker
+# accepts at most GAKU_MAX_LIVE_SESSIONS of them (default half the threads)
+# and turns further ones away, so HTTP requests always have threads left.
+# Capacity for live students is workers x GAKU_MAX_LIVE_SESSIONS; raise
+# GAKU_THREADS with it.
+
+# Set GAKU_EAGER_PROVIDERS=1 to create provider clients when a worker
+# boots rather than on its first request.
+EAGER_PROVIDERS = os.getenv("GAKU_EAGER_PROVIDERS") == "1"
+
+
+def when_ready(server):
+    from backend.api import warm_up
+    warm_up()
+
+
+def post_fork(server, worker):
+    # Client connections must never be shared across a fork
+    from backend.api import providers
+    providers.reset()
+
+
+def post_worker_init(worker):
+    if EAGER_PROVIDERS:
+        from backend.api import warm_up
+        warm_up(create_clients=True)
@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The API module reads its settings at import time: run it against the fake
+# providers and a throwaway data directory
+os.environ.setdefault('GAKU_FAKE_PROVIDERS', '1')
+os.environ.setdefault('GEMINI_API_KEY', 'test')
+os.environ.setdefault('GAKU_FAKE_TIME_SCALE', '0.01')
+os.environ.setdefault('GAKU_FAKE_ERROR_RATE', '0')
+os.environ.setdefault('GAKU_FAKE_RPM', '0')
+os.environ.setdefault('GAKU_DATA_DIR', tempfile.mkdtemp(prefix='gaku-tests-'))
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,51 @@
+import pytest
+
+from backend.answer_cache import AnswerCache, cosine, question_vector
+
+LECTURE = 'a' * 32
+
+REPHRASINGS = [
+    ("What is the TCP handshake?", "what's a TCP handshake"),
+    ("What is a hypervisor?", "what are hypervisors?"),
+    ("Explain the difference between a process and a thread",
+     "explain the difference between processes and threads"),
+    ("Why do we need virtual memory?", "why do we need virtual memory"),
+]
+
+DIFFERENT_QUESTIONS = [
+    ("What is recursion?", "What is not recursion?"),
+    ("When should I use recursion?", "When should I not use recursion?"),
+    ("Why is TCP reliable?", "Why isn't TCP reliable?"),
+    ("Is a VM faster than a container?", "Is a container faster than a VM?"),
+    ("Does the client send SYN to the server?", "Does the server send SYN to the client?"),
+    ("What is a TCP handshake?", "Why is a TCP handshake needed?"),
+]
+
+
+@pytest.mark.parametrize("asked, rephrased", REPHRASINGS)
+def test_rephrased_question_hits(asked, rephrased):
+    cache = AnswerCache(threshold=0.9)
+    cache.store(LECTURE, asked, "answer")
+    assert cache.lookup(LECTURE, rephrased)["answer"] == "answer"
+
+
+@pytest.mark.parametrize("asked, other", DIFFERENT_QUESTIONS)
+def test_different_question_misses(asked, other):
+    cache = AnswerCache(threshold=0.9)
+    cache.store(LECTURE, asked, "answer")
+    assert cache.lookup(LECTURE, other) is None
+    assert cosine(question_vector(asked), question_vector(other)) < 0.9
+
+
+def test_negation_must_match_even_at_low_threshold():
+    cache = AnswerCache(threshold=0.5)
+    cache.store(LECTURE, "What is recursion?", "answer")
+    assert cache.lookup(LECTURE, "What is not recursion?") is None
+
+
+def test_answers_are_per_lecture_and_follow_ups_skipped():
+    cache = AnswerCache(threshold=0.9)
+    cache.store(LECTURE, "What is paging?", "answer")
+    assert cache.lookup('b' * 32, "What is paging?") is None
+    assert cache.lookup(LECTURE, "Can you explain that again?") is None
+    assert cache.stats()['skipped_follow_ups'] == 1
@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import shutil
+
+import pytest
+
+from backend import assets
+
+
+@pytest.fixture
+def manifest_path(tmp_path, monkeypatch):
+    path = tmp_path / 'manifest.json'
+    monkeypatch.setattr(assets, 'MANIFEST_PATH', path)
+    assets._read_manifest.cache_clear()
+    yield path
+    assets._read_manifest.cache_clear()
+
+
+def write_manifest(path, index_etag, mtime):
+    path.write_text(json.dumps({'assets': {}, 'index_etag': index_etag, 'service_worker_etag': 'sw'}))
+    os.utime(path, (mtime, mtime))
+
+
+def test_build_made_after_startup_is_served(manifest_path):
+    assert assets.load_manifest() is None
+
+    write_manifest(manifest_path, 'first', 1000)
+    assert assets.load_manifest()['index_etag'] == 'first'
+
+
+def test_rebuild_replaces_cached_manifest(manifest_path):
+    write_manifest(manifest_path, 'first', 1000)
+    assert assets.load_manifest()['index_etag'] == 'first'
+
+    write_manifest(manifest_path, 'second', 2000)
+    assert assets.load_manifest()['index_etag'] == 'second'
+
+    manifest_path.unlink()
+    assert assets.load_manifest() is None
+
+
+@pytest.fixture
+def frontend(tmp_path, monkeypatch):
+    """A copy of the frontend sources that the test can edit"""
+    # Image and brotli encoding are slow and don't affect which files are kept
+    monkeypatch.setattr(assets, 'Image', None)
+    monkeypatch.setattr(assets, 'brotli', None)
+    source = tmp_path / 'frontend'
+    for name, _ in assets.ASSETS + [('index.html', None), (assets.SERVICE_WORKER, None)]:
+        (source / name).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(assets.FRONTEND_DIR / name, source / name)
+    return source
+
+
+def build_version(frontend, dist, version):
+    app_js = frontend / 'static' / 'app.js'
+    app_js.write_text(app_js.read_text(encoding='utf-8') + f'\n// build {version}\n', encoding='utf-8')
+    manifest = assets.build(frontend, dist)
+    return manifest['assets']['/static/app.js'][len(assets.ASSETS_URL_PREFIX):]
+
+
+def test_rebuild_keeps_assets_of_recent_builds(frontend, tmp_path):
+    dist = tmp_path / 'dist'
+    names = [build_version(frontend, dist, version) for version in range(assets.KEEP_BUILDS + 1)]
+
+    kept = {path.name for path in (dist / 'assets').iterdir()}
+    # Clients still on the last few index.html / sw.js versions can load their files
+    for name in names[1:]:
+        assert {name, f'{name}.gz'} <= kept
+    # Older builds are pruned, with their compressed variants
+    assert not any(path.startswith(names[0]) for path in kept)
+    # Unchanged assets are shared by every build
+    logo = json.loads((dist / 'manifest.json').read_text())['assets']['/gaku_logo.png']
+    assert logo.split('/')[-1] in kept
+    assert not list(dist.rglob('*.tmp'))
+
+
+def test_service_worker_is_served_raw_without_a_build(manifest_path):
+    from backend import api
+
+    response = api.app.test_client().get('/sw.js')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert 'const SHELL_VERSION = "dev";' in response.get_data(as_text=True)
+
+
+def test_build_points_service_worker_at_fingerprinted_shell(frontend, tmp_path):
+    manifest = assets.build(frontend, tmp_path / 'dist')
+
+    worker = (tmp_path / 'dist' / assets.SERVICE_WORKER).read_text(encoding='utf-8')
+    assert f'const SHELL_VERSION = "{manifest["index_etag"]}";' in worker
+    for original_url, hashed_url in manifest['assets'].items():
+        assert f'"{original_url}"' not in worker
+    assert f'"{manifest["assets"]["/static/app.js"]}"' in worker
+    # The page itself keeps its URL
+    assert '  "/",' in worker
+
+
+def test_shell_version_changes_with_any_asset(frontend, tmp_path):
+    dist = tmp_path / 'dist'
+    versions = []
+    for version in (1, 2):
+        build_version(frontend, dist, version)
+        worker = (dist / assets.SERVICE_WORKER).read_text(encoding='utf-8')
+        versions.append(re.search(r'const SHELL_VERSION = "(\w+)";', worker).group(1))
+
+    assert 'dev' not in versions
+    assert versions[0] != versions[1]
+
+
+def test_built_service_worker_is_revalidated(frontend, tmp_path, manifest_path, monkeypatch):
+    from backend import api
+
+    dist = manifest_path.parent
+    manifest = assets.build(frontend, dist)
+    monkeypatch.setattr(assets, 'DIST_DIR', dist)
+    client = api.app.test_client()
+
+    response = client.get('/sw.js', headers={'Accept-Encoding': 'identity'})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert response.get_data() == (dist / assets.SERVICE_WORKER).read_bytes()
+    assert response.headers['ETag'] == f'"{manifest["service_worker_etag"]}"'
+
+    again = client.get('/sw.js', headers={'Accept-Encoding': 'identity', 'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_markdown_worker_is_fingerprinted_and_referenced(frontend, tmp_path):
+    dist = tmp_path / 'dist'
+    manifest = assets.build(frontend, dist)
+
+    worker_url = manifest['assets']['/static/markdown_worker.js']
+    assert worker_url.startswith(assets.ASSETS_URL_PREFIX)
+    worker_name = worker_url[len(assets.ASSETS_URL_PREFIX):]
+    assert (dist / 'assets' / worker_name).read_bytes() == (frontend / 'static' / 'markdown_worker.js').read_bytes()
+
+    # app.js starts the worker by URL, so it must load the fingerprinted copy
+    app_name = manifest['assets']['/static/app.js'][len(assets.ASSETS_URL_PREFIX):]
+    app_js = (dist / 'assets' / app_name).read_text(encoding='utf-8')
+    assert f"new Worker('{worker_url}')" in app_js
+    assert '/static/markdown_worker.js' not in app_js
+
+    # and the service worker caches it with the rest of the shell
+    shell = (dist / assets.SERVICE_WORKER).read_text(encoding='utf-8')
+    assert f'"{worker_url}"' in shell
+
+
+def test_changing_the_markdown_worker_changes_app_js(frontend, tmp_path):
+    first = assets.build(frontend, tmp_path / 'first')['assets']
+
+    worker = frontend / 'static' / 'markdown_worker.js'
+    worker.write_text(worker.read_text(encoding='utf-8') + '\n// edited\n', encoding='utf-8')
+    second = assets.build(frontend, tmp_path / 'second')['assets']
+
+    assert first['/static/markdown_worker.js'] != second['/static/markdown_worker.js']
+    # A cached app.js would otherwise keep starting the old worker
+    assert first['/static/app.js'] != second['/static/app.js']
+
+
+def test_markdown_worker_is_served_without_a_build(manifest_path):
+    from backend import api
+
+    response = api.app.test_client().get('/static/markdown_worker.js')
+    assert response.status_code == 200
+    assert 'javascript' in response.mimetype
+    assert b'self.onmessage' in response.get_data()
@@ -0,0 +1,71 @@
+import threading
+
+from backend.api import app, lectures, providers
+from backend.fakes import FakeResponse
+
+LECTURE_A = "Today we cover the TCP handshake. A client sends SYN and the server answers with SYN-ACK."
+LECTURE_B = "Today we cover photosynthesis. Chlorophyll absorbs light in the light reactions."
+
+
+def test_concurrent_chats_keep_their_own_lecture(monkeypatch):
+    chatbot = providers.get("chatbot")
+    lecture_a = lectures.add(LECTURE_A)
+    lecture_b = lectures.add(LECTURE_B)
+
+    # Both requests are inside the model call at the same time
+    barrier = threading.Barrier(2, timeout=10)
+
+    def generate(operation, prompt, prefix=None):
+        barrier.wait()
+        lecture = "TCP" if "TCP handshake" in prefix else "photosynthesis"
+        return FakeResponse(f"This is about {lecture}.")
+
+    monkeypatch.setattr(chatbot.router, "generate", generate)
+
+    answers = {}
+
+    def ask(lecture_id):
+        with app.test_client() as client:
+            response = client.post("/chat", json={
+                "question": "What is this lecture about?",
+                "lecture_id": lecture_id,
+                "session_id": "concurrency-test"
+            })
+            answers[lecture_id] = response.get_json()["answer"]
+
+    threads = [threading.Thread(target=ask, args=(lecture_id,)) for lecture_id in (lecture_a, lecture_b)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert answers[lecture_a] == "This is about TCP."
+    assert answers[lecture_b] == "This is about photosynthesis."
+    assert chatbot.answers.lookup(lecture_a, "What is this lecture about?")["answer"] == answers[lecture_a]
+    assert chatbot.answers.lookup(lecture_b, "What is this lecture about?")["answer"] == answers[lecture_b]
+    history_a = chatbot.memory.get(f"{lecture_a}:concurrency-test").render()
+    assert "TCP" in history_a and "photosynthesis" not in history_a
+
+
+def test_unknown_lecture_is_reported():
+    with app.test_client() as client:
+        response = client.post("/quiz", json={"lecture_id": "0" * 32})
+    assert response.status_code == 404
+    assert response.get_json()["unknown_lecture"] is True
+
+
+def test_chat_prompt_keeps_tutor_persona_after_shared_prefix(monkeypatch):
+    chatbot = providers.get("chatbot")
+    prompts = []
+
+    def generate(operation, prompt, prefix=None):
+        prompts.append((prompt, prefix))
+        return FakeResponse("An answer.")
+
+    monkeypatch.setattr(chatbot.router, "generate", generate)
+    chatbot.ask_question("Why does the server answer with SYN-ACK?", LECTURE_A, lectures.add(LECTURE_A), "persona-test")
+
+    prompt, prefix = prompts[0]
+    assert LECTURE_A in prefix and LECTURE_A not in prompt
+    assert prompt.lstrip().startswith("You are Gaku, a helpful AI tutor")
+    assert prompt.index("STUDENT'S QUESTION") < prompt.index("INSTRUCTIONS")
@@ -0,0 +1,115 @@
+import pytest
+
+from backend.concepts import ConceptIndex, ConceptIndexCache, concept_cache_key, normalize_concept
+
+TRANSCRIPT = (
+    "Today we look at how connections start. "
+    "A TCP handshake takes three messages: SYN, SYN-ACK and ACK. "
+    "The client picks a sequence number first. "
+    "Routing tables are a separate topic for next week. "
+    "After the handshakes, both sides can send data. "
+    "UDP skips all of this."
+)
+
+
+@pytest.mark.parametrize('name', [
+    'TCP handshake',
+    'tcp handshake',
+    'the TCP handshakes',
+    '  The  Tcp   Handshakes ',
+])
+def test_spellings_of_a_concept_share_one_key(name):
+    assert normalize_concept(name) == 'tcp handshake'
+    assert concept_cache_key(name) == concept_cache_key('TCP handshake')
+
+
+def test_abbreviations_are_expanded():
+    assert normalize_concept('OS scheduling') == normalize_concept('operating system scheduling')
+    assert normalize_concept('DB indexes') == 'database index'
+
+
+def test_different_concepts_get_different_keys():
+    assert concept_cache_key('TCP handshake') != concept_cache_key('UDP handshake')
+    assert len(concept_cache_key('TCP handshake')) == 16
+
+
+def test_excerpts_contain_the_matching_passage_with_context():
+    index = ConceptIndex(TRANSCRIPT)
+
+    excerpts = index.excerpts('the tcp handshakes')
+    assert excerpts
+    assert 'A TCP handshake takes three messages' in excerpts[0]
+    # One sentence either side for context
+    assert 'how connections start' in excerpts[0]
+    assert 'sequence number' in excerpts[0]
+    assert all('UDP skips' not in excerpt for excerpt in excerpts)
+
+
+def test_spans_point_into_the_transcript():
+    index = ConceptIndex(TRANSCRIPT)
+
+    for span in index.lookup('routing table')['spans']:
+        assert TRANSCRIPT[span['start']:span['end']].strip() == span['text']
+    assert index.lookup('Routing Tables')['key'] == 'routing table'
+
+
+def test_unknown_concept_has_no_excerpts():
+    assert ConceptIndex(TRANSCRIPT).excerpts('quantum entanglement') == []
+
+
+def test_terms_from_the_notes_come_first():
+    index = ConceptIndex(TRANSCRIPT, terms=['Routing tables', 'Not in this lecture'])
+
+    terms = index.terms()
+    assert terms[0] == 'Routing tables'
+    assert 'Not in this lecture' not in terms
+
+
+def test_index_cache_rebuilds_when_notes_add_terms():
+    cache = ConceptIndexCache(max_cached=1)
+
+    first = cache.get('lecture', TRANSCRIPT)
+    assert cache.get('lecture', TRANSCRIPT) is first
+    with_notes = cache.get('lecture', TRANSCRIPT, ['TCP handshake'])
+    assert with_notes is not first
+    assert cache.get('lecture', TRANSCRIPT) is with_notes
+
+    cache.get('other lecture', TRANSCRIPT)
+    assert cache.get('lecture', TRANSCRIPT) is not with_notes
+
+
+def test_explain_batch_reuses_explanations_across_spellings(monkeypatch):
+    from backend import api
+
+    chatbot = api.providers.get('chatbot')
+    calls = []
+    explain_concept = chatbot.explain_concept
+
+    def counting_explain(concept, *args):
+        calls.append(concept)
+        return explain_concept(concept, *args)
+    monkeypatch.setattr(chatbot, 'explain_concept', counting_explain)
+
+    client = api.app.test_client()
+    response = client.post('/explain', json={
+        'transcript': TRANSCRIPT,
+        'concepts': ['TCP handshake', 'the tcp handshakes', 'UDP'],
+    })
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data['status'] == 'success'
+    assert [e['concept'] for e in data['explanations']] == ['TCP handshake', 'the tcp handshakes', 'UDP']
+    assert data['explanations'][0]['explanation'] == data['explanations'][1]['explanation']
+    assert sorted(calls) == ['TCP handshake', 'UDP']
+
+    response = client.post('/explain', json={'transcript': TRANSCRIPT, 'concepts': ['The TCP Handshakes']})
+    data = response.get_json()
+    assert data['explanations'][0]['cached'] is True
+    assert len(calls) == 2
+
+
+def test_explain_rejects_non_string_concepts():
+    from backend import api
+
+    response = api.app.test_client().post('/explain', json={'transcript': TRANSCRIPT, 'concepts': ['TCP', 3]})
+    assert response.status_code == 400
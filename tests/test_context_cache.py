@@ -0,0 +1,74 @@
+import pytest
+
+from backend import context_cache
+from backend.context_cache import ContextCache, LocalContextCache, lecture_prefix
+
+
+class RecordingCache(ContextCache):
+    """Provider stand-in that shares registrations through storage_dir"""
+
+    def __init__(self, storage_dir, created):
+        super().__init__(ttl=100, storage_dir=storage_dir, min_uses=1)
+        self.created = created
+
+    def min_chars(self, model_name):
+        return 0
+
+    def _create(self, key, model_name, prefix):
+        self.created.append(key)
+        return f'cached/{len(self.created)}'
+
+    def _extend(self, entry):
+        pass
+
+    def _generate(self, entry, model_name, prefix, suffix, get_model):
+        return entry['name']
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(context_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def test_extension_by_another_worker_is_seen(tmp_path, clock):
+    created = []
+    first = RecordingCache(tmp_path, created)
+    second = RecordingCache(tmp_path, created)
+    prefix = lecture_prefix("A lecture about paging.")
+
+    first.register('models/gemini-2.5-flash', prefix)
+    assert second.register('models/gemini-2.5-flash', prefix)['name'] == 'cached/1'
+
+    # The first worker extends the TTL past the second worker's copy
+    clock[0] += 60
+    first.register('models/gemini-2.5-flash', prefix)
+    clock[0] += 15
+    entry = second.register('models/gemini-2.5-flash', prefix)
+
+    assert entry['name'] == 'cached/1'
+    assert entry['expires'] == 1000.0 + 60 + 100
+    assert len(created) == 1
+
+
+def test_expired_entry_is_registered_again(tmp_path, clock):
+    created = []
+    cache = RecordingCache(tmp_path, created)
+    prefix = lecture_prefix("A lecture about paging.")
+
+    cache.register('models/gemini-2.5-flash', prefix)
+    clock[0] += 200
+    assert cache.register('models/gemini-2.5-flash', prefix)['name'] == 'cached/2'
+
+
+def test_prefix_is_registered_on_second_use():
+    cache = LocalContextCache()
+    prefix = lecture_prefix("A lecture about paging.")
+    assert cache.register('models/gemini-2.5-flash', prefix)['name'] is None
+    assert cache.register('models/gemini-2.5-flash', prefix)['name'] is not None
+
+
+def test_hooks_are_abstract():
+    with pytest.raises(TypeError):
+        ContextCache()
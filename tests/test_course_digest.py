@@ -0,0 +1,87 @@
+import pytest
+
+from backend.course_digest import CourseDigest
+
+
+def lecture_notes(*concepts):
+    items = '\n\n'.join(f'**{n}. {concept}**  \n→ Explained' for n, concept in enumerate(concepts, 1))
+    return f"""# 📚 LECTURE OVERVIEW
+
+An overview that mentions **bold words** too.
+
+---
+
+# 🎯 KEY CONCEPTS
+
+{items}
+
+---
+
+# 📖 DEFINITIONS & TERMINOLOGY
+
+**Frame**: A block of physical memory
+"""
+
+
+@pytest.fixture
+def combined():
+    return []
+
+
+@pytest.fixture
+def digest(tmp_path, combined):
+    def combine(left, right):
+        combined.append((left, right))
+        return f'({left}+{right})'
+    return CourseDigest(combine, storage_dir=tmp_path)
+
+
+def test_tree_combines_lectures_pairwise(digest, combined):
+    for n in range(1, 5):
+        result = digest.set_lecture('os', f'l{n}', f'S{n}')
+
+    assert result['summary'] == '((S1+S2)+(S3+S4))'
+    assert [lecture['title'] for lecture in result['lectures']] == ['Lecture 1', 'Lecture 2', 'Lecture 3', 'Lecture 4']
+
+
+def test_changing_a_lecture_only_recomputes_its_path(digest, combined):
+    for n in range(1, 9):
+        digest.set_lecture('os', f'l{n}', f'S{n}')
+
+    result = digest.set_lecture('os', 'l3', 'S3 revised')
+
+    # One node per level above the leaf: log2(8)
+    assert result['recomputed_nodes'] == 3
+    assert result['summary'].startswith('(((S1+S2)+(S3 revised+S4))')
+
+
+def test_appending_promotes_the_odd_lecture_unchanged(digest, combined):
+    for n in range(1, 4):
+        result = digest.set_lecture('os', f'l{n}', f'S{n}')
+
+    assert result['summary'] == '((S1+S2)+S3)'
+    assert digest.set_lecture('os', 'l4', 'S4')['recomputed_nodes'] == 2
+
+
+def test_digest_is_shared_through_storage(tmp_path, digest, combined):
+    digest.set_lecture('os', 'l1', 'S1')
+    digest.set_lecture('os', 'l2', 'S2')
+
+    other_worker = CourseDigest(lambda left, right: pytest.fail('nodes should be reused'), storage_dir=tmp_path)
+    result = other_worker.get_digest('os')
+
+    assert result['summary'] == '(S1+S2)'
+    assert result['recomputed_nodes'] == 0
+    assert other_worker.get_digest('unknown') is None
+
+
+def test_concept_map_uses_the_notes_parser(digest):
+    digest.set_lecture('os', 'l1', lecture_notes('PAGING', 'Page Table'), title='Memory')
+    result = digest.set_lecture('os', 'l2', lecture_notes('paging', 'Scheduling'), title='CPU')
+
+    assert result['concept_map'] == {
+        'PAGING': ['Memory', 'CPU'],
+        'Page Table': ['Memory'],
+        'Frame': ['Memory', 'CPU'],
+        'Scheduling': ['CPU'],
+    }
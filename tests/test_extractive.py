@@ -0,0 +1,103 @@
+from backend.extractive import extractive_summary, key_sentences, key_terms, split_sentences
+from backend.providers import ProviderRegistry
+
+TRANSCRIPT = """[00:01] Okay, let's get started.
+[00:05] Today we cover how a hash table stores keys in an array of buckets.
+[00:20] A hash function maps every key to one of the buckets in the array.
+[00:41] When two keys land in the same bucket we call that a collision.
+[01:02] Collisions are handled with chaining, where each bucket holds a linked list of keys.
+[01:30] Collisions are handled with chaining, where each bucket keeps a linked list of keys.
+[01:55] The load factor is the number of keys divided by the number of buckets.
+[02:20] When the load factor grows too large the hash table doubles its buckets and rehashes every key.
+[02:48] Any questions?
+"""
+
+
+def test_sentences_drop_live_timestamps():
+    sentences = split_sentences(TRANSCRIPT)
+
+    assert sentences[0] == "Okay, let's get started."
+    assert not any(sentence.startswith('[') for sentence in sentences)
+
+
+def test_key_sentences_keep_lecture_order_and_skip_repeats():
+    sentences = split_sentences(TRANSCRIPT)
+    picked = key_sentences(sentences, count=4)
+
+    assert len(picked) == 4
+    assert picked == sorted(picked, key=sentences.index)
+    # Too short to say anything on their own
+    assert 'Any questions?' not in picked
+    assert "Okay, let's get started." not in picked
+    # The repeated chaining sentence is picked at most once
+    assert sum('chaining' in sentence for sentence in picked) <= 1
+
+
+def test_key_terms_are_repeated_content_phrases():
+    terms = [term.lower() for term in key_terms(split_sentences(TRANSCRIPT), count=5)]
+
+    assert terms[0] == 'linked list'
+    assert 'collision' in terms
+    assert not any(word in term.split() for term in terms for word in ('the', 'okay', 'we'))
+
+
+def test_summary_is_markdown_preview():
+    result = extractive_summary(TRANSCRIPT, num_sentences=3)
+
+    assert result['status'] == 'success'
+    assert result['extractive'] is True
+    assert result['summary'].startswith('# ⚡ QUICK PREVIEW')
+    assert len(result['key_sentences']) == 3
+    for sentence in result['key_sentences']:
+        assert f'- {sentence}' in result['summary']
+
+
+def test_degraded_summary_says_why():
+    preview = extractive_summary(TRANSCRIPT)['summary']
+    degraded = extractive_summary(TRANSCRIPT, degraded_reason='Gemini is down')['summary']
+
+    assert "aren't available right now" in degraded
+    assert "aren't available right now" not in preview
+
+
+def test_empty_transcript_has_no_key_sentences():
+    result = extractive_summary('')
+
+    assert result['status'] == 'success'
+    assert result['key_sentences'] == []
+    assert result['key_terms'] == []
+
+
+def test_preview_route_returns_lecture_id_for_the_summary():
+    from backend import api
+
+    client = api.app.test_client()
+    response = client.post('/summary/preview', json={'text': TRANSCRIPT})
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data['extractive'] is True
+    assert data['key_sentences']
+
+    again = client.post('/summary/preview', json={'lecture_id': data['lecture_id']})
+    assert again.get_json()['key_sentences'] == data['key_sentences']
+
+    assert client.post('/summary/preview', json={'text': '  '}).status_code == 400
+
+
+def test_summary_falls_back_to_preview_when_the_model_is_unavailable(monkeypatch):
+    from backend import api
+
+    class Broken:
+        def __init__(self):
+            raise ValueError('API key not configured')
+
+    registry = ProviderRegistry()
+    registry.register('summarizer', Broken)
+    monkeypatch.setattr(api, 'providers', registry)
+
+    text = TRANSCRIPT + '[03:10] Next week we look at balanced search trees instead.\n'
+    data = api.app.test_client().post('/summary', json={'text': text}).get_json()
+    assert data['status'] == 'success'
+    assert data['degraded'] is True
+    assert 'summarizer is unavailable' in data['warning']
+    assert "aren't available right now" in data['summary']
@@ -0,0 +1,170 @@
+import io
+import os
+import threading
+import time
+
+import pytest
+from werkzeug.serving import make_server
+
+from backend import api
+from backend.jobs import WEBHOOK_AUTH_HEADER, JobStore, JobSweeper
+
+SUCCESS = {'status': 'success', 'text': 'transcript', 'error': None}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """The app on a real port, so the fake transcriber can call its webhook"""
+    httpd = make_server('127.0.0.1', 0, api.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    monkeypatch.setenv('GAKU_PUBLIC_URL', f'http://127.0.0.1:{httpd.server_port}')
+    yield httpd
+    httpd.shutdown()
+
+
+def submit(client, audio):
+    response = client.post('/transcribe', data={'mode': 'async', 'file': (io.BytesIO(audio), 'lecture.mp3')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 202
+    return response.get_json()['job_id']
+
+
+def wait_for_job(client, job_id, step=None, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if step:
+            step()
+        body = client.get(f'/jobs/{job_id}').get_json()
+        if body['status'] != 'processing':
+            return body
+        time.sleep(0.05)
+    pytest.fail(f'job {job_id} still processing after {timeout}s')
+
+
+def test_webhook_finishes_submitted_job(server):
+    with api.app.test_client() as client:
+        job_id = submit(client, b'webhook lecture audio')
+        body = wait_for_job(client, job_id)
+
+    assert body['status'] == 'success'
+    assert body['job_id'] == job_id
+    assert body['text']
+    assert api.lectures.get(body['lecture_id'])
+
+
+def test_sweeper_finishes_job_whose_webhook_was_lost(monkeypatch):
+    monkeypatch.setenv('GAKU_FAKE_WEBHOOK_LOSS', '1')
+    monkeypatch.setattr(api.job_sweeper, 'grace', 0)
+
+    with api.app.test_client() as client:
+        job_id = submit(client, b'lost webhook lecture audio')
+        assert client.get(f'/jobs/{job_id}').get_json()['status'] == 'processing'
+        body = wait_for_job(client, job_id, step=api.job_sweeper.sweep)
+
+    assert body['status'] == 'success'
+    assert api.lectures.get(body['lecture_id'])
+
+
+def test_finish_during_submit_update_is_kept(tmp_path, monkeypatch):
+    jobs = JobStore(tmp_path)
+    job = jobs.create()
+    read = jobs.get
+    webhook = threading.Thread(target=jobs.finish, args=(job['id'], SUCCESS))
+
+    def get(job_id):
+        stored = read(job_id)
+        if not webhook.is_alive() and webhook.ident is None:
+            # The webhook finishes the job between update()'s read and write
+            webhook.start()
+            webhook.join(timeout=0.5)
+        return stored
+
+    monkeypatch.setattr(jobs, 'get', get)
+    jobs.update(job['id'], provider_id='provider-1')
+    webhook.join()
+
+    assert read(job['id'])['status'] == 'success'
+    assert jobs.stale(0) == []
+
+
+@pytest.mark.parametrize('on_disk', [True, False])
+def test_update_does_not_reopen_finished_job(tmp_path, on_disk):
+    jobs = JobStore(tmp_path if on_disk else None)
+    job = jobs.create()
+    jobs.finish(job['id'], SUCCESS)
+
+    updated = jobs.update(job['id'], provider_id='late', status='processing')
+
+    assert updated['status'] == 'success'
+    assert jobs.get(job['id'])['result'] == SUCCESS
+    assert jobs.stale(0) == []
+
+
+@pytest.mark.parametrize('token', ['wrong', 'tökén'])
+def test_webhook_rejects_bad_token(token):
+    job = api.jobs.create()
+    with api.app.test_client() as client:
+        response = client.post(f"/webhooks/transcription/{job['id']}", json={},
+                               headers={WEBHOOK_AUTH_HEADER: token})
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize('shared', [True, False])
+def test_only_one_sweeper_polls_a_job(tmp_path, shared):
+    if shared:
+        # Two workers sharing the jobs directory
+        first, second = JobStore(tmp_path), JobStore(tmp_path)
+    else:
+        first = second = JobStore()
+    job = first.create()
+    first.update(job['id'], checked=0)
+
+    polled = []
+    other = JobSweeper(second, lambda job: polled.append('other'), grace=60)
+
+    def poll(job):
+        # The other worker sweeps while this one is still waiting on the provider
+        polled.append('first')
+        assert other.sweep() == 0
+        first.finish(job['id'], SUCCESS)
+
+    assert JobSweeper(first, poll, grace=60).sweep() == 1
+    assert polled == ['first']
+    assert second.get(job['id'])['status'] == 'success'
+    assert second.stale(0) == []
+
+
+def test_abandoned_claim_is_taken_back(tmp_path):
+    jobs = JobStore(tmp_path)
+    job = jobs.create()
+    jobs.update(job['id'], checked=0)
+    assert jobs.claim(job['id'])
+    assert not jobs.claim(job['id'])
+
+    # The worker holding the claim died long ago
+    claimed = tmp_path / 'claimed' / job['id']
+    os.utime(claimed, (0, 0))
+
+    assert [stale['id'] for stale in jobs.stale(60)] == [job['id']]
+    assert jobs.claim(job['id'])
+
+
+@pytest.mark.parametrize('on_disk', [True, False])
+def test_finished_jobs_are_deleted_after_ttl(tmp_path, on_disk):
+    jobs = JobStore(tmp_path if on_disk else None, ttl=60)
+    finished = jobs.create()
+    jobs.finish(finished['id'], SUCCESS)
+    waiting = jobs.create()
+    recent = jobs.create()
+    jobs.finish(recent['id'], SUCCESS)
+
+    for job_id in (finished['id'], waiting['id']):
+        if on_disk:
+            os.utime(tmp_path / f'{job_id}.json', (0, 0))
+        else:
+            jobs._jobs[job_id]['checked'] = 0
+
+    assert jobs.purge() == 1
+    assert jobs.get(finished['id']) is None
+    assert jobs.get(waiting['id'])['status'] == 'processing'
+    assert jobs.get(recent['id'])['status'] == 'success'
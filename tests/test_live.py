@@ -0,0 +1,80 @@
+import json
+
+from backend.lecture_store import LectureStore
+from backend.live import LiveSession, LocalStreamingAdapter, BYTES_PER_SECOND, run_live_session
+
+
+class RecordingSocket:
+    """flask-sock WebSocket stand-in that records what is sent"""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = None
+
+    def send(self, message):
+        self.sent.append(json.loads(message))
+
+    def receive(self, timeout=None):
+        raise AssertionError('the session should not read audio')
+
+    def close(self, reason=None, message=None):
+        self.closed = reason
+
+
+class FailingAdapter(LocalStreamingAdapter):
+    def start(self, on_segment, on_error):
+        raise ConnectionError('401 Unauthorized')
+
+
+def run_session(seconds, on_transcript, **options):
+    session = LiveSession(LocalStreamingAdapter(segment_seconds=1), on_transcript=on_transcript,
+                          max_buffered_seconds=60, **options)
+    session.start()
+    for _ in range(seconds * 10):
+        session.push_audio(b'\0' * (BYTES_PER_SECOND // 10))
+    transcript = session.stop()
+    return session, transcript
+
+
+def test_transcript_is_stored_at_checkpoints_and_at_stop():
+    stored = []
+    session, transcript = run_session(25, lambda text: stored.append(text) or {'n': len(stored)},
+                                      checkpoint_segments=10, checkpoint_seconds=3600)
+
+    assert len(session.segments) == 25
+    # After segments 10 and 20, then the rest when stopping
+    assert len(stored) == 3
+    assert stored[-1] == transcript
+    # Segment events carry their checkpoint; the last one goes out with 'done'
+    events = [e for e in session.drain_events() if e.get('n')]
+    assert [e['n'] for e in events] == [1, 2]
+    assert session.checkpoint == {'n': 3}
+
+
+def test_stop_without_new_segments_does_not_store_again():
+    stored = []
+    run_session(10, stored.append, checkpoint_segments=10, checkpoint_seconds=3600)
+    assert len(stored) == 1
+
+
+def test_discard_removes_superseded_checkpoint(tmp_path):
+    store = LectureStore(tmp_path)
+    first = store.add("[00:00] Hello.")
+    store.set_artifact(first, "notes", {"sections": []})
+    second = store.add("[00:00] Hello.\n[00:03] World.")
+    store.discard(first)
+
+    assert first not in store
+    assert store.get(second)
+    assert store.get_artifact(first, "notes") == {"sections": []}
+    assert sorted(p.name for p in tmp_path.glob("*.txt")) == [f"{second}.txt"]
+
+
+def test_provider_failure_on_start_is_reported():
+    ws = RecordingSocket()
+
+    run_live_session(ws, LiveSession(FailingAdapter()))
+
+    assert [event['type'] for event in ws.sent] == ['error']
+    assert '401 Unauthorized' in ws.sent[0]['error']
+    assert ws.closed == 1011
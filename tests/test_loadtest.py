@@ -0,0 +1,23 @@
+from benchmarks.loadtest import Recorder, classify, summarize
+
+
+def test_degraded_summary_is_not_ok():
+    assert classify(200, {'status': 'success', 'degraded': True}) == 'degraded'
+    assert classify(200, {'status': 'success', 'degraded': False}) == 'ok'
+    assert classify(200, {'status': 'success'}) == 'ok'
+    assert classify(500, {'status': 'error', 'error': 'boom'}) == 'error'
+    assert classify(429, {}) == 'rate_limited'
+
+
+def test_report_counts_degraded_separately():
+    recorder = Recorder()
+    recorder.add('summary', 0.0, 0.1, classify(200, {'status': 'success', 'degraded': True}), 200)
+    recorder.add('summary', 0.1, 0.1, classify(200, {'status': 'success'}), 200)
+
+    report = summarize(recorder, bucket_seconds=1)
+
+    row = report['endpoints']['summary']
+    assert row['degraded_rate'] == 0.5
+    assert row['error_rate'] == 0.0
+    assert report['degraded_rate'] == 0.5
+    assert report['timeline'][0]['degraded'] == 1
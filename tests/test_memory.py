@@ -0,0 +1,119 @@
+import os
+import threading
+
+from backend.memory import ConversationMemory, MemoryStore
+
+
+def no_summary(summary, turns):
+    return summary
+
+
+def test_turns_from_another_worker_are_not_lost(tmp_path):
+    # Two workers sharing the memory directory
+    first = MemoryStore(no_summary, storage_dir=tmp_path)
+    second = MemoryStore(no_summary, storage_dir=tmp_path)
+
+    first.record("lecture:session", "What is paging?", "Answer 1")
+    second.record("lecture:session", "What is a TLB?", "Answer 2")
+    first.record("lecture:session", "What is a page fault?", "Answer 3")
+
+    for store in (first, second):
+        rendered = store.get("lecture:session").render()
+        assert "What is paging?" in rendered
+        assert "What is a TLB?" in rendered
+        assert "What is a page fault?" in rendered
+
+
+def test_clear_during_fold_is_not_undone(tmp_path):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_summary(summary, turns):
+        started.set()
+        release.wait(10)
+        return "- Student asked about paging"
+
+    store = MemoryStore(slow_summary, storage_dir=tmp_path, token_budget=20)
+    store.record("lecture:session", "What is paging? " * 5, "Paging splits memory into pages. " * 5)
+    store.record("lecture:session", "What is a TLB?", "A cache of page table entries.")
+    assert started.wait(10)
+
+    store.clear("lecture:session")
+    release.set()
+    store._executor.submit(lambda: None).result(10)
+
+    memory = store.get("lecture:session")
+    assert memory.summary == ""
+    assert memory.pending == [] and memory.turns == []
+    reloaded = MemoryStore(no_summary, storage_dir=tmp_path).get("lecture:session")
+    assert reloaded.render() == "No previous questions."
+
+
+def test_fold_keeps_latest_turn_and_summarises_older_ones():
+    memory = ConversationMemory(token_budget=20)
+    memory.add_turn("What is paging? " * 5, "Long answer. " * 10)
+    assert memory.add_turn("What is a TLB?", "A cache.")
+
+    memory.fold(lambda summary, turns: f"- {len(turns)} earlier question")
+    assert memory.summary == "- 1 earlier question"
+    assert memory.pending == []
+    assert [t['question'] for t in memory.turns] == ["What is a TLB?"]
+
+
+def test_concurrent_workers_do_not_lose_turns(tmp_path):
+    workers = [MemoryStore(no_summary, storage_dir=tmp_path, token_budget=100000) for _ in range(2)]
+
+    def chat(store, name):
+        for i in range(20):
+            store.record("lecture:session", f"{name} question {i}", "answer")
+
+    threads = [threading.Thread(target=chat, args=(store, f"worker{n}")) for n, store in enumerate(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    turns = MemoryStore(no_summary, storage_dir=tmp_path).get("lecture:session").turns
+    assert len(turns) == 40
+
+
+def test_stale_fold_does_not_undo_another_workers_changes(tmp_path):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_summary(summary, turns):
+        started.set()
+        release.wait(10)
+        return "- Student asked about paging"
+
+    first = MemoryStore(slow_summary, storage_dir=tmp_path, token_budget=20)
+    second = MemoryStore(lambda summary, turns: "- Folded by the second worker", storage_dir=tmp_path,
+                         token_budget=20)
+    first.record("lecture:session", "What is paging? " * 5, "Paging splits memory into pages. " * 5)
+    first.record("lecture:session", "What is a TLB?", "A cache of page table entries.")
+    assert started.wait(10)
+
+    # The second worker records a turn and folds the same pending turns first
+    second.record("lecture:session", "What is a page fault?", "A missing page.")
+    second._executor.submit(lambda: None).result(10)
+    release.set()
+    first._executor.submit(lambda: None).result(10)
+
+    saved = MemoryStore(no_summary, storage_dir=tmp_path).get("lecture:session")
+    # The first worker's fold is stale and dropped; nothing it saved undoes the second's work
+    assert saved.summary == "- Folded by the second worker"
+    assert saved.pending == []
+    assert [turn["question"] for turn in saved.turns] == ["What is a page fault?"]
+
+
+def test_idle_conversations_are_deleted(tmp_path):
+    store = MemoryStore(no_summary, storage_dir=tmp_path, max_age=3600)
+    store.record("lecture:old", "What is paging?", "Answer")
+    store.record("lecture:new", "What is a TLB?", "Answer")
+    old_path = store._path("lecture:old")
+    os.utime(old_path, (0, 0))
+
+    assert store.prune() == 1
+    assert not old_path.exists()
+    assert store._path("lecture:new").exists()
+    assert store.get("lecture:old").render() == "No previous questions."
@@ -0,0 +1,124 @@
+from backend.notes import concept_names, merge_notes, parse_notes, render_notes
+
+NOTES = """# 📚 LECTURE OVERVIEW
+
+This lecture introduces virtual memory.
+
+It explains why programs see a private address space.
+
+---
+
+# 🎯 KEY CONCEPTS
+
+**1. PAGING**  
+→ Memory is split into fixed-size pages
+
+**2. PAGE TABLE**  
+→ Maps virtual pages to physical frames
+
+---
+
+# 💡 IMPORTANT DETAILS
+
+- **Page size**: Usually 4 KiB
+- **TLB**: Caches recent translations
+
+---
+
+# ✅ KEY TAKEAWAYS
+
+1. **Isolation**: Each process has its own address space
+2. **Cost**: Translation needs hardware support
+"""
+
+UPDATE = """# 🎯 KEY CONCEPTS
+
+**1. Paging**  
+→ Repeated by the model for the new part
+
+**2. PAGE FAULT**  
+→ Raised when a page is not in memory
+
+---
+
+# 📖 DEFINITIONS & TERMINOLOGY
+
+**Swap**: Disk space holding evicted pages
+
+---
+
+# ✅ KEY TAKEAWAYS
+
+1. **Faults are slow**: They need a disk read
+"""
+
+
+def entries(sections, key):
+    return next(s['entries'] for s in sections if key in s['heading'])
+
+
+def test_parse_splits_sections_and_entries():
+    sections = parse_notes(NOTES)
+
+    assert [s['heading'] for s in sections] == [
+        '# 📚 LECTURE OVERVIEW', '# 🎯 KEY CONCEPTS', '# 💡 IMPORTANT DETAILS', '# ✅ KEY TAKEAWAYS'
+    ]
+    # Prose paragraphs stay one entry; list items and bold titles are one each
+    assert entries(sections, 'OVERVIEW') == [
+        'This lecture introduces virtual memory.\n\nIt explains why programs see a private address space.'
+    ]
+    assert entries(sections, 'KEY CONCEPTS') == [
+        '**1. PAGING**\n→ Memory is split into fixed-size pages',
+        '**2. PAGE TABLE**\n→ Maps virtual pages to physical frames',
+    ]
+    assert len(entries(sections, 'DETAILS')) == 2
+
+
+def test_render_round_trips():
+    sections = parse_notes(NOTES)
+    rendered = render_notes(sections)
+
+    assert parse_notes(rendered) == sections
+    assert render_notes(parse_notes(rendered)) == rendered
+
+
+def test_merge_skips_entries_already_present():
+    merged = merge_notes(parse_notes(NOTES), parse_notes(UPDATE))
+
+    concepts = entries(merged, 'KEY CONCEPTS')
+    # "1. Paging" is "1. PAGING" again, whatever its number or case
+    assert [c.splitlines()[0] for c in concepts] == ['**1. PAGING**', '**2. PAGE TABLE**', '**2. PAGE FAULT**']
+    assert 'Repeated by the model' not in render_notes(merged)
+
+
+def test_merge_keeps_section_order_and_renumbers():
+    merged = merge_notes(parse_notes(NOTES), parse_notes(UPDATE))
+
+    assert [s['heading'] for s in merged] == [
+        '# 📚 LECTURE OVERVIEW', '# 🎯 KEY CONCEPTS', '# 💡 IMPORTANT DETAILS',
+        '# 📖 DEFINITIONS & TERMINOLOGY', '# ✅ KEY TAKEAWAYS'
+    ]
+    rendered = render_notes(merged)
+    assert '**3. PAGE FAULT**' in rendered
+    assert '3. **Faults are slow**' in rendered
+
+
+def test_merge_caps_sections_keeping_newest():
+    base = [{'heading': '# ❓ STUDY QUESTIONS', 'entries': [f'{n}. Question {n}?' for n in range(1, 7)]}]
+    update = [{'heading': '# ❓ STUDY QUESTIONS', 'entries': ['1. Question 7?', '2. Question 8?']}]
+
+    merged = merge_notes(base, update)
+
+    assert render_notes(merged).strip().split('\n\n')[1:] == [f'{n - 1}. Question {n}?' for n in range(2, 9)]
+    # The inputs are not modified
+    assert len(base[0]['entries']) == 6
+
+
+def test_merge_is_idempotent():
+    sections = parse_notes(NOTES)
+    assert merge_notes(sections, sections) == sections
+
+
+def test_concept_names_for_tail_prompt():
+    merged = merge_notes(parse_notes(NOTES), parse_notes(UPDATE))
+    assert concept_names(merged) == ['PAGING', 'PAGE TABLE', 'PAGE FAULT', 'Swap']
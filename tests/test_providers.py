@@ -0,0 +1,103 @@
+import sys
+
+import pytest
+
+from backend.providers import ProviderRegistry, ProviderUnavailable
+
+
+class Client:
+    created = 0
+
+    def __init__(self, **kwargs):
+        Client.created += 1
+        self.kwargs = kwargs
+
+
+class Flaky:
+    """Fails until its key is configured"""
+    key = None
+
+    def __init__(self):
+        if Flaky.key is None:
+            raise ValueError('API key not configured')
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    Client.created = 0
+    Flaky.key = None
+
+
+def test_client_is_created_on_first_get_and_reused():
+    registry = ProviderRegistry()
+    registry.register('chatbot', Client, memory_dir='memory')
+
+    assert Client.created == 0
+    assert not registry.is_initialized('chatbot')
+
+    first = registry.get('chatbot')
+    assert registry.get('chatbot') is first
+    assert Client.created == 1
+    assert first.kwargs == {'memory_dir': 'memory'}
+    assert registry.is_initialized('chatbot')
+
+
+def test_failed_creation_is_not_cached():
+    registry = ProviderRegistry()
+    registry.register('summarizer', Flaky)
+
+    with pytest.raises(ProviderUnavailable) as raised:
+        registry.get('summarizer')
+    assert raised.value.name == 'summarizer'
+    assert 'API key not configured' in str(raised.value)
+    assert not registry.is_initialized('summarizer')
+
+    Flaky.key = 'configured'
+    assert isinstance(registry.get('summarizer'), Flaky)
+
+
+def test_spec_is_not_imported_until_needed(monkeypatch):
+    registry = ProviderRegistry()
+    monkeypatch.delitem(sys.modules, 'backend.fakes', raising=False)
+    registry.register('transcriber', 'backend.fakes:FakeTranscriber')
+    assert 'backend.fakes' not in sys.modules
+
+    registry.preload_modules()
+    assert 'backend.fakes' in sys.modules
+    assert not registry.is_initialized('transcriber')
+
+    assert type(registry.get('transcriber')).__name__ == 'FakeTranscriber'
+
+
+def test_warm_up_reports_each_provider():
+    registry = ProviderRegistry()
+    registry.register('chatbot', Client)
+    registry.register('summarizer', Flaky)
+
+    assert registry.warm_up() == {'chatbot': None, 'summarizer': 'API key not configured'}
+    assert registry.is_initialized('chatbot')
+
+    assert registry.warm_up(['summarizer']) == {'summarizer': 'API key not configured'}
+
+
+def test_reset_drops_created_clients():
+    registry = ProviderRegistry()
+    registry.register('chatbot', Client)
+    first = registry.get('chatbot')
+
+    registry.reset()
+    assert not registry.is_initialized('chatbot')
+    assert registry.get('chatbot') is not first
+    assert Client.created == 2
+
+
+def test_api_answers_503_when_a_provider_is_unavailable(monkeypatch):
+    from backend import api
+
+    registry = ProviderRegistry()
+    registry.register('chatbot', Flaky)
+    monkeypatch.setattr(api, 'providers', registry)
+
+    response = api.app.test_client().get('/chat/stats')
+    assert response.status_code == 503
+    assert 'chatbot is unavailable' in response.get_json()['error']
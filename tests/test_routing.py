@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+
+import pytest
+
+from backend.fakes import FakeResponse
+from backend.routing import ModelRouter, load_routing_config
+
+FAST = 'models/gemini-2.5-flash-lite'
+BALANCED = 'models/gemini-2.5-flash'
+
+
+class SlowModel:
+    def __init__(self, name, delays, threads, failing):
+        self.name = name
+        self.delays = delays
+        self.threads = threads
+        self.failing = failing
+
+    def generate_content(self, prompt):
+        self.threads.append((self.name, threading.current_thread()))
+        time.sleep(self.delays.get(self.name, 0))
+        if self.name in self.failing:
+            raise RuntimeError(f'{self.name} is down')
+        return FakeResponse(self.name)
+
+
+@pytest.fixture
+def models():
+    return {'delays': {}, 'threads': [], 'failing': set()}
+
+
+def make_router(models, hedge=True, **options):
+    config = load_routing_config(json.dumps({
+        'hedge': {'enabled': hedge, 'initial_delay_s': 0.05, 'min_samples': 1000}
+    }))
+    return ModelRouter(lambda name: SlowModel(name, **models), config=config, **options)
+
+
+def test_without_hedging_the_call_runs_on_the_calling_thread(models):
+    router = make_router(models, hedge=False)
+
+    assert router.generate('chat', 'hi').text == FAST
+    assert models['threads'] == [(FAST, threading.current_thread())]
+
+
+def test_fast_primary_is_not_hedged(models):
+    router = make_router(models)
+
+    assert router.generate('chat', 'hi').text == FAST
+    assert router.stats()['hedged'] == 0
+
+
+def test_slow_primary_is_hedged_and_the_hedge_wins(models):
+    models['delays'][FAST] = 0.5
+    router = make_router(models)
+
+    started = time.perf_counter()
+    assert router.generate('chat', 'hi').text == BALANCED
+    assert time.perf_counter() - started < 0.4
+
+    stats = router.stats()
+    assert (stats['hedged'], stats['hedge_wins']) == (1, 1)
+
+
+def test_failed_primary_is_retried_on_fallback(models):
+    models['failing'].add(FAST)
+    router = make_router(models)
+
+    assert router.generate('chat', 'hi').text == BALANCED
+    assert router.stats()['fallbacks'] == 1
+
+
+def test_primary_does_not_queue_behind_busy_hedge_pool(models):
+    router = make_router(models, max_workers=2)
+    release = threading.Event()
+    for _ in range(2):
+        router._pool().submit(release.wait)
+    threading.Timer(1.0, release.set).start()
+
+    # The primary still starts at once and answers before the hedge delay
+    started = time.perf_counter()
+    assert router.generate('chat', 'hi').text == FAST
+    assert time.perf_counter() - started < 0.5
+    assert router.stats()['hedged'] == 0
+
+
+def test_no_hedge_when_all_hedge_slots_are_busy(models):
+    models['delays'][FAST] = 0.2
+    router = make_router(models, max_workers=1)
+    router._hedge_slots.acquire()
+
+    assert router.generate('chat', 'hi').text == FAST
+
+    stats = router.stats()
+    assert (stats['hedged'], stats['hedges_skipped']) == (0, 1)
+
+
+def test_routes_by_operation_and_prompt_size(models):
+    router = make_router(models, hedge=False)
+
+    assert router.tier_for('chat', 'short question') == 'fast'
+    assert router.tier_for('chat', 'x' * 60001) == 'balanced'
+    assert router.tier_for('summary', 'x') == 'strong'
+    assert router.tier_for('something_new', 'x') == 'balanced'
+
+
+def test_override_keeps_the_other_defaults():
+    config = load_routing_config(json.dumps({
+        'tiers': {'fast': 'models/custom-lite'},
+        'routes': {'summary': 'balanced'},
+    }))
+
+    assert config['tiers'] == {'fast': 'models/custom-lite', 'balanced': BALANCED, 'strong': 'models/gemini-2.5-pro'}
+    assert config['routes']['summary'] == 'balanced'
+    assert config['routes']['quiz'] == 'balanced'
+    assert config['hedge']['enabled'] is False
+
+
+def test_config_can_be_read_from_a_file(tmp_path):
+    path = tmp_path / 'models.json'
+    path.write_text(json.dumps({'routes': {'chat': 'strong'}}))
+
+    assert load_routing_config(str(path))['routes']['chat'] == 'strong'
+
+
+@pytest.mark.parametrize('raw, message', [
+    ('{"routes": ', 'not valid JSON'),
+    ('{"routes": {"chat": "turbo"}}', 'unknown model tiers: turbo'),
+    ('{"routes": {"chat": [{"max_chars": 10, "tier": "tiny"}]}}', 'unknown model tiers: tiny'),
+])
+def test_invalid_config_is_rejected(raw, message):
+    with pytest.raises(ValueError, match=message):
+        load_routing_config(raw)
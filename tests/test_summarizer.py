@@ -0,0 +1,115 @@
+import pytest
+
+from backend import api
+from backend.fakes import FakeResponse
+from backend.summarizer import MIN_TAIL_CHARS, Summarizer
+
+FIRST_PART = "Paging splits memory into fixed-size pages. " * 20
+NEW_PART = "A page fault happens when a page is not in memory. " * 12
+
+FULL_NOTES = """# 🎯 KEY CONCEPTS
+
+**1. PAGING**  
+→ Memory is split into fixed-size pages
+"""
+
+TAIL_NOTES = """# 🎯 KEY CONCEPTS
+
+**1. Paging**  
+→ Mentioned again
+
+**2. PAGE FAULT**  
+→ The page is not in memory
+"""
+
+
+@pytest.fixture
+def summarizer(monkeypatch):
+    summarizer = Summarizer()
+    summarizer.calls = []
+
+    def generate(operation, prompt, prefix=None):
+        summarizer.calls.append((operation, prompt, prefix))
+        return FakeResponse(FULL_NOTES if operation == 'summary' else TAIL_NOTES)
+
+    monkeypatch.setattr(summarizer.router, 'generate', generate)
+    return summarizer
+
+
+def test_first_summary_covers_whole_transcript(summarizer):
+    result = summarizer.update_summary(FIRST_PART)
+
+    assert result['status'] == 'success'
+    assert result['incremental'] is False
+    assert [call[0] for call in summarizer.calls] == ['summary']
+    assert result['notes_state']['summarized_chars'] == len(FIRST_PART)
+
+
+def test_extended_transcript_summarises_only_the_tail(summarizer):
+    state = summarizer.update_summary(FIRST_PART)['notes_state']
+    assert len(NEW_PART) >= MIN_TAIL_CHARS
+
+    result = summarizer.update_summary(FIRST_PART + NEW_PART, state)
+
+    operation, prompt, prefix = summarizer.calls[-1]
+    assert operation == 'summary_update'
+    assert NEW_PART in prompt
+    assert 'Paging splits memory' not in prompt
+    assert 'PAGING' in prompt  # concepts already covered are listed
+    assert result['incremental'] is True
+    assert result['summary'].count('PAGING') == 1
+    assert '**2. PAGE FAULT**' in result['summary']
+    assert result['notes_state']['summarized_chars'] == len(FIRST_PART + NEW_PART)
+
+
+def test_short_tail_waits_for_more_text_while_live(summarizer):
+    state = summarizer.update_summary(FIRST_PART)['notes_state']
+
+    result = summarizer.update_summary(FIRST_PART + "And one more sentence.", state, growing=True)
+
+    assert len(summarizer.calls) == 1
+    assert result['incremental'] is True
+    assert result['pending_chars'] == len("And one more sentence.")
+    assert result['notes_state'] is state
+    assert 'PAGING' in result['summary']
+
+
+def test_short_tail_of_finished_lecture_is_summarised(summarizer):
+    state = summarizer.update_summary(FIRST_PART)['notes_state']
+
+    result = summarizer.update_summary(FIRST_PART + "And one more sentence.", state)
+
+    assert [call[0] for call in summarizer.calls] == ['summary', 'summary_update']
+    assert 'pending_chars' not in result
+
+
+@pytest.mark.parametrize('transcript', [
+    FIRST_PART.replace('Paging', 'Segmentation', 1) + NEW_PART,  # earlier text was corrected
+    FIRST_PART[:100],  # shorter than what the notes cover
+])
+def test_changed_transcript_is_summarised_again(summarizer, transcript):
+    state = summarizer.update_summary(FIRST_PART)['notes_state']
+
+    result = summarizer.update_summary(transcript, state)
+
+    assert [call[0] for call in summarizer.calls] == ['summary', 'summary']
+    assert result['incremental'] is False
+    assert result['notes_state']['summarized_chars'] == len(transcript)
+
+
+def test_notes_missing_a_short_tail_are_not_stored(summarizer, monkeypatch):
+    monkeypatch.setattr(api.providers, 'get', lambda name: summarizer)
+    base_id = api.lectures.add(FIRST_PART)
+    assert 'pending_chars' not in api.lecture_summary(base_id, FIRST_PART)
+
+    finished = FIRST_PART + "And one more sentence."
+    finished_id = api.lectures.add(finished)
+    partial = api.lecture_summary(finished_id, finished, base_lecture_id=base_id, growing=True)
+
+    assert partial['pending_chars']
+    assert api.lectures.get_artifact(finished_id, 'summary') is None
+    # Once the lecture has ended the tail is summarised and stored
+    complete = api.lecture_summary(finished_id, finished, base_lecture_id=base_id)
+    assert 'pending_chars' not in complete
+    assert [call[0] for call in summarizer.calls] == ['summary', 'summary_update']
+    assert api.lectures.get_artifact(finished_id, 'summary') == complete['summary']